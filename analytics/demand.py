@@ -0,0 +1,160 @@
+"""
+🔥 Mapa de demanda: clientes y ventas pagadas agrupados en una grilla jerárquica.
+
+Trabajo por lotes (comando build_demand_tiles): lee una vez los clientes con
+ubicación, las ventas pagadas por email y los locales, y los suma en celdas
+cuadradas web-mercator (la misma proyección que analytics/salesmap.py).
+
+  - Nivel más fino: DEMAND_ZOOMS[-1]; cada nivel anterior junta 2×2 celdas por
+    zoom de diferencia (desplazamiento de bits, sin volver a leer los datos).
+  - Se guarda por tile (DemandTile): GRID × GRID celdas por tile, solo las no vacías,
+    como filas [i, j, clientes, sin_cobertura, pedidos, ventas, locales].
+  - "sin_cobertura" = clientes donde ningún local reparte (vendor/zones.py): ahí la
+    demanda supera la oferta.
+
+El endpoint de staff sirve cada tile ya calculado con su ETag; nunca recorre la
+tabla de órdenes.
+"""
+import hashlib
+import json
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, ExpressionWrapper, Sum
+from django.db.models.functions import Lower
+
+from analytics.salesmap import mercator
+
+
+DEMAND_ZOOMS = (6, 8, 10, 12)   # resoluciones guardadas (zoom de tile)
+GRID = 16                       # celdas por lado de cada tile (16 px a ese zoom)
+GRID_BITS = 4                   # log2(GRID)
+FIELDS = ["i", "j", "customers", "uncovered", "orders", "sales", "vendors"]
+
+_C, _U, _O, _S, _V = range(5)   # índices dentro del acumulador de cada celda
+
+
+def _finest_cell(lat, lng):
+    n = 1 << (DEMAND_ZOOMS[-1] + GRID_BITS)
+    x, y = mercator(lat, lng)
+    return min(int(x * n), n - 1), min(int(y * n), n - 1)
+
+
+# ===========================================================
+#   LECTURA (una pasada por fuente)
+# ===========================================================
+def load_customers():
+    """[(email, lat, lng, comuna_id)] de perfiles de clientes con coordenadas (un perfil por email)."""
+    from vendor.models import Profile
+
+    seen, out = set(), []
+    for email, lat, lng, comuna_id in Profile.objects.filter(
+        lat__isnull=False, lng__isnull=False, user__vendor__isnull=True,
+    ).values_list("user__email", "lat", "lng", "comuna_id").order_by("id"):
+        email = (email or "").strip().lower()
+        if email and email in seen:
+            continue
+        seen.add(email)
+        out.append((email, float(lat), float(lng), comuna_id))
+    return out
+
+
+def load_sales_by_email():
+    """{email: (pedidos, ventas)} de órdenes pagadas (misma regla que el dashboard)."""
+    from order.models import OrderItem
+
+    total_expr = ExpressionWrapper(F("price") * F("quantity"), output_field=IntegerField())
+    rows = (
+        OrderItem.objects.filter(order__status__iexact="paid")
+        .values(email=Lower("order__email"))
+        .annotate(orders=Count("order", distinct=True), sales=Sum(total_expr))
+        .values_list("email", "orders", "sales")
+    )
+    return {(email or "").strip(): (orders, int(sales or 0)) for email, orders, sales in rows}
+
+
+# ===========================================================
+#   AGREGACIÓN
+# ===========================================================
+def bin_demand(customers, sales_by_email, vendor_points, delivers=None):
+    """
+    Suma todo en el nivel más fino y sube por niveles.
+    Devuelve {zoom: {(cx, cy): [clientes, sin_cobertura, pedidos, ventas, locales]}}.
+    `delivers(lat, lng, comuna_id)` → True si algún local reparte ahí.
+    """
+    finest = defaultdict(lambda: [0, 0, 0, 0, 0])
+    for email, lat, lng, comuna_id in customers:
+        acc = finest[_finest_cell(lat, lng)]
+        acc[_C] += 1
+        if delivers is not None and not delivers(lat, lng, comuna_id):
+            acc[_U] += 1
+        orders, sales = sales_by_email.get(email, (0, 0))
+        acc[_O] += orders
+        acc[_S] += sales
+
+    for _, lat, lng in vendor_points:
+        finest[_finest_cell(lat, lng)][_V] += 1
+
+    levels = {DEMAND_ZOOMS[-1]: dict(finest)}
+    for zoom in reversed(DEMAND_ZOOMS[:-1]):
+        shift = DEMAND_ZOOMS[-1] - zoom
+        coarse = defaultdict(lambda: [0, 0, 0, 0, 0])
+        for (x, y), acc in levels[DEMAND_ZOOMS[-1]].items():
+            target = coarse[(x >> shift, y >> shift)]
+            for k in range(5):
+                target[k] += acc[k]
+        levels[zoom] = dict(coarse)
+    return levels
+
+
+def tiles_from_levels(levels):
+    """{(zoom, tx, ty): [[i, j, ...valores], ...]} ordenado para un ETag estable."""
+    tiles = defaultdict(list)
+    for zoom, cells in levels.items():
+        for (x, y), acc in cells.items():
+            tiles[(zoom, x >> GRID_BITS, y >> GRID_BITS)].append([x & (GRID - 1), y & (GRID - 1), *acc])
+    for rows in tiles.values():
+        rows.sort()
+    return tiles
+
+
+def tile_etag(cells):
+    return hashlib.sha1(json.dumps(cells, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+# ===========================================================
+#   TRABAJO POR LOTES
+# ===========================================================
+def build_demand_tiles(batch_size=500):
+    """Recalcula y reemplaza todos los DemandTile. Devuelve un resumen."""
+    from analytics.models import DemandTile
+    from vendor import spatial, zones
+
+    customers = load_customers()
+    sales_by_email = load_sales_by_email()
+    zone_index = zones.get_index()
+
+    levels = bin_demand(
+        customers,
+        sales_by_email,
+        spatial.load_points(),
+        delivers=lambda lat, lng, comuna_id: bool(zone_index.vendors_at(lat, lng, comuna_id)),
+    )
+    tiles = tiles_from_levels(levels)
+
+    rows = [
+        DemandTile(zoom=zoom, x=x, y=y, cells=cells, etag=tile_etag(cells))
+        for (zoom, x, y), cells in tiles.items()
+    ]
+    with transaction.atomic():
+        DemandTile.objects.all().delete()
+        DemandTile.objects.bulk_create(rows, batch_size=batch_size)
+
+    customer_emails = {c[0] for c in customers}
+    return {
+        "customers": len(customers),
+        "uncovered": sum(acc[_U] for acc in levels[DEMAND_ZOOMS[-1]].values()),
+        "orders_matched": sum(o for e, (o, _) in sales_by_email.items() if e in customer_emails),
+        "orders_unmatched": sum(o for e, (o, _) in sales_by_email.items() if e not in customer_emails),
+        "tiles": len(rows),
+    }
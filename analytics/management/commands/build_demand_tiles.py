@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.demand import DEMAND_ZOOMS, build_demand_tiles
+
+
+class Command(BaseCommand):
+    help = (
+        "Agrupa clientes y ventas pagadas en la grilla del mapa de demanda "
+        "y reemplaza los tiles guardados (DemandTile)."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING(
+            f"⏳ Calculando demanda en zoom {', '.join(map(str, DEMAND_ZOOMS))}..."
+        ))
+        start = time.perf_counter()
+        stats = build_demand_tiles()
+
+        self.stdout.write(
+            f"   {stats['customers']} clientes con ubicación · {stats['uncovered']} sin cobertura de reparto"
+        )
+        self.stdout.write(
+            f"   {stats['orders_matched']} pedidos pagados ubicados · "
+            f"{stats['orders_unmatched']} sin cliente con ubicación (omitidos)"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {stats['tiles']} tiles guardados ({time.perf_counter() - start:.2f}s)."
+        ))
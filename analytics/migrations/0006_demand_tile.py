@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_alter_useractionlog_action'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandTile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('x', models.PositiveIntegerField()),
+                ('y', models.PositiveIntegerField()),
+                ('cells', models.JSONField(default=list)),
+                ('etag', models.CharField(max_length=16)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('zoom', 'x', 'y')},
+            },
+        ),
+    ]
@@ -20,3 +20,23 @@ class UserActionLog(models.Model):
         username = self.user.username if self.user else (self.user_name or "Anónimo")
         return f"{username} - {self.action} ({self.timestamp.strftime('%Y-%m-%d %H:%M')})"
 
+
+
+class DemandTile(models.Model):
+    """
+    Tile precalculado del mapa de demanda (analytics/demand.py): celdas no vacías
+    [i, j, clientes, sin_cobertura, pedidos, ventas, locales] de un tile web-mercator.
+    Lo reemplaza completo el comando build_demand_tiles.
+    """
+    zoom = models.PositiveSmallIntegerField()
+    x = models.PositiveIntegerField()
+    y = models.PositiveIntegerField()
+    cells = models.JSONField(default=list)
+    etag = models.CharField(max_length=16)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("zoom", "x", "y")
+
+    def __str__(self):
+        return f"Demanda z{self.zoom}/{self.x}/{self.y}"
@@ -0,0 +1,328 @@
+"""
+🗺️ Mapa de ventas por local, agrupado en el servidor.
+
+Índice en memoria con una grilla por nivel de zoom (tiles web-mercator divididos en
+CELLS_PER_TILE × CELLS_PER_TILE celdas ≈ 64 px): cada celda guarda cuántos locales
+tiene, la suma de sus ventas (históricas y de hoy) y el centroide. Una consulta
+(bbox + zoom) solo recorre las celdas visibles → el tamaño de la respuesta depende
+de la pantalla, no de la cantidad de locales.
+
+Solo se guardan los niveles 0..STORED_ZOOM; más cerca (hasta MAX_ZOOM) la pantalla
+abarca pocas celdas del último nivel y sus locales se agrupan al vuelo.
+
+Ventas = OrderItem de órdenes "paid" (misma regla que el dashboard), agregadas por
+local en dos consultas al construir. Después:
+  - una venta que cambia (orden pagada, ítem editado) solo re-agrega ese local y
+    suma la diferencia a su celda en cada nivel (una orden no mueve al local);
+  - la reconstrucción completa queda para cambios de ubicación (locales nuevos o
+    borrados, lat/lng del perfil), el cambio de día y INDEX_TTL, y corre en un hilo
+    aparte mientras se sigue sirviendo el índice anterior (analytics/signals.py).
+"""
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.db import close_old_connections, connection
+from django.db.models import F, IntegerField, ExpressionWrapper, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_TTL = 1800       # red de seguridad: otros procesos no reciben las diferencias
+MAX_ZOOM = 18          # desde aquí cada local va solo
+STORED_ZOOM = 14       # niveles guardados en memoria; los más finos se arman al vuelo
+CELLS_PER_TILE = 4     # tile de 256 px → celdas de 64 px
+MAX_LAT = 85.05112878  # límite de web-mercator
+
+
+def mercator(lat, lng):
+    """Posición web-mercator normalizada (0..1, y crece hacia el sur)."""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    rad = math.radians(lat)
+    return (lng + 180.0) / 360.0, (1.0 - math.log(math.tan(rad) + 1.0 / math.cos(rad)) / math.pi) / 2.0
+
+
+def _tile_xy(lat, lng, zoom):
+    """Coordenadas de celda (x, y) del punto en el nivel `zoom`."""
+    n = (2 ** zoom) * CELLS_PER_TILE
+    x, y = mercator(lat, lng)
+    return min(int(x * n), n - 1), min(int(y * n), n - 1)
+
+
+class _Cell:
+    __slots__ = ("count", "sales_total", "sales_today", "sum_lat", "sum_lng", "vendor_id", "members")
+
+    def __init__(self):
+        self.count = 0
+        self.sales_total = 0
+        self.sales_today = 0
+        self.sum_lat = 0.0
+        self.sum_lng = 0.0
+        self.vendor_id = None   # si la celda tiene un solo local
+        self.members = None     # ids de locales (solo en STORED_ZOOM)
+
+    def add(self, vendor_id, lat, lng, total, today):
+        self.count += 1
+        self.sales_total += total
+        self.sales_today += today
+        self.sum_lat += lat
+        self.sum_lng += lng
+        self.vendor_id = vendor_id if self.count == 1 else None
+
+    def merge(self, other):
+        self.vendor_id = other.vendor_id if self.count == 0 else None
+        self.count += other.count
+        self.sales_total += other.sales_total
+        self.sales_today += other.sales_today
+        self.sum_lat += other.sum_lat
+        self.sum_lng += other.sum_lng
+
+
+class SalesMapIndex:
+    def __init__(self, points, day=None):
+        """points: [(vendor_id, name, comuna, lat, lng, sales_total, sales_today)]."""
+        # vendor_id → [name, comuna, lat, lng, total, today] (base de las diferencias y del zoom fino)
+        self.vendors = {p[0]: list(p[1:]) for p in points}
+
+        # Nivel STORED_ZOOM desde los puntos; cada nivel anterior junta 2×2 celdas del siguiente
+        finest = defaultdict(_Cell)
+        for vendor_id, name, comuna, lat, lng, total, today in points:
+            cell = finest[_tile_xy(lat, lng, STORED_ZOOM)]
+            cell.add(vendor_id, lat, lng, total, today)
+            if cell.members is None:
+                cell.members = []
+            cell.members.append(vendor_id)
+
+        self.levels = [dict(finest)]
+        for _ in range(STORED_ZOOM):
+            parent = defaultdict(_Cell)
+            for (x, y), cell in self.levels[0].items():
+                parent[(x >> 1, y >> 1)].merge(cell)
+            self.levels.insert(0, dict(parent))
+
+        self.size = len(points)
+        self.day = day
+        self.built_at = time.monotonic()
+
+    # -----------------------------------------------------------
+    #   ACTUALIZACIÓN INCREMENTAL
+    # -----------------------------------------------------------
+    def apply_sales(self, vendor_id, sales_total, sales_today):
+        """Nuevas ventas del local → diferencia sumada a su celda en cada nivel."""
+        record = self.vendors.get(vendor_id)
+        if record is None:
+            return False
+        d_total, d_today = sales_total - record[4], sales_today - record[5]
+        if not d_total and not d_today:
+            return True
+
+        record[4], record[5] = sales_total, sales_today
+        lat, lng = record[2], record[3]
+        for zoom, cells in enumerate(self.levels):
+            cell = cells[_tile_xy(lat, lng, zoom)]
+            cell.sales_total += d_total
+            cell.sales_today += d_today
+        return True
+
+    def rename(self, vendor_id, name, comuna):
+        record = self.vendors.get(vendor_id)
+        if record is not None:
+            record[0], record[1] = name, comuna
+
+    def location_of(self, vendor_id):
+        record = self.vendors.get(vendor_id)
+        return (record[2], record[3]) if record else None
+
+    # -----------------------------------------------------------
+    #   CONSULTA
+    # -----------------------------------------------------------
+    def _visible(self, cells, west, south, east, north, zoom):
+        x0, y0 = _tile_xy(north, west, zoom)
+        x1, y1 = _tile_xy(south, east, zoom)
+        n = (2 ** zoom) * CELLS_PER_TILE
+        if west > east:   # bbox que cruza el antimeridiano
+            x1 += n
+
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+            # Pantalla con más celdas que celdas ocupadas → filtrar las ocupadas
+            keys = [
+                (x, y) for x, y in cells
+                if y0 <= y <= y1 and (x0 <= x <= x1 or x0 <= x + n <= x1)
+            ]
+        else:
+            keys = [(x % n, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+        return [cells[key] for key in keys if key in cells]
+
+    def _fine_cells(self, west, south, east, north, zoom):
+        """Zoom > STORED_ZOOM: locales de las celdas visibles del último nivel, agrupados al vuelo."""
+        cells = defaultdict(_Cell)
+        for stored in self._visible(self.levels[STORED_ZOOM], west, south, east, north, STORED_ZOOM):
+            for vendor_id in stored.members:
+                name, comuna, lat, lng, total, today = self.vendors[vendor_id]
+                cells[_tile_xy(lat, lng, zoom)].add(vendor_id, lat, lng, total, today)
+        return self._visible(cells, west, south, east, north, zoom)
+
+    def clusters(self, west, south, east, north, zoom):
+        zoom = max(0, min(MAX_ZOOM, int(zoom)))
+        if zoom > STORED_ZOOM:
+            visible = self._fine_cells(west, south, east, north, zoom)
+        else:
+            visible = self._visible(self.levels[zoom], west, south, east, north, zoom)
+
+        out = []
+        for cell in visible:
+            item = {
+                "lat": round(cell.sum_lat / cell.count, 6),
+                "lng": round(cell.sum_lng / cell.count, 6),
+                "count": cell.count,
+                "sales_total": cell.sales_total,
+                "sales_today": cell.sales_today,
+            }
+            if cell.vendor_id is not None:
+                name, comuna = self.vendors[cell.vendor_id][:2]
+                item["id"], item["name"], item["comuna"] = cell.vendor_id, name, comuna
+            out.append(item)
+        return out
+
+
+# ===========================================================
+#   LECTURA
+# ===========================================================
+def _paid_items():
+    from order.models import OrderItem
+
+    return OrderItem.objects.filter(order__status__iexact="paid").values("vendor_id")
+
+
+def _total_expr():
+    return ExpressionWrapper(F("price") * F("quantity"), output_field=IntegerField())
+
+
+def load_sales(day, vendor_ids=None):
+    """({vendor_id: ventas históricas}, {vendor_id: ventas del día}) en dos consultas."""
+    paid = _paid_items()
+    if vendor_ids is not None:
+        paid = paid.filter(vendor_id__in=vendor_ids)
+
+    sales_total = dict(paid.annotate(total=Sum(_total_expr())).values_list("vendor_id", "total"))
+    sales_today = dict(
+        paid.filter(order__created_at__date=day).annotate(total=Sum(_total_expr())).values_list("vendor_id", "total")
+    )
+    return sales_total, sales_today
+
+
+def load_points(day):
+    from vendor.models import Vendor
+
+    sales_total, sales_today = load_sales(day)
+    rows = Vendor.objects.filter(
+        created_by__profile__lat__isnull=False, created_by__profile__lng__isnull=False,
+    ).values_list("id", "name", "comuna__nombre", "created_by__profile__lat", "created_by__profile__lng")
+
+    return [
+        (vendor_id, name, comuna, float(lat), float(lng),
+         int(sales_total.get(vendor_id) or 0), int(sales_today.get(vendor_id) or 0))
+        for vendor_id, name, comuna, lat, lng in rows
+    ]
+
+
+# ===========================================================
+#   ÍNDICE DEL PROCESO
+# ===========================================================
+_lock = threading.Lock()
+_index = None
+_dirty = True
+_building = False
+
+
+def _rebuild(day):
+    global _index, _building
+    try:
+        index = SalesMapIndex(load_points(day), day=day)
+        with _lock:
+            _index = index
+        return index
+    finally:
+        with _lock:
+            _building = False
+
+
+def _rebuild_in_background(day):
+    close_old_connections()
+    try:
+        _rebuild(day)
+    except Exception:
+        logger.exception("No se pudo reconstruir el mapa de ventas")
+    finally:
+        connection.close()  # cada hilo tiene su propia conexión
+
+
+def get_index():
+    """
+    Índice vigente. Si quedó obsoleto se reconstruye en un hilo aparte y mientras
+    tanto se sirve el anterior; solo el primer request del proceso lo construye en línea.
+    """
+    global _dirty, _building
+    today = timezone.localdate()
+    with _lock:
+        index = _index
+        stale = (
+            index is None or _dirty or index.day != today
+            or time.monotonic() - index.built_at >= INDEX_TTL
+        )
+        if not stale:
+            return index
+        if index is not None and _building:
+            return index
+        _dirty = False
+        _building = True
+
+    if index is None:
+        return _rebuild(today)
+
+    threading.Thread(
+        target=_rebuild_in_background, args=(today,), name="salesmap-rebuild", daemon=True,
+    ).start()
+    return index
+
+
+def invalidate():
+    """Cambió la ubicación de algún local: reconstrucción completa (en segundo plano)."""
+    global _dirty
+    with _lock:
+        _dirty = True
+
+
+def refresh_vendor_sales(vendor_ids):
+    """Re-agrega las ventas de estos locales y aplica la diferencia (sin reconstruir)."""
+    with _lock:
+        index = _index
+    if index is None:
+        return
+
+    vendor_ids = {v for v in vendor_ids if v is not None}
+    if not vendor_ids:
+        return
+    sales_total, sales_today = load_sales(index.day, vendor_ids)
+    with _lock:
+        for vendor_id in vendor_ids:
+            index.apply_sales(
+                vendor_id, int(sales_total.get(vendor_id) or 0), int(sales_today.get(vendor_id) or 0)
+            )
+
+
+def current_index():
+    """Índice ya construido en este proceso (o None), sin disparar reconstrucciones."""
+    with _lock:
+        return _index
+
+
+# ===========================================================
+#   API PÚBLICA
+# ===========================================================
+def sales_clusters(west, south, east, north, zoom):
+    """Grupos de locales visibles en el bbox al nivel `zoom`, con ventas sumadas."""
+    return get_index().clusters(float(west), float(south), float(east), float(north), zoom)
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from analytics import salesmap
+from location.resolver import resolve_comuna
+from order.models import Order, OrderItem
+from vendor.models import Profile, Vendor
+
+
+# ===========================================================
+#   MAPA DE VENTAS: VENTAS (diferencia por local)
+# ===========================================================
+def _refresh_sales_after_commit(vendor_ids):
+    if salesmap.current_index() is None:
+        return
+    vendor_ids = set(vendor_ids)
+    transaction.on_commit(lambda: salesmap.refresh_vendor_sales(vendor_ids))
+
+
+@receiver(post_save, sender=Order)
+def salesmap_order_saved(sender, instance, created=False, raw=False, **kwargs):
+    # Orden nueva todavía sin ítems; las existentes pueden cambiar de estado (paid)
+    if raw or created or salesmap.current_index() is None:
+        return
+    _refresh_sales_after_commit(
+        OrderItem.objects.filter(order_id=instance.id).values_list("vendor_id", flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def salesmap_item_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _refresh_sales_after_commit([instance.vendor_id])
+
+
+# ===========================================================
+#   MAPA DE VENTAS: LOCALES Y UBICACIONES (reconstrucción)
+# ===========================================================
+@receiver(post_save, sender=Vendor)
+def salesmap_vendor_saved(sender, instance, raw=False, **kwargs):
+    index = salesmap.current_index()
+    if raw or index is None:
+        return
+    if index.location_of(instance.id) is None:
+        # Local nuevo en el mapa (solo si su dueño ya tiene ubicación)
+        if Profile.objects.filter(
+            user_id=instance.created_by_id, lat__isnull=False, lng__isnull=False,
+        ).exists():
+            salesmap.invalidate()
+        return
+    comuna = resolve_comuna(instance.comuna_id)
+    index.rename(instance.id, instance.name, comuna.nombre if comuna else None)
+
+
+@receiver(post_delete, sender=Vendor)
+def salesmap_vendor_deleted(sender, instance, **kwargs):
+    index = salesmap.current_index()
+    if index is not None and index.location_of(instance.id) is not None:
+        salesmap.invalidate()
+
+
+@receiver(post_save, sender=Profile)
+def salesmap_profile_saved(sender, instance, raw=False, **kwargs):
+    # Solo importa la ubicación de dueños de locales
+    index = salesmap.current_index()
+    if raw or index is None:
+        return
+    vendor_ids = list(Vendor.objects.filter(created_by_id=instance.user_id).values_list("id", flat=True))
+    if not vendor_ids:
+        return
+
+    location = (
+        (float(instance.lat), float(instance.lng))
+        if instance.lat is not None and instance.lng is not None else None
+    )
+    if any(index.location_of(vendor_id) != location for vendor_id in vendor_ids):
+        salesmap.invalidate()
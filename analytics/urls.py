@@ -23,6 +23,8 @@ urlpatterns = [
     
     path("api/map/vendors-sales-today/", views.map_vendors_sales_today, name="map_vendors_sales_today"),
     path( "api/map/vendors-sales-total/",views.map_vendors_sales_total,name="map_vendors_sales_total"),
+    path("api/map/vendors-sales-clusters/", views.map_vendors_sales_clusters, name="map_vendors_sales_clusters"),
+    path("api/map/demand/<int:zoom>/<int:x>/<int:y>.json", views.demand_tile, name="demand_tile"),
 
 
 ]
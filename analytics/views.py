@@ -3,11 +3,12 @@ import json
 from django.contrib.admin.views.decorators import staff_member_required
 from django.db.models import Count, Q ,Sum
 from django.db.models.functions import TruncDate, ExtractHour
-from django.http import JsonResponse
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
 from django.shortcuts import render
 from django.utils.timezone import now
 from django.views.decorators.csrf import csrf_exempt
-from .models import UserActionLog
+from .models import DemandTile, UserActionLog
 from .utils import classify_section
 from vendor.models import Profile
 from vendor.models import UserPreference, Preference
@@ -23,52 +24,11 @@ from django.contrib.admin.views.decorators import staff_member_required
 
 from vendor.models import Vendor
 from order.models import OrderItem
+from .salesmap import sales_clusters
+from .demand import FIELDS, GRID
 
 
-@staff_member_required
-def map_vendors_sales_today(request):
-    today = timezone.localdate()
-
-    total_expr = ExpressionWrapper(
-        F("price") * F("quantity"),
-        output_field=IntegerField()
-    )
-
-    # ✅ MISMA LÓGICA QUE EL RESTO DEL DASHBOARD
-    # ventas = órdenes con status="paid"
-    sales_map = dict(
-        OrderItem.objects
-        .filter(
-            order__status__iexact="paid",
-            order__created_at__date=today
-        )
-        .values("vendor_id")
-        .annotate(total=Sum(total_expr))
-        .values_list("vendor_id", "total")
-    )
-
-    data = []
-    vendors = Vendor.objects.select_related("created_by__profile__comuna")
-
-    for v in vendors:
-        profile = getattr(v.created_by, "profile", None)
-        if not profile or profile.lat is None or profile.lng is None:
-            continue
-
-        data.append({
-            "id": v.id,
-            "name": getattr(v, "name", str(v)),
-            "lat": float(profile.lat),
-            "lng": float(profile.lng),
-            "comuna": str(profile.comuna) if profile.comuna else None,
-            "sales_today": int(sales_map.get(v.id, 0)),
-        })
-
-    return JsonResponse(data, safe=False)
-
-
-
-
+DEMAND_MAX_AGE = 60 * 10   # los tiles cambian solo al correr build_demand_tiles
 
 
 from order.models import Order, OrderItem
@@ -603,3 +563,40 @@ def map_vendors_sales_total(request):
         })
 
     return JsonResponse(data, safe=False)
+
+
+
+@staff_member_required
+def map_vendors_sales_clusters(request):
+    """
+    Locales agrupados para el mapa: ?bbox=oeste,sur,este,norte&zoom=N.
+    Cada grupo trae centroide, cantidad y ventas sumadas (analytics/salesmap.py);
+    un grupo de un solo local trae además id, name y comuna.
+    """
+    try:
+        west, south, east, north = (float(v) for v in request.GET.get("bbox", "").split(","))
+        zoom = int(request.GET.get("zoom", ""))
+    except ValueError:
+        return JsonResponse({"error": "bbox=oeste,sur,este,norte y zoom son obligatorios"}, status=400)
+
+    clusters = sales_clusters(west, south, east, north, zoom)
+    return JsonResponse({"zoom": zoom, "clusters": clusters})
+
+
+
+@staff_member_required
+def demand_tile(request, zoom, x, y):
+    """Tile del mapa de demanda (analytics/demand.py), con ETag; vacío si no hay datos."""
+    tile = DemandTile.objects.filter(zoom=zoom, x=x, y=y).only("cells", "etag").first()
+    etag = f'"{tile.etag}"' if tile else '"empty"'
+
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({
+            "zoom": zoom, "x": x, "y": y, "grid": GRID, "fields": FIELDS,
+            "cells": tile.cells if tile else [],
+        })
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, max_age=DEMAND_MAX_AGE)
+    return response
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:10
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+
+def copy_items(apps, schema_editor):
+    """Items de los carritos del bot → líneas del almacén compartido (clave "bot:<token>")."""
+    TempItem = apps.get_model("botapi", "TempItem")
+    CartEntry = apps.get_model("cart", "CartEntry")
+
+    expires_at = timezone.now() + timedelta(seconds=getattr(settings, "CART_TTL", 60 * 60 * 24 * 3))
+    lines = {}
+    for cart_token, product_id, quantity in TempItem.objects.values_list("cart__token", "product_id", "quantity"):
+        key = (f"bot:{cart_token}", product_id)
+        lines[key] = lines.get(key, 0) + quantity
+
+    CartEntry.objects.bulk_create(
+        [
+            CartEntry(cart_key=key, product_id=product_id, quantity=quantity, expires_at=expires_at)
+            for (key, product_id), quantity in lines.items()
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('botapi', '0003_tempcart_phone'),
+        ('cart', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_items, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='TempItem',
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from product.models import Product
+from offers.pricing import PricingEngine
+from cart.store import bot_key, get_store
 
 
 #Carrito temporal usado por el bot ManyChat
@@ -9,6 +11,7 @@ class TempCart(models.Model):
     """
     Carrito temporal usado por el bot de ManyChat antes de que el usuario inicie sesión.
     Cada número de teléfono (WhatsApp ID) puede tener un solo carrito activo.
+    Los productos viven en el almacén compartido bajo bot_key(token) (cart/store.py).
     """
     token = models.CharField(max_length=100, unique=True, verbose_name="Token del carrito")
     phone = models.CharField(
@@ -29,34 +32,24 @@ class TempCart(models.Model):
             return f"Carrito {self.phone} - {self.token[:8]}"
         return f"Carrito #{self.token[:8]}"
 
+    def lines(self):
+        """[(producto, cantidad)] del carrito en el almacén compartido (cart/store.py)."""
+        items = get_store().items(bot_key(self.token))
+        products = Product.objects.in_bulk(list(items))
+        return [(products[pid], qty) for pid, qty in items.items() if pid in products]
+
     def total(self):
-        """Suma total de los productos del carrito."""
-        return sum(item.subtotal() for item in self.items.all())
+        """Suma total de los productos del carrito (con ofertas y 2x1)."""
+        lines = self.lines()
+        quotes = PricingEngine.quote_many(
+            [product for product, _ in lines],
+            quantities={product.id: qty for product, qty in lines},
+        )
+        return sum(q.total_price for q in quotes.values())
 
     def cantidad_total(self):
         """Cantidad total de productos en el carrito."""
-        return sum(item.quantity for item in self.items.all())
-
-
-#tems dentro del carrito temporal
-class TempItem(models.Model):
-    """
-    Item dentro de un carrito temporal (producto + cantidad).
-    """
-    cart = models.ForeignKey(TempCart, related_name="items", on_delete=models.CASCADE)
-    product = models.ForeignKey(Product, on_delete=models.CASCADE)
-    quantity = models.PositiveIntegerField(default=1, verbose_name="Cantidad")
-
-    class Meta:
-        verbose_name = "Item Temporal"
-        verbose_name_plural = "Items Temporales"
-
-    def __str__(self):
-        return f"{self.product.title} × {self.quantity}"
-
-    def subtotal(self):
-        """Subtotal del ítem (precio × cantidad)."""
-        return self.product.price * self.quantity
+        return sum(get_store().items(bot_key(self.token)).values())
 
 
 # Token temporal de login automático
@@ -9,9 +9,12 @@ from django.shortcuts import redirect, get_object_or_404
 from django.contrib.auth import login
 from django.contrib.auth.models import User
 from product.models import Product
-from cart.cart import Cart
+from cart.store import bot_key, get_store, user_key
+from offers.pricing import PricingEngine
+from order.recommendations import recommend_for_products
+from product.allergens import exclude_allergens
 from vendor.models import Profile
-from botapi.models import TempCart, TempItem, LoginToken
+from botapi.models import TempCart, LoginToken
 
 
 # 🛒 Crear carrito temporal
@@ -21,6 +24,9 @@ def create_cart(request):
     token = str(uuid.uuid4())
 
     if phone:
+        store = get_store()
+        for old_token in TempCart.objects.filter(phone=phone).values_list("token", flat=True):
+            store.clear(bot_key(old_token))
         TempCart.objects.filter(phone=phone).delete()
         TempCart.objects.create(token=token, phone=phone)
     else:
@@ -55,16 +61,30 @@ def check_user(request):
 def pizzas_cards(request):
     pizzas = Product.objects.all().order_by("id")
 
-    if not pizzas.exists():
+    # ⚠️ Cliente conocido (phone) → por defecto sin pizzas con sus alérgenos (?sin_alergenos=0 las muestra)
+    phone = request.GET.get("phone")
+    allergy_mask = 0
+    if phone and request.GET.get("sin_alergenos") != "0":
+        allergy_mask = Profile.objects.filter(phone=phone).values_list("allergy_mask", flat=True).first() or 0
+        pizzas = exclude_allergens(pizzas, allergy_mask)
+
+    pizzas = list(pizzas)
+
+    if not pizzas:
         return JsonResponse({"text": "No hay pizzas disponibles en este momento."}, safe=False)
 
     generic_image_url = "https://nonfimbriate-usha-aerobically.ngrok-free.dev/media/generics/pizza_generic.jpg"
     message = "🍕 *Estas son nuestras pizzas disponibles:*\n\n"
+    if allergy_mask:
+        message += "⚠️ _No mostramos las pizzas con ingredientes de tus alergias._\n\n"
+
+    quotes = PricingEngine.quote_many(pizzas)
 
     for p in pizzas:
-        final_price = p.final_price
+        quote = quotes[p.id]
+        final_price = quote.unit_price
 
-        if p.active_offer:
+        if quote.has_offer:
             message += (
                 f"{generic_image_url}\n"
                 f"🔥 *{p.title}* — *OFERTA*\n"
@@ -118,9 +138,7 @@ def add_to_cart(request):
     except:
         quantity = 1
 
-    try:
-        cart = TempCart.objects.get(token=token)
-    except TempCart.DoesNotExist:
+    if not TempCart.objects.filter(token=token).exists():
         return JsonResponse({"status": "error", "message": "Carrito no encontrado."})
 
     # Producto real
@@ -129,23 +147,20 @@ def add_to_cart(request):
     except Product.DoesNotExist:
         return JsonResponse({"status": "error", "message": "Producto no existe."})
 
-    item, created = TempItem.objects.get_or_create(
-        cart=cart, product=product, defaults={"quantity": quantity}
-    )
-    if not created:
-        item.quantity += quantity
-        item.save()
+    # Incremento atómico en el almacén compartido (dos mensajes seguidos no se pisan)
+    total_qty = get_store().incr(bot_key(token), product.id, quantity)
 
     # 🟩 Respuesta con precio real (considera oferta)
-    final_price = product.final_price
+    quote = PricingEngine.quote(product)
+    final_price = quote.unit_price
 
-    if product.active_offer:
+    if quote.has_offer:
         msg = (
-            f"🔥 *{product.title}* agregada al carrito (x{item.quantity})\n"
+            f"🔥 *{product.title}* agregada al carrito (x{total_qty})\n"
             f"💵 Precio oferta: *{final_price:,.0f} CLP*"
         )
     else:
-        msg = f"✅ {product.title} agregada al carrito (x{item.quantity}) — {final_price:,.0f} CLP"
+        msg = f"✅ {product.title} agregada al carrito (x{total_qty}) — {final_price:,.0f} CLP"
 
     return JsonResponse({"status": "success", "message": msg})
 
@@ -160,36 +175,48 @@ def view_cart(request):
     except TempCart.DoesNotExist:
         return JsonResponse({"text": "❌ Carrito no encontrado."})
 
-    items = cart.items.select_related("product")
-    if not items.exists():
+    lines = cart.lines()
+    if not lines:
         return JsonResponse({"text": "🛒 Tu carrito está vacío."})
 
+    quotes = PricingEngine.quote_many(
+        [product for product, _ in lines],
+        quantities={product.id: qty for product, qty in lines},
+    )
+
     message = "🛒 *Tu carrito actual:*\n\n"
     total = 0
 
-    for i in items:
-        final_price = i.product.final_price
-        subtotal = final_price * i.quantity
+    for product, qty in lines:
+        quote = quotes[product.id]
+        final_price = quote.unit_price
+        subtotal = quote.total_price
         total += subtotal
 
-        if i.product.active_offer:
+        if quote.has_offer:
             message += (
-                f"🔥 *{i.product.title}*\n"
-                f"Cantidad: {i.quantity}\n"
+                f"🔥 *{product.title}*\n"
+                f"Cantidad: {qty}\n"
                 f"Precio oferta: {final_price:,.0f} CLP\n"
                 f"Subtotal: {subtotal:,.0f} CLP\n"
                 f"────────────────────────────\n"
             )
         else:
             message += (
-                f"🧀 *{i.product.title}*\n"
-                f"Cantidad: {i.quantity}\n"
+                f"🧀 *{product.title}*\n"
+                f"Cantidad: {qty}\n"
                 f"Precio: {final_price:,.0f} CLP\n"
                 f"Subtotal: {subtotal:,.0f} CLP\n"
                 f"────────────────────────────\n"
             )
 
     message += f"\n💰 *Total: {total:,.0f} CLP*\n"
+
+    # 🍕 Frecuentemente pedidos juntos
+    recommended = recommend_for_products([product.id for product, _ in lines], limit=3)
+    if recommended:
+        message += "\n🍕 *Suelen pedirse juntos:* " + ", ".join(p.title for p in recommended) + "\n"
+
     message += "👉 Escribe *pagar pedido* para finalizar."
 
     return JsonResponse({"status": "success", "text": message})
@@ -224,8 +251,7 @@ def pay_order(request):
     )
 
     # Calcular total real (con ofertas)
-    items = temp_cart.items.all()
-    total = sum(i.product.final_price * i.quantity for i in items)
+    total = temp_cart.total()
 
     msg = (
         f"🧾 *Total a pagar:* {total:,.0f} CLP\n\n"
@@ -236,7 +262,7 @@ def pay_order(request):
     return JsonResponse({"status": "success", "message": msg})
 
 
-# 🔐 Login automático → transfiere carrito
+# 🔐 Login automático → el carrito del bot pasa al del cliente (una operación)
 @csrf_exempt
 def auto_login(request, token):
     record = get_object_or_404(LoginToken, token=token)
@@ -250,20 +276,7 @@ def auto_login(request, token):
     login(request, user)
     request.session.save()
 
-    if temp_token:
-        try:
-            temp_cart = TempCart.objects.get(token=temp_token)
-            temp_items = temp_cart.items.all()
-
-            cart = Cart(request)
-            for i in temp_items:
-                cart.add(i.product.id, i.quantity, update_quantity=False)
-
-            cart.save()
-            temp_items.delete()
-            temp_cart.delete()
-
-        except TempCart.DoesNotExist:
-            pass
+    if temp_token and TempCart.objects.filter(token=temp_token).delete()[0]:
+        get_store().merge(bot_key(temp_token), user_key(user.id))
 
     return redirect("/cart/")
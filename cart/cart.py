@@ -1,121 +1,210 @@
+import uuid
+from dataclasses import dataclass
+
 from django.conf import settings
 from product.models import Product
+from offers.pricing import PricingEngine, PriceQuote
+from cart.store import anon_key, get_store, user_key
+
+
+@dataclass(frozen=True)
+class CartLine:
+    """Línea ya cotizada del carrito (producto + PriceQuote con la cantidad pedida)."""
+    product: Product
+    quote: PriceQuote
+
+    @property
+    def id(self):
+        return self.product.id
+
+    @property
+    def quantity(self):
+        return self.quote.quantity
+
+    @property
+    def effective_qty(self):
+        return self.quote.effective_qty
+
+    @property
+    def unit_price(self):
+        return self.quote.unit_price
+
+    @property
+    def is_two_for_one(self):
+        return self.quote.is_2x1
+
+    @property
+    def total_price(self):
+        return self.quote.total_price
+
+
+@dataclass(frozen=True)
+class CartSnapshot:
+    """
+    Carrito cotizado una sola vez por request: líneas, total y cantidad de ítems.
+    Es inmutable: add/remove/clear lo descartan y el siguiente acceso cotiza de nuevo.
+    """
+    lines: tuple
+    total_cost: int
+    total_items: int
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
 
 class Cart(object):
+    """
+    Carrito web sobre el almacén compartido (cart/store.py): la sesión solo guarda,
+    para visitantes sin login, el token de su carrito (se escribe una vez).
+    """
 
     def __init__(self, request):
+        self.request = request
         self.session = request.session
-        cart = self.session.get(settings.CART_SESSION_ID)
+        self.store = get_store()
 
-        if not cart:
-            cart = self.session[settings.CART_SESSION_ID] = {}
+        legacy = self.session.get(settings.CART_SESSION_ID)
+        if isinstance(legacy, dict):
+            self._import_session_cart(legacy)
 
-        self.cart = cart
+    # =========================================================
+    # CLAVE DEL CARRITO
+    # =========================================================
+    @property
+    def key(self):
+        user = getattr(self.request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user_key(user.id)
+        token = self.session.get(settings.CART_SESSION_ID)
+        return anon_key(token) if isinstance(token, str) else None
+
+    def _writable_key(self):
+        key = self.key
+        if key is None:
+            self.session[settings.CART_SESSION_ID] = uuid.uuid4().hex
+            key = self.key
+        return key
+
+    def _import_session_cart(self, legacy):
+        """Carrito antiguo guardado como JSON en la sesión → almacén (una vez por sesión)."""
+        del self.session[settings.CART_SESSION_ID]
+        key = self._writable_key()
+        for product_id, item in legacy.items():
+            product_id = _product_id(product_id)
+            if product_id is not None:
+                self.store.incr(key, product_id, int(item.get("quantity", 0)))
+
+    # =========================================================
+    # CACHÉ POR REQUEST
+    # =========================================================
+    def _cache(self):
+        """
+        Contenido y snapshot de este request. Se guardan en el request (no en el Cart)
+        para que la vista, checkout() y el context processor compartan la misma lectura.
+        """
+        key = self.key
+        cache = getattr(self.request, "_cart_cache", None)
+        if cache is None or cache["key"] != key:
+            cache = self.request._cart_cache = {"key": key, "items": None, "snapshot": None}
+        return cache
+
+    def _invalidate(self):
+        self.request._cart_cache = None
+
+    @property
+    def cart(self):
+        """{product_id: cantidad} (una lectura del almacén por request)."""
+        cache = self._cache()
+        if cache["items"] is None:
+            cache["items"] = self.store.items(cache["key"]) if cache["key"] else {}
+        return cache["items"]
+
+    # =========================================================
+    # SNAPSHOT COTIZADO (OFERTAS + 2x1, UNA CONSULTA)
+    # =========================================================
+    def snapshot(self):
+        cache = self._cache()
+        if cache["snapshot"] is None:
+            cache["snapshot"] = self._build_snapshot()
+        return cache["snapshot"]
+
+    def _build_snapshot(self):
+        items = self.cart
+
+        # Producto + local + oferta en una sola consulta (quote_many ve la oferta ya cargada)
+        products = Product.objects.filter(pk__in=list(items)).select_related("vendor", "offer")
+        product_map = {p.id: p for p in products}
+
+        quotes = PricingEngine.quote_many(
+            product_map.values(),
+            quantities={pid: items[pid] for pid in product_map},
+        )
+
+        lines = tuple(
+            CartLine(product=product_map[pid], quote=quotes[pid])
+            for pid in items
+            if pid in product_map
+        )
+        return CartSnapshot(
+            lines=lines,
+            total_cost=sum(line.total_price for line in lines),
+            total_items=sum(line.quantity for line in lines),
+        )
 
     # =========================================================
-    # ITERADOR DEL CARRITO (OFERTAS + 2x1 LISTO)
+    # ITERADOR DEL CARRITO
     # =========================================================
     def __iter__(self):
-        product_ids = self.cart.keys()
-        products = Product.objects.filter(pk__in=product_ids)
-        product_map = {str(p.id): p for p in products}
-
-        for pid, item in self.cart.items():
-            product = product_map.get(pid)
-            if not product:
-                continue
-
-            quantity = item["quantity"]
-            unit_price = product.get_final_price()
-
-            # 🔥 Lógica 2x1
-            if product.active_offer and product.active_offer.is_2x1:
-                effective_qty = (quantity // 2) + (quantity % 2)
-                total_price = effective_qty * unit_price
-                is_two_for_one = True
-            else:
-                effective_qty = quantity
-                total_price = quantity * unit_price
-                is_two_for_one = False
-
-            yield {
-                "id": product.id,
-                "product": product,
-                "quantity": quantity,
-                "effective_qty": effective_qty,
-                "unit_price": unit_price,
-                "is_two_for_one": is_two_for_one,
-                "total_price": total_price,
-            }
+        return iter(self.snapshot())
 
     def __len__(self):
-        return sum(item["quantity"] for item in self.cart.values())
+        return sum(self.cart.values())
 
     # =========================================================
-    # AGREGAR AL CARRITO
+    # AGREGAR AL CARRITO (INCREMENTO ATÓMICO)
     # =========================================================
     def add(self, product_id, quantity=1, update_quantity=False):
-        product_id = str(product_id)
-
-        if product_id not in self.cart:
-            self.cart[product_id] = {"quantity": 0, "id": product_id}
+        product_id = _product_id(product_id)
+        if product_id is None:
+            return
 
+        key = self._writable_key()
         if update_quantity:
-            self.cart[product_id]["quantity"] = int(quantity)
+            self.store.set(key, product_id, int(quantity))
         else:
-            self.cart[product_id]["quantity"] += int(quantity)
-
-        if self.cart[product_id]["quantity"] <= 0:
-            self.remove(product_id)
-
-        self.save()
+            self.store.incr(key, product_id, int(quantity))
+        self._invalidate()
 
     # =========================================================
     # ELIMINAR ÍTEM
     # =========================================================
     def remove(self, product_id):
-        product_id = str(product_id)
-        if product_id in self.cart:
-            del self.cart[product_id]
-            self.save()
-
-    # =========================================================
-    # GUARDAR SESIÓN
-    # =========================================================
-    def save(self):
-        self.session[settings.CART_SESSION_ID] = self.cart
-        self.session.modified = True
+        product_id = _product_id(product_id)
+        if product_id is None or self.key is None:
+            return
+        self.store.remove(self.key, product_id)
+        self._invalidate()
 
     # =========================================================
     # LIMPIAR CARRITO
     # =========================================================
     def clear(self):
-        if settings.CART_SESSION_ID in self.session:
-            del self.session[settings.CART_SESSION_ID]
-        self.session.modified = True
+        if self.key is not None:
+            self.store.clear(self.key)
+        self._invalidate()
 
     # =========================================================
     # TOTAL DEL CARRITO (OFERTA + 2x1)
     # =========================================================
     def get_total_cost(self):
-        product_ids = self.cart.keys()
-        products = Product.objects.filter(pk__in=product_ids)
-        product_map = {str(p.id): p for p in products}
-
-        total = 0
-        for pid, item in self.cart.items():
-            product = product_map.get(pid)
-            if not product:
-                continue
-
-            quantity = item["quantity"]
-            unit_price = product.get_final_price()
-
-            # 2x1
-            if product.active_offer and product.active_offer.is_2x1:
-                effective_qty = (quantity // 2) + (quantity % 2)
-                total += effective_qty * unit_price
-            else:
-                total += quantity * unit_price
-
-        return total
+        return self.snapshot().total_cost
+
+
+def _product_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
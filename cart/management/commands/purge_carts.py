@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from botapi.models import TempCart
+from cart.store import bot_key, cart_ttl, get_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los carritos vencidos del almacén compartido (CART_TTL sin cambios) "
+        "y los TempCart del bot que quedaron vacíos."
+    )
+
+    def handle(self, *args, **options):
+        store = get_store()
+        lines = store.purge()
+
+        old = TempCart.objects.filter(created_at__lte=timezone.now() - timedelta(seconds=cart_ttl()))
+        empty = [pk for pk, token in old.values_list("pk", "token") if not store.items(bot_key(token))]
+        temp_carts, _ = TempCart.objects.filter(pk__in=empty).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {lines} líneas de carrito vencidas y {temp_carts} carritos del bot borrados."
+        ))
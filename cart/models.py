@@ -1,3 +1,21 @@
 from django.db import models
 
-# Create your models here.
+
+class CartEntry(models.Model):
+    """
+    Línea del carrito compartido web + bot (cart/store.py, backend "db").
+    Una fila por (carrito, producto); product_id sin FK para que la fila sea mínima
+    y un producto borrado solo desaparezca del carrito al cotizarlo.
+    """
+    cart_key = models.CharField(max_length=64)
+    product_id = models.PositiveIntegerField()
+    quantity = models.PositiveIntegerField(default=1)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("cart_key", "product_id")
+        verbose_name = "Línea de carrito"
+        verbose_name_plural = "Líneas de carrito"
+
+    def __str__(self):
+        return f"{self.cart_key} · producto {self.product_id} × {self.quantity}"
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from cart.store import anon_key, get_store, user_key
+
+
+# ===========================================================
+#   LOGIN: el carrito del visitante pasa al del cliente
+# ===========================================================
+@receiver(user_logged_in)
+def merge_anonymous_cart(sender, request, user, **kwargs):
+    if request is None or not hasattr(request, "session"):
+        return
+    token = request.session.get(settings.CART_SESSION_ID)
+    if not isinstance(token, str):
+        return
+    get_store().merge(anon_key(token), user_key(user.id))
+    del request.session[settings.CART_SESSION_ID]
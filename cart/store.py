@@ -0,0 +1,275 @@
+"""
+🛒 Carrito compartido por la web y el bot de WhatsApp.
+
+Cada carrito es un mapa {product_id: cantidad} guardado bajo una clave:
+  "user:<id>"     → cliente con sesión (web, y el bot después de auto_login)
+  "anon:<token>"  → visitante sin sesión (el token va en la sesión, se escribe una vez)
+  "bot:<token>"   → carrito del bot (token de botapi.TempCart)
+
+Backends intercambiables (settings.CART_STORE_BACKEND):
+    "db"     → filas compactas CartEntry (clave, producto, cantidad, vence) (default)
+    "memory" → diccionario del proceso con la semántica de un hash de Redis
+               (HINCRBY / HGETALL / EXPIRE); solo para desarrollo y tests, no se
+               comparte entre procesos. Un backend Redis implementa los mismos métodos.
+
+Las cantidades se incrementan en una sola operación atómica (sin leer-modificar-
+escribir). Cada escritura renueva el vencimiento del carrito completo (CART_TTL);
+lo vencido no se lee y el comando purge_carts lo borra.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+
+DEFAULT_TTL = 60 * 60 * 24 * 3   # 3 días sin cambios
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+def anon_key(token):
+    return f"anon:{token}"
+
+
+def bot_key(token):
+    return f"bot:{token}"
+
+
+def cart_ttl():
+    return getattr(settings, "CART_TTL", DEFAULT_TTL)
+
+
+# ===========================================================
+#   BACKENDS
+# ===========================================================
+class BaseCartStore:
+    name = "base"
+
+    def items(self, key):
+        """{product_id: cantidad} del carrito (vacío si no existe o venció)."""
+        raise NotImplementedError
+
+    def incr(self, key, product_id, delta):
+        """Suma `delta` (puede ser negativo) y devuelve la cantidad nueva; en 0 se quita."""
+        raise NotImplementedError
+
+    def set(self, key, product_id, quantity):
+        """Fija la cantidad (0 o menos quita el producto)."""
+        raise NotImplementedError
+
+    def remove(self, key, product_id):
+        raise NotImplementedError
+
+    def clear(self, key):
+        raise NotImplementedError
+
+    def merge(self, source, target):
+        """Suma el carrito `source` en `target` y borra `source` (login, auto_login del bot)."""
+        raise NotImplementedError
+
+    def purge(self):
+        """Borra los carritos vencidos. Devuelve cuántas líneas se borraron."""
+        raise NotImplementedError
+
+
+class DatabaseCartStore(BaseCartStore):
+    """Una fila CartEntry por (carrito, producto). El vencimiento va en cada fila."""
+    name = "db"
+
+    @staticmethod
+    def _model():
+        from cart.models import CartEntry
+        return CartEntry
+
+    def _live(self, key, now=None):
+        return self._model().objects.filter(cart_key=key, expires_at__gt=now or timezone.now())
+
+    def _touch(self, key, now):
+        self._model().objects.filter(cart_key=key).update(expires_at=now + timedelta(seconds=cart_ttl()))
+
+    def items(self, key):
+        return dict(self._live(key).order_by("id").values_list("product_id", "quantity"))
+
+    def incr(self, key, product_id, delta):
+        CartEntry = self._model()
+        now = timezone.now()
+        row = CartEntry.objects.filter(cart_key=key, product_id=product_id)
+
+        with transaction.atomic():
+            # UPDATE ... SET quantity = quantity + delta (una línea vencida parte de cero)
+            updated = row.update(quantity=Case(
+                When(expires_at__lte=now, then=Value(max(delta, 0))),
+                default=Greatest(F("quantity") + delta, Value(0)),
+            ))
+            if not updated and delta > 0:
+                try:
+                    with transaction.atomic():
+                        CartEntry.objects.create(
+                            cart_key=key, product_id=product_id, quantity=delta, expires_at=now,
+                        )
+                except IntegrityError:
+                    # Otra request creó la línea entre el UPDATE y el INSERT
+                    row.update(quantity=F("quantity") + delta)
+
+            quantity = row.values_list("quantity", flat=True).first() or 0
+            if quantity <= 0:
+                row.delete()
+            self._touch(key, now)
+        return quantity
+
+    def set(self, key, product_id, quantity):
+        if quantity <= 0:
+            self.remove(key, product_id)
+            return 0
+
+        CartEntry = self._model()
+        now = timezone.now()
+        with transaction.atomic():
+            CartEntry.objects.update_or_create(
+                cart_key=key, product_id=product_id,
+                defaults={"quantity": quantity, "expires_at": now},
+            )
+            self._touch(key, now)
+        return quantity
+
+    def remove(self, key, product_id):
+        self._model().objects.filter(cart_key=key, product_id=product_id).delete()
+
+    def clear(self, key):
+        self._model().objects.filter(cart_key=key).delete()
+
+    def merge(self, source, target):
+        if source == target:
+            return
+        CartEntry = self._model()
+        now = timezone.now()
+
+        with transaction.atomic():
+            incoming = self.items(source)
+            if not incoming:
+                self.clear(source)
+                return
+
+            current = {
+                row.product_id: row
+                for row in CartEntry.objects.select_for_update().filter(cart_key=target)
+            }
+            to_create, to_update = [], []
+            for product_id, quantity in incoming.items():
+                row = current.get(product_id)
+                if row is None:
+                    to_create.append(CartEntry(
+                        cart_key=target, product_id=product_id, quantity=quantity, expires_at=now,
+                    ))
+                    continue
+                row.quantity = quantity if row.expires_at <= now else row.quantity + quantity
+                to_update.append(row)
+
+            CartEntry.objects.bulk_create(to_create)
+            if to_update:
+                CartEntry.objects.bulk_update(to_update, ["quantity"])
+            self.clear(source)
+            self._touch(target, now)
+
+    def purge(self):
+        deleted, _ = self._model().objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+
+class MemoryCartStore(BaseCartStore):
+    """Carritos en un diccionario del proceso: clave → (vence, {product_id: cantidad})."""
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._carts = {}
+
+    def _get(self, key, now):
+        entry = self._carts.get(key)
+        if entry is None or entry[0] <= now:
+            self._carts.pop(key, None)
+            return None
+        return entry[1]
+
+    def _put(self, key, items, now):
+        if items:
+            self._carts[key] = (now + cart_ttl(), items)
+        else:
+            self._carts.pop(key, None)
+
+    def items(self, key):
+        with self._lock:
+            return dict(self._get(key, time.monotonic()) or {})
+
+    def incr(self, key, product_id, delta):
+        now = time.monotonic()
+        with self._lock:
+            items = self._get(key, now) or {}
+            quantity = max(items.get(product_id, 0) + delta, 0)
+            if quantity:
+                items[product_id] = quantity
+            else:
+                items.pop(product_id, None)
+            self._put(key, items, now)
+        return quantity
+
+    def set(self, key, product_id, quantity):
+        now = time.monotonic()
+        with self._lock:
+            items = self._get(key, now) or {}
+            if quantity > 0:
+                items[product_id] = quantity
+            else:
+                items.pop(product_id, None)
+            self._put(key, items, now)
+        return max(quantity, 0)
+
+    def remove(self, key, product_id):
+        self.set(key, product_id, 0)
+
+    def clear(self, key):
+        with self._lock:
+            self._carts.pop(key, None)
+
+    def merge(self, source, target):
+        if source == target:
+            return
+        now = time.monotonic()
+        with self._lock:
+            incoming = self._get(source, now) or {}
+            self._carts.pop(source, None)
+            if not incoming:
+                return
+            items = self._get(target, now) or {}
+            for product_id, quantity in incoming.items():
+                items[product_id] = items.get(product_id, 0) + quantity
+            self._put(target, items, now)
+
+    def purge(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires, _) in self._carts.items() if expires <= now]
+            deleted = sum(len(self._carts.pop(key)[1]) for key in expired)
+        return deleted
+
+
+CART_STORES = {"db": DatabaseCartStore, "memory": MemoryCartStore}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CART_STORES[getattr(settings, "CART_STORE_BACKEND", "db")]()
+    return _store
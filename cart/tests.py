@@ -1,3 +1,123 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Country
+from location.models import Comuna, Provincia, Region
+from offers.models import Offer
+from product.models import Category, Product
+from vendor.models import Profile, Vendor
+
+from .cart import Cart
+from .models import CartEntry
+from .store import DatabaseCartStore, MemoryCartStore, get_store, user_key
+
+
+class CartPageQueriesTest(TestCase):
+    """El carrito se cotiza una vez por request: las consultas no crecen con las líneas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name="Chile", iso_code="CL", phone_code="+56")
+        region = Region.objects.create(codigo="13", nombre="Metropolitana")
+        provincia = Provincia.objects.create(codigo="131", nombre="Santiago", region=region)
+        comuna = Comuna.objects.create(codigo="13120", nombre="Ñuñoa", provincia=provincia)
+
+        owner = User.objects.create(username="local")
+        Profile.objects.create(user=owner, country=country, comuna=comuna, lat=-33.45, lng=-70.6)
+        vendor = Vendor.objects.create(name="Local", created_by=owner, country=country)
+
+        category = Category.objects.create(title="Pizzas", slug="pizzas")
+        cls.products = [
+            Product.objects.create(category=category, vendor=vendor, title=title, price=1000)
+            for title in ("Napolitana", "Pepperoni", "Champiñones", "Margarita")
+        ]
+        now = timezone.now()
+        Offer.objects.create(
+            product=cls.products[1], is_2x1=True,
+            start_date=now - timedelta(days=1), end_date=now + timedelta(days=1),
+        )
+
+        cls.customer = User.objects.create_user(username="cliente", password="x")
+        Profile.objects.create(user=cls.customer, country=country, comuna=comuna)
+
+    def setUp(self):
+        self.client.force_login(self.customer)
+
+    def fill_cart(self, products, quantity=3):
+        key = user_key(self.customer.id)
+        get_store().clear(key)
+        for p in products:
+            get_store().set(key, p.id, quantity)
+        self.client.get(reverse("cart:cart"))   # calienta los índices en memoria del proceso
+
+    def test_cart_page_query_count(self):
+        # sesión, usuario, perfil, comuna, líneas del carrito, cotización (producto +
+        # local + oferta), log, recomendados, menú de categorías, ¿es local?
+        self.fill_cart(self.products[:1])
+        with self.assertNumQueries(10):
+            response = self.client.get(reverse("cart:cart"))
+        self.assertContains(response, "Napolitana")
+
+        self.fill_cart(self.products)
+        with self.assertNumQueries(10):
+            response = self.client.get(reverse("cart:cart"))
+        self.assertContains(response, "Pagas 2 de 3")
+
+    def test_snapshot_invalidated_on_add_and_remove(self):
+        request = self.client.get(reverse("cart:cart")).wsgi_request
+        cart = Cart(request)
+        cart.clear()
+
+        cart.add(self.products[1].id, 3)
+        with self.assertNumQueries(2):   # líneas del almacén + cotización
+            self.assertEqual(cart.get_total_cost(), 2000)   # 2x1: paga 2 de 3
+            self.assertEqual([line.effective_qty for line in cart], [2])
+            self.assertIs(Cart(request).snapshot(), cart.snapshot())
+
+        cart.add(self.products[0].id, 1)
+        self.assertEqual(cart.get_total_cost(), 3000)
+
+        cart.remove(self.products[1].id)
+        self.assertEqual(cart.get_total_cost(), 1000)
+
+
+
+class CartStoreTest(TestCase):
+    """Mismo comportamiento en los dos backends del almacén compartido."""
+
+    def check_store(self, store):
+        self.assertEqual(store.incr("bot:t1", 7, 2), 2)
+        self.assertEqual(store.incr("bot:t1", 7, 3), 5)
+        self.assertEqual(store.incr("bot:t1", 8, 1), 1)
+        self.assertEqual(store.incr("bot:t1", 8, -4), 0)   # nunca negativo: se quita
+        self.assertEqual(store.items("bot:t1"), {7: 5})
+
+        store.set("user:1", 7, 1)
+        store.set("user:1", 9, 2)
+        store.merge("bot:t1", "user:1")
+        self.assertEqual(store.items("user:1"), {7: 6, 9: 2})
+        self.assertEqual(store.items("bot:t1"), {})
+
+        store.remove("user:1", 9)
+        self.assertEqual(store.items("user:1"), {7: 6})
+        store.clear("user:1")
+        self.assertEqual(store.items("user:1"), {})
+
+    def test_database_store(self):
+        self.check_store(DatabaseCartStore())
+
+    def test_memory_store(self):
+        self.check_store(MemoryCartStore())
+
+    @override_settings(CART_TTL=0)
+    def test_expired_carts_are_not_read_and_purged(self):
+        for store in (DatabaseCartStore(), MemoryCartStore()):
+            store.incr("bot:t2", 7, 2)
+            self.assertEqual(store.items("bot:t2"), {})
+            self.assertEqual(store.incr("bot:t2", 7, 1), 1)   # una línea vencida parte de cero
+            self.assertEqual(store.purge(), 1)
+        self.assertFalse(CartEntry.objects.exists())
@@ -7,6 +7,7 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from .cart import Cart
+from .store import bot_key, get_store
 from .forms import CheckoutForm
 from order.utilities import checkout, notify_customer, notify_vendor
 from botapi.models import TempCart
@@ -14,6 +15,8 @@ from order.models import Order
 from analytics.utils import log_event
 from product.models import Product
 from order.utilities import get_allergy_conflicts
+from order.recommendations import recommend_for_products
+from product.views import get_active_comuna_id
 
 
 # ============================================================
@@ -151,16 +154,16 @@ def cart_detail(request):
                     preference_data = {
                         "items": [
                             {
-                                "title": item["product"].title,
+                                "title": item.product.title,
 
                                 # CANTIDAD REAL COBRADA CON 2x1
-                                "quantity": item["effective_qty"],
+                                "quantity": item.effective_qty,
 
                                 # PRECIO UNITARIO REAL
-                                "unit_price": float(item["unit_price"]),
+                                "unit_price": float(item.unit_price),
 
                                 "currency_id": "CLP",
-                                "description": f"{item['quantity']} unidades (paga {item['effective_qty']})"
+                                "description": f"{item.quantity} unidades (paga {item.effective_qty})"
                             }
                             for item in cart
                         ],
@@ -216,9 +219,15 @@ def cart_detail(request):
             extra_data={"total_items": len(cart), "total_cost": cart.get_total_cost()}
         )
 
+        # 🍕 Frecuentemente pedidos juntos (top-k precalculado)
+        recommended = recommend_for_products(
+            cart.cart.keys(), limit=4, comuna_id=get_active_comuna_id(request)
+        )
+
         return render(request, "cart/cart.html", {
             "form": form,
             "cart": cart,
+            "recommended": recommended,
             "mp_public_key": settings.MERCADOPAGO_PUBLIC_KEY,
         })
 
@@ -269,9 +278,7 @@ def checkout_start(request):
         log_event(request, "Carrito temporal expirado o inexistente", status="error", page="cart/checkout_start")
         return redirect("cart:cart")
 
-    cart = Cart(request)
-    for item in temp_cart.items.all():
-        cart.add(item.product.id, item.quantity)
+    get_store().merge(bot_key(token), Cart(request).key)
     temp_cart.delete()
 
     log_event(request, "🧠 Checkout iniciado desde bot", page="cart/checkout_start")
@@ -0,0 +1,92 @@
+"""
+📦 Upsert masivo para tablas de referencia (DPA, ingredientes, ...).
+
+En vez de un update_or_create por fila (2-3 consultas cada una), bulk_upsert:
+  1) lee la tabla una vez y la indexa por clave natural (codigo, name, ...),
+  2) compara en memoria cada fila nueva con la existente,
+  3) aplica bulk_create / bulk_update por lotes dentro de una transacción.
+
+Devuelve UpsertResult con los conteos y el mapa clave → pk, para resolver
+los padres de la tabla siguiente sin más consultas (región → provincia → comuna).
+
+bulk_create/bulk_update no llaman a save() ni envían señales: lo que haga save()
+(p. ej. slugs) se hace con `prepare`, y los índices en memoria de los procesos
+web se ponen al día por su INDEX_TTL.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils.text import slugify
+
+
+BATCH_SIZE = 500
+
+UpsertResult = namedtuple("UpsertResult", "inserted updated unchanged ids")
+
+
+def bulk_upsert(model, rows, key, fields, prepare=None, batch_size=BATCH_SIZE):
+    """
+    rows: dicts con `key` y los `fields` (FK por attname, p. ej. "region_id").
+    prepare(obj): se llama con cada objeto nuevo antes de insertarlo.
+    Filas repetidas por clave: gana la última.
+    """
+    incoming = {row[key]: row for row in rows}
+    existing = {getattr(obj, key): obj for obj in model.objects.all()}
+
+    to_create, to_update = [], []
+    for k, row in incoming.items():
+        obj = existing.get(k)
+        if obj is None:
+            obj = model(**{key: k, **{f: row[f] for f in fields}})
+            if prepare:
+                prepare(obj)
+            to_create.append(obj)
+            continue
+
+        changed = False
+        for f in fields:
+            if getattr(obj, f) != row[f]:
+                setattr(obj, f, row[f])
+                changed = True
+        if changed:
+            to_update.append(obj)
+
+    with transaction.atomic():
+        model.objects.bulk_create(to_create, batch_size=batch_size)
+        if to_update:
+            model.objects.bulk_update(to_update, fields, batch_size=batch_size)
+
+    # MySQL no devuelve los pk de bulk_create → una lectura de (clave, pk)
+    ids = {k: obj.pk for k, obj in existing.items()}
+    if to_create:
+        ids.update(model.objects.filter(**{f"{key}__in": [getattr(o, key) for o in to_create]})
+                   .values_list(key, "pk"))
+
+    return UpsertResult(
+        inserted=len(to_create),
+        updated=len(to_update),
+        unchanged=len(incoming) - len(to_create) - len(to_update),
+        ids=ids,
+    )
+
+
+def slug_filler(model, source="name", field="slug"):
+    """
+    prepare() para bulk_upsert: mismo slug único que genera save()
+    ("queso", "queso-1", ...) sin una consulta por fila.
+    """
+    taken = set(model.objects.values_list(field, flat=True))
+
+    def prepare(obj):
+        if getattr(obj, field):
+            taken.add(getattr(obj, field))
+            return
+        base = slugify(getattr(obj, source))
+        slug, num = base, 1
+        while slug in taken:
+            slug = f"{base}-{num}"
+            num += 1
+        taken.add(slug)
+        setattr(obj, field, slug)
+
+    return prepare
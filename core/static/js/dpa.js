@@ -0,0 +1,30 @@
+// Jerarquía DPA (región → provincia → comuna) en un solo request: /location/dpa.json
+// El navegador la guarda en caché (ETag + max-age); los selects se resuelven aquí.
+(function () {
+  let pending = null;
+
+  function loadDpa() {
+    if (!pending) {
+      pending = fetch("/location/dpa.json")
+        .then(response => response.json())
+        .then(data => {
+          const provincias = {};
+          const comunas = {};
+          data.regiones.forEach(([regionId, , provs]) => {
+            provincias[regionId] = provs.map(([id, nombre]) => ({ id, nombre }));
+            provs.forEach(([provinciaId, , coms]) => {
+              comunas[provinciaId] = coms.map(([id, nombre]) => ({ id, nombre }));
+            });
+          });
+          return {
+            version: data.version,
+            provinciasDe: regionId => provincias[regionId] || [],
+            comunasDe: provinciaId => comunas[provinciaId] || [],
+          };
+        });
+    }
+    return pending;
+  }
+
+  window.loadDpa = loadDpa;
+})();
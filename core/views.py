@@ -11,14 +11,33 @@ from product.models import Product
 from core.models import Country
 from cart.cart import Cart
 from analytics.utils import log_event
-from product.views import get_active_comuna
+from product.views import get_active_comuna, get_active_point
 
 
 
 
 # PAGINA PRINCIPALL
 
-from product.utils import aplicar_preferencias
+from product.utils import aplicar_preferencias, excluir_alergenos
+from product.catalog import filter_by_country, filter_by_delivery
+from vendor.models import Vendor
+from vendor.spatial import nearest_vendors
+from vendor.zones import point_for_comuna, vendors_delivering_to
+from location.resolver import resolve_comuna
+
+NEARBY_VENDORS = 6
+
+
+def pizzerias_cercanas(request):
+    """[(Vendor, km)] más cercanos al punto activo (índice espacial, sin recorrer todos)."""
+    punto = get_active_point(request)
+    if punto is None or punto.lat is None:
+        return []
+
+    hits = nearest_vendors(punto.lat, punto.lng, NEARBY_VENDORS)
+    vendors = Vendor.objects.in_bulk([h.vendor_id for h in hits])
+    return [(vendors[h.vendor_id], h.km) for h in hits if h.vendor_id in vendors]
+
 
 def frontpage(request):
     countries = Country.objects.all()
@@ -34,9 +53,7 @@ def frontpage(request):
         if selected_country:
             try:
                 country = Country.objects.get(id=selected_country)
-                newest_products = newest_products.filter(
-                    vendor__created_by__profile__country=country
-                )
+                newest_products = filter_by_country(newest_products, country.id)
             except Country.DoesNotExist:
                 newest_products = []
         else:
@@ -45,28 +62,45 @@ def frontpage(request):
         profile = getattr(request.user, "profile", None)
         if profile and profile.country:
             user_country = profile.country
-            newest_products = newest_products.filter(
-                vendor__created_by__profile__country=user_country
-            )
+            newest_products = filter_by_country(newest_products, user_country.id)
             selected_country = user_country.id
             request.session['selected_country'] = user_country.id
 
     comuna_activa = get_active_comuna(request)
     if comuna_activa:
-        newest_products = newest_products.filter(
-            vendor__created_by__profile__comuna__nombre__iexact=comuna_activa
-        )
+        newest_products = filter_by_delivery(newest_products, get_active_point(request))
 
     # ⭐ Aquí agregas la línea que faltaba
     solo_pref = request.GET.get("solo_pref") == "1"
     newest_products = aplicar_preferencias(request.user, newest_products, solo_pref)
 
+    # ⚠️ "Apto para mí": sin ingredientes de mis alergias
+    sin_alergenos = request.GET.get("sin_alergenos") == "1"
+    newest_products = excluir_alergenos(request.user, newest_products, sin_alergenos)
+
+    newest_products = list(newest_products[:12])
+
+    # 📍 Comuna sin pizzas → las de las pizzerías más cercanas
+    nearby_vendors = []
+    if comuna_activa and not newest_products and selected_country:
+        nearby_vendors = pizzerias_cercanas(request)
+        if nearby_vendors:
+            rank = {vendor.id: pos for pos, (vendor, _) in enumerate(nearby_vendors)}
+            nearby_products = filter_by_country(Product.objects.filter(vendor_id__in=rank), selected_country)
+            nearby_products = aplicar_preferencias(request.user, nearby_products, solo_pref)
+            nearby_products = excluir_alergenos(request.user, nearby_products, sin_alergenos)
+            newest_products = sorted(nearby_products[:60], key=lambda p: rank[p.vendor_id])[:12]
+            shown = {p.vendor_id for p in newest_products}
+            nearby_vendors = [(vendor, km) for vendor, km in nearby_vendors if vendor.id in shown]
+
     return render(request, "core/frontpage.html", {
         "countries": countries,
         "selected_country": selected_country,
-        "newest_products": newest_products[:12],
+        "newest_products": newest_products,
+        "nearby_vendors": nearby_vendors,
         "comuna": comuna_activa,
         "solo_pref": solo_pref,
+        "sin_alergenos": sin_alergenos,
     })
 
 
@@ -164,10 +198,16 @@ def custom_404(request, exception=None):
 @require_POST
 def set_location_auto(request):
     data = json.loads(request.body)
-    comuna = data.get("comuna")
+
+    # Texto libre del geocodificador del navegador → id canónico ("Nunoa" = "Ñuñoa")
+    comuna = resolve_comuna(data.get("comuna"))
+    if comuna is None:
+        mensaje = f"No reconocemos la comuna «{data.get('comuna') or ''}»."
+        messages.warning(request, mensaje)
+        return JsonResponse({"status": "error", "message": mensaje}, status=400)
 
     # Guardar comuna "temporal" en sesión
-    request.session["temp_comuna"] = comuna
+    request.session["temp_comuna"] = comuna.id
     request.session["temp_region"] = None
     request.session["temp_provincia"] = None
 
@@ -187,53 +227,20 @@ def limpiar_carrito_por_comuna(request, nueva_comuna):
     cart = Cart(request)
     productos_eliminados = 0
 
-    # congelar lista antes de modificar
-    for item in list(cart):
-        product_obj = None
-        product_id = None
-
-        #  detectar cómo viene el item del carrito
-        if isinstance(item, dict):
-            if "product" in item:
-                product_obj = item["product"]
-            elif "product_id" in item:
-                product_id = item["product_id"]
-            elif "id" in item:
-                product_id = item["id"]
-        else:
-            
-            continue
-
-        if product_obj is None and product_id is not None:
-            try:
-                product_obj = Product.objects.get(id=product_id)
-            except Product.DoesNotExist:
-                continue
-
-        if product_obj is None:
-            continue
-
-        vendor_comuna = getattr(
-            getattr(
-                getattr(product_obj.vendor.created_by, "profile", None),
-                "comuna",
-                None
-            ),
-            "nombre",
-            None
-        )
-
-        if not vendor_comuna:
-            continue
-
-        if vendor_comuna.lower() != nueva_comuna.lower():
-            cart.remove(product_obj.id)
-            productos_eliminados += 1
+    # Misma consulta que el catálogo: ¿qué locales reparten en la nueva comuna?
+    punto = point_for_comuna(nueva_comuna.id)
+    if punto is not None:
+        reparten = vendors_delivering_to(punto)
+        en_carrito = Product.objects.filter(pk__in=list(cart.cart.keys())).values_list("id", "vendor_id")
+        for product_id, vendor_id in en_carrito:
+            if vendor_id not in reparten:
+                cart.remove(product_id)
+                productos_eliminados += 1
 
     if productos_eliminados > 0:
-        mensaje = f"Se eliminaron {productos_eliminados} productos del carrito por no estar disponibles en {nueva_comuna}."
+        mensaje = f"Se eliminaron {productos_eliminados} productos del carrito por no estar disponibles en {nueva_comuna.nombre}."
     else:
-        mensaje = f"Ubicación cambiada a {nueva_comuna}."
+        mensaje = f"Ubicación cambiada a {nueva_comuna.nombre}."
 
     messages.warning(request, mensaje)
     return mensaje
@@ -0,0 +1,44 @@
+"""
+🗺️ Gazetteer offline: centroide de cada comuna desde location/data/comunas.json.
+
+Se carga una vez por proceso (346 comunas) y responde sin red ni base de datos.
+Es la aproximación inmediata mientras no haya coordenadas exactas de la dirección.
+"""
+import json
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+
+DATA_FILE = Path(__file__).resolve().parent / "data" / "comunas.json"
+
+
+def fold(text):
+    """Minúsculas, sin tildes y con espacios simples ("  Ñuñoa " → "nunoa")."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+@lru_cache(maxsize=1)
+def _load():
+    with open(DATA_FILE, encoding="utf-8") as f:
+        comunas = json.load(f)
+
+    by_codigo, by_nombre = {}, {}
+    for c in comunas:
+        if c.get("lat") is None or c.get("lng") is None:
+            continue
+        point = (float(c["lat"]), float(c["lng"]))
+        by_codigo[c["codigo"]] = point
+        by_nombre[fold(c["nombre"])] = point
+    return by_codigo, by_nombre
+
+
+def comuna_centroid(codigo=None, nombre=None):
+    """(lat, lng) de la comuna por código DPA o por nombre, o (None, None)."""
+    by_codigo, by_nombre = _load()
+    point = by_codigo.get(codigo) if codigo else None
+    if point is None and nombre:
+        point = by_nombre.get(fold(nombre))
+    return point or (None, None)
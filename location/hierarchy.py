@@ -0,0 +1,118 @@
+"""
+🗂️ Jerarquía DPA (región → provincia → comuna) en un solo documento JSON.
+
+Se construye una vez por proceso desde las tablas DPA y se sirve ya serializado,
+con un ETag fuerte (hash del contenido) y caché larga: el navegador baja el árbol
+una vez y los selects dependientes se resuelven en el cliente, sin más requests.
+
+Formato compacto (arreglos, ordenados por nombre sin tildes, como la colación de MySQL):
+    {"version": "…", "regiones": [[id, nombre, [[id, nombre, [[id, nombre], …]], …]], …]}
+
+Se reconstruye cuando cambia una región/provincia/comuna (location/signals.py)
+o pasado INDEX_TTL (cargas masivas sin señales).
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+
+from location.gazetteer import fold
+
+
+INDEX_TTL = 3600
+
+
+class DpaHierarchy:
+    def __init__(self, regiones, provincias, comunas):
+        """Filas (id, nombre) de regiones y (id, nombre, padre_id) de provincias/comunas."""
+        self.regiones = sorted(regiones, key=lambda r: fold(r[1]))
+
+        self.provincias = defaultdict(list)   # region_id → [(id, nombre)]
+        for pk, nombre, region_id in sorted(provincias, key=lambda r: fold(r[1])):
+            self.provincias[region_id].append((pk, nombre))
+
+        self.comunas = defaultdict(list)      # provincia_id → [(id, nombre)]
+        for pk, nombre, provincia_id in sorted(comunas, key=lambda r: fold(r[1])):
+            self.comunas[provincia_id].append((pk, nombre))
+
+        tree = [
+            [rid, rnombre, [
+                [pid, pnombre, [list(c) for c in self.comunas.get(pid, ())]]
+                for pid, pnombre in self.provincias.get(rid, ())
+            ]]
+            for rid, rnombre in self.regiones
+        ]
+        payload = json.dumps(tree, ensure_ascii=False, separators=(",", ":"))
+        self.version = hashlib.sha1(payload.encode()).hexdigest()[:16]
+        self.etag = f'"{self.version}"'
+        self.body = f'{{"version":"{self.version}","regiones":{payload}}}'.encode()
+        self.built_at = time.monotonic()
+
+    def provincias_of(self, region_id):
+        return self.provincias.get(region_id, [])
+
+    def comunas_of(self, provincia_id):
+        return self.comunas.get(provincia_id, [])
+
+
+# ===========================================================
+#   ÍNDICE DEL PROCESO
+# ===========================================================
+_lock = threading.Lock()
+_hierarchy = None
+_dirty = True
+
+
+def get_hierarchy():
+    global _hierarchy, _dirty
+    with _lock:
+        if _hierarchy is not None and not _dirty and time.monotonic() - _hierarchy.built_at < INDEX_TTL:
+            return _hierarchy
+        _dirty = False
+
+    from location.models import Comuna, Provincia, Region
+
+    hierarchy = DpaHierarchy(
+        Region.objects.values_list("id", "nombre"),
+        Provincia.objects.values_list("id", "nombre", "region_id"),
+        Comuna.objects.values_list("id", "nombre", "provincia_id"),
+    )
+    with _lock:
+        _hierarchy = hierarchy
+    return hierarchy
+
+
+def invalidate():
+    global _dirty
+    with _lock:
+        _dirty = True
+
+
+# ===========================================================
+#   FORMULARIOS
+# ===========================================================
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def bind_dpa_choices(form, region_id=None, provincia_id=None):
+    """
+    Opciones de los selects region/provincia/comuna del form desde la jerarquía en
+    memoria (render sin consultas). Los querysets quedan solo para validar el POST.
+    """
+    hierarchy = get_hierarchy()
+    options = {
+        "region": hierarchy.regiones,
+        "provincia": hierarchy.provincias_of(_parse_id(region_id)),
+        "comuna": hierarchy.comunas_of(_parse_id(provincia_id)),
+    }
+    for name, rows in options.items():
+        field = form.fields.get(name)
+        if field is None:
+            continue
+        empty = [("", field.empty_label)] if field.empty_label is not None else []
+        field.choices = empty + list(rows)
@@ -1,7 +1,13 @@
 import json
+import time
+from pathlib import Path
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.bulk import bulk_upsert
 from location.models import Region, Provincia, Comuna
-from pathlib import Path
+
 
 class Command(BaseCommand):
     help = 'Carga regiones, provincias y comunas desde archivos locales JSON'
@@ -17,33 +23,42 @@ class Command(BaseCommand):
             comunas = json.load(f)
 
         self.stdout.write(self.style.WARNING("⏳ Cargando datos locales..."))
+        start = time.perf_counter()
 
-        for r in regiones:
-            region, _ = Region.objects.update_or_create(
-                codigo=r["codigo"],
-                defaults={"nombre": r["nombre"]}
+        # Un upsert masivo por nivel; el padre se resuelve con el mapa codigo → id del nivel anterior
+        with transaction.atomic():
+            result = bulk_upsert(
+                Region,
+                [{"codigo": r["codigo"], "nombre": r["nombre"]} for r in regiones],
+                key="codigo", fields=["nombre"],
             )
+            self._report("Regiones", result)
+
+            region_ids = result.ids
+            rows = [
+                {"codigo": p["codigo"], "nombre": p["nombre"], "region_id": region_ids[p["codigo_padre"]]}
+                for p in provincias if p["codigo_padre"] in region_ids
+            ]
+            result = bulk_upsert(Provincia, rows, key="codigo", fields=["nombre", "region_id"])
+            self._report("Provincias", result, skipped=len(provincias) - len(rows))
+
+            provincia_ids = result.ids
+            rows = [
+                {"codigo": c["codigo"], "nombre": c["nombre"], "provincia_id": provincia_ids[c["codigo_padre"]]}
+                for c in comunas if c["codigo_padre"] in provincia_ids
+            ]
+            result = bulk_upsert(Comuna, rows, key="codigo", fields=["nombre", "provincia_id"])
+            self._report("Comunas", result, skipped=len(comunas) - len(rows))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Datos cargados desde archivos locales correctamente ({time.perf_counter() - start:.2f}s)."
+        ))
 
-        for p in provincias:
-            try:
-                region = Region.objects.get(codigo=p["codigo_padre"])
-                Provincia.objects.update_or_create(
-                    codigo=p["codigo"],
-                    region=region,
-                    defaults={"nombre": p["nombre"]}
-                )
-            except Region.DoesNotExist:
-                continue
-
-        for c in comunas:
-            try:
-                provincia = Provincia.objects.get(codigo=c["codigo_padre"])
-                Comuna.objects.update_or_create(
-                    codigo=c["codigo"],
-                    provincia=provincia,
-                    defaults={"nombre": c["nombre"]}
-                )
-            except Provincia.DoesNotExist:
-                continue
-
-        self.stdout.write(self.style.SUCCESS("✅ Datos cargados desde archivos locales correctamente."))
+    def _report(self, label, result, skipped=0):
+        line = (
+            f"   {label}: {result.inserted} nuevas, {result.updated} actualizadas, "
+            f"{result.unchanged} sin cambios"
+        )
+        if skipped:
+            line += f", {skipped} sin padre (omitidas)"
+        self.stdout.write(line)
@@ -0,0 +1,87 @@
+"""
+🧭 Texto libre de comuna → id canónico de location.Comuna.
+
+Un diccionario en memoria construido desde las tablas DPA (una consulta por
+proceso, ~346 filas) resuelve sin tocar la base de datos:
+  - id (int o "42"), código DPA ("13120") o nombre plegado ("Ñuñoa" = "nunoa").
+
+La sesión y los filtros del catálogo guardan el id; el nombre queda solo para mostrar.
+Se reconstruye cuando cambia una comuna (location/signals.py) o pasado INDEX_TTL.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from location.gazetteer import fold
+
+
+INDEX_TTL = 3600   # las comunas casi no cambian; las señales invalidan antes
+
+ComunaRef = namedtuple("ComunaRef", "id nombre codigo")
+
+
+class ComunaLookup:
+    def __init__(self, rows):
+        self.by_id = {}
+        self.by_codigo = {}
+        self.by_nombre = {}
+        for comuna_id, nombre, codigo in rows:
+            ref = ComunaRef(comuna_id, nombre, codigo)
+            self.by_id[comuna_id] = ref
+            self.by_codigo[str(codigo)] = ref
+            # Nombre repetido (no debería): gana el id menor, igual que antes .first()
+            self.by_nombre.setdefault(fold(nombre), ref)
+        self.built_at = time.monotonic()
+
+    def resolve(self, value):
+        if value is None or value == "":
+            return None
+        if isinstance(value, int):
+            return self.by_id.get(value)
+
+        text = str(value).strip()
+        if text.isdigit():
+            return self.by_codigo.get(text) or self.by_id.get(int(text))
+        return self.by_nombre.get(fold(text))
+
+
+# ===========================================================
+#   ÍNDICE DEL PROCESO
+# ===========================================================
+_lock = threading.Lock()
+_lookup = None
+_dirty = True
+
+
+def get_lookup():
+    global _lookup, _dirty
+    with _lock:
+        if _lookup is not None and not _dirty and time.monotonic() - _lookup.built_at < INDEX_TTL:
+            return _lookup
+        _dirty = False
+
+    from location.models import Comuna
+
+    lookup = ComunaLookup(Comuna.objects.order_by("id").values_list("id", "nombre", "codigo"))
+    with _lock:
+        _lookup = lookup
+    return lookup
+
+
+def invalidate():
+    global _dirty
+    with _lock:
+        _dirty = True
+
+
+# ===========================================================
+#   API PÚBLICA
+# ===========================================================
+def resolve_comuna(value):
+    """ComunaRef(id, nombre, codigo) para un id, código DPA o nombre (sin importar tildes), o None."""
+    return get_lookup().resolve(value)
+
+
+def resolve_comuna_id(value):
+    ref = resolve_comuna(value)
+    return ref.id if ref else None
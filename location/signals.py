@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from location import hierarchy, resolver
+from location.models import Comuna, Provincia, Region
+
+
+# ===========================================================
+#   RESOLVER DE COMUNAS (nombre → id)
+# ===========================================================
+@receiver(post_save, sender=Comuna)
+@receiver(post_delete, sender=Comuna)
+def resolver_comuna_changed(sender, **kwargs):
+    resolver.invalidate()
+
+
+# ===========================================================
+#   JERARQUÍA DPA (location/dpa.json)
+# ===========================================================
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+@receiver(post_save, sender=Provincia)
+@receiver(post_delete, sender=Provincia)
+@receiver(post_save, sender=Comuna)
+@receiver(post_delete, sender=Comuna)
+def hierarchy_dpa_changed(sender, **kwargs):
+    hierarchy.invalidate()
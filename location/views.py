@@ -1,15 +1,59 @@
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from .hierarchy import get_hierarchy
+
+
+DPA_MAX_AGE = 60 * 60 * 24          # sin versión en la URL: un día y luego revalidar con ETag
+DPA_IMMUTABLE_AGE = 60 * 60 * 24 * 365
+
+
+def not_modified(request, etag):
+    """True si el cliente ya tiene esta versión (If-None-Match)."""
+    tags = [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]
+    return etag in tags or "*" in tags
+
+
+@require_GET
+def dpa(request):
+    """Árbol completo región → provincia → comuna (location/hierarchy.py)."""
+    hierarchy = get_hierarchy()
+
+    if not_modified(request, hierarchy.etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(hierarchy.body, content_type="application/json; charset=utf-8")
+    response["ETag"] = hierarchy.etag
+
+    # ?v=<versión> vigente → contenido inmutable; cualquier otra → caché de un día
+    if request.GET.get("v") == hierarchy.version:
+        patch_cache_control(response, public=True, max_age=DPA_IMMUTABLE_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=DPA_MAX_AGE)
+    return response
+
+
+def _children_response(request, rows, version):
+    etag = f'"{version}"'
+    if not_modified(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse([{"id": pk, "nombre": nombre} for pk, nombre in rows], safe=False)
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=DPA_MAX_AGE)
+    return response
 
-from django.http import JsonResponse
-from .models import Provincia, Comuna
 
 def cargar_provincias(request):
+    hierarchy = get_hierarchy()
     region_id = request.GET.get('region_id')
-    provincias = Provincia.objects.filter(region_id=region_id).order_by('nombre')
-    data = list(provincias.values('id', 'nombre'))
-    return JsonResponse(data, safe=False)
+    rows = hierarchy.provincias_of(int(region_id)) if (region_id or "").isdigit() else []
+    return _children_response(request, rows, f"{hierarchy.version}-r{region_id}")
+
 
 def cargar_comunas(request):
+    hierarchy = get_hierarchy()
     provincia_id = request.GET.get('provincia_id')
-    comunas = Comuna.objects.filter(provincia_id=provincia_id).order_by('nombre')
-    data = list(comunas.values('id', 'nombre'))
-    return JsonResponse(data, safe=False)
+    rows = hierarchy.comunas_of(int(provincia_id)) if (provincia_id or "").isdigit() else []
+    return _children_response(request, rows, f"{hierarchy.version}-p{provincia_id}")
@@ -7,6 +7,7 @@ from django.utils import timezone
 
 from vendor.models import Vendor
 from product.models import Product
+from offers.pricing import PricingEngine
 
 
 class Command(BaseCommand):
@@ -74,6 +75,7 @@ class Command(BaseCommand):
                 # Plantilla de oferta real
                 # =========================================================
                 offer = producto.active_offer
+                quote = PricingEngine.quote(producto, at=now)
 
                 if offer.is_2x1:
                     tipo = "2x1"
@@ -97,9 +99,9 @@ class Command(BaseCommand):
                         "image_url": f"https://nicolasbriceno.pythonanywhere.com{producto.image.url}" if producto.image else "",
                         "tipo_oferta": tipo,
                         "price_original": producto.price,
-                        "price_final": producto.get_final_price(),
+                        "price_final": quote.unit_price,
                         "es_2x1": offer.is_2x1,
-                        "porcentaje": producto.get_offer_percentage(),
+                        "porcentaje": quote.discount_percentage,
                     }
                 )
 
@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from offers.models import Offer
+from offers.pricing import PricingEngine
+from product.models import Category, Product
+from vendor.models import Vendor
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark del PricingEngine: cuenta consultas y tiempo al cotizar N productos "
+        "(antes: una consulta de oferta por producto). Los datos se crean y se descartan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1, 10, 100, 1000],
+            help="Tamaños de carrito/catálogo a medir",
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(options["sizes"])
+
+        with transaction.atomic():
+            ids = self._seed(max(sizes))
+
+            self.stdout.write(f"{'N':>6} | {'antes (queries)':>15} | {'ahora (queries)':>15} | {'ahora (ms)':>10}")
+            for n in sizes:
+                subset = ids[:n]
+
+                # Antes: get_final_price() por producto → 1 consulta de oferta c/u
+                with CaptureQueriesContext(connection) as legacy:
+                    for p in Product.objects.filter(pk__in=subset):
+                        try:
+                            offer = p.offer
+                        except Offer.DoesNotExist:
+                            offer = None
+                        if offer:
+                            offer.is_current()
+
+                start = time.perf_counter()
+                with CaptureQueriesContext(connection) as batch:
+                    PricingEngine.quote_many(
+                        Product.objects.filter(pk__in=subset),
+                        quantities={pid: 3 for pid in subset},
+                    )
+                elapsed = (time.perf_counter() - start) * 1000
+
+                self.stdout.write(
+                    f"{n:>6} | {len(legacy.captured_queries):>15} | "
+                    f"{len(batch.captured_queries):>15} | {elapsed:>10.1f}"
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("✔ Benchmark terminado (datos descartados)."))
+
+    def _seed(self, total):
+        now = timezone.now()
+        user = User.objects.create(username="bench_pricing_vendor")
+        vendor = Vendor.objects.create(name="Bench", created_by=user)
+        category = Category.objects.create(title="Bench", slug="bench-pricing")
+
+        Product.objects.bulk_create([
+            Product(
+                category=category,
+                vendor=vendor,
+                title=f"Pizza {i}",
+                slug=f"bench-pricing-{i}",
+                price=10000 + i,
+            )
+            for i in range(total)
+        ])
+        products = list(Product.objects.filter(category=category).order_by("id"))
+
+        # La mitad de los productos con oferta (alternando % y 2x1)
+        Offer.objects.bulk_create([
+            Offer(
+                product=p,
+                discount_percentage=20 if i % 4 else None,
+                is_2x1=not (i % 4),
+                start_date=now - timedelta(days=1),
+                end_date=now + timedelta(days=1),
+            )
+            for i, p in enumerate(products) if i % 2 == 0
+        ])
+
+        return [p.id for p in products]
@@ -25,8 +25,8 @@ class Offer(models.Model):
     def __str__(self):
         return f"Oferta de {self.product.title} (ID {self.product.id})"
 
-    def is_current(self):
-        now = timezone.now()
+    def is_current(self, at=None):
+        now = at or timezone.now()
         return self.is_active and self.start_date <= now <= self.end_date
 
     def get_final_price(self):
@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+
+@dataclass(frozen=True)
+class PriceQuote:
+    """
+    Precio resuelto de un producto en un instante dado.
+    Es inmutable: si cambia la oferta o la cantidad se pide una cotización nueva.
+    """
+    product_id: int
+    original_price: int
+    unit_price: int
+    has_offer: bool
+    is_2x1: bool
+    offer_percentage: int       # % configurado en la oferta (0 si no aplica)
+    discount_percentage: int    # % que se muestra al cliente (badge)
+    quantity: int = 1
+
+    @property
+    def effective_qty(self):
+        """Cantidad realmente cobrada (2x1 → se paga la mitad redondeada hacia arriba)."""
+        if self.is_2x1:
+            return (self.quantity // 2) + (self.quantity % 2)
+        return self.quantity
+
+    @property
+    def total_price(self):
+        return self.effective_qty * self.unit_price
+
+
+class PricingEngine:
+    """
+    🔥 Resuelve precios finales (ofertas + 2x1) para muchos productos de una vez.
+
+    Todas las ofertas se traen en UNA sola consulta y quedan cacheadas en cada
+    producto, así `product.active_offer` en templates tampoco vuelve a la BD.
+    """
+
+    @classmethod
+    def quote_many(cls, products, at=None, quantities=None):
+        """
+        Devuelve {product_id: PriceQuote}.
+
+        - products: iterable de Product (queryset o lista)
+        - at: instante para evaluar la vigencia de las ofertas (default: ahora)
+        - quantities: {product_id: cantidad} para calcular 2x1 y totales
+        """
+        products = list(products)
+        at = at or timezone.now()
+        quantities = quantities or {}
+
+        prefetch_related_objects(products, "offer")
+
+        return {
+            p.id: cls._build_quote(p, at, int(quantities.get(p.id, 1)))
+            for p in products
+        }
+
+    @classmethod
+    def quote(cls, product, at=None, quantity=1):
+        return cls.quote_many([product], at=at, quantities={product.id: quantity})[product.id]
+
+    @staticmethod
+    def _current_offer(product, at):
+        try:
+            offer = product.offer
+        except ObjectDoesNotExist:
+            return None
+        return offer if offer.is_current(at) else None
+
+    @classmethod
+    def _build_quote(cls, product, at, quantity):
+        original = product.price
+        offer = cls._current_offer(product, at)
+
+        if not offer:
+            return PriceQuote(
+                product_id=product.id,
+                original_price=original,
+                unit_price=original,
+                has_offer=False,
+                is_2x1=False,
+                offer_percentage=0,
+                discount_percentage=0,
+                quantity=quantity,
+            )
+
+        # 1) Descuento por precio fijo  2) porcentual  3) solo 2x1
+        if offer.discount_price:
+            unit_price = max(1, offer.discount_price)
+        elif offer.discount_percentage:
+            unit_price = max(1, int(original * (1 - offer.discount_percentage / 100)))
+        else:
+            unit_price = original
+
+        if original > 0:
+            pct = round(100 - ((unit_price / original) * 100))
+            discount_percentage = max(1, min(pct, 90))
+        else:
+            discount_percentage = 0
+
+        return PriceQuote(
+            product_id=product.id,
+            original_price=original,
+            unit_price=unit_price,
+            has_offer=True,
+            is_2x1=offer.is_2x1,
+            offer_percentage=offer.discount_percentage or 0,
+            discount_percentage=discount_percentage,
+            quantity=quantity,
+        )
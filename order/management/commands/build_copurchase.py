@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from order.recommendations import CHUNK_SIZE, rebuild_copurchase, update_copurchase
+
+
+class Command(BaseCommand):
+    help = (
+        "Actualiza la matriz de co-compra (\"frecuentemente pedidos juntos\") con las órdenes "
+        "pagadas nuevas desde la última ejecución. Con --rebuild la recalcula desde cero."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Borrar y volver a contar todo")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Órdenes por lote")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING(
+            "⏳ Recalculando desde cero..." if options["rebuild"] else "⏳ Sumando órdenes nuevas..."
+        ))
+
+        def progress(processed):
+            self.stdout.write(f"   {processed} órdenes")
+
+        start = time.perf_counter()
+        job = rebuild_copurchase if options["rebuild"] else update_copurchase
+        orders, products = job(chunk_size=options["chunk_size"], on_chunk=progress)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {orders} órdenes procesadas, {products} productos actualizados en {elapsed:.1f}s"
+        ))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0005_alter_order_status'),
+        ('product', '0012_similarproduct'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPurchaseWeight',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='purchase_weight', serialize=False, to='product.product')),
+                ('weight', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='copurchase_counted',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name='CoPurchasePair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.FloatField(default=0)),
+                ('product_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='product.product')),
+                ('product_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='product.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product_b'], name='order_copur_product_9779ac_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product_a', 'product_b'), name='unique_copurchase_pair')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FrequentlyOrderedTogether',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ordered_together_rows', to='product.product')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_in_rows', to='product.product')),
+            ],
+            options={
+                'ordering': ['product', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'rank'), name='unique_ordered_together_rank')],
+            },
+        ),
+    ]
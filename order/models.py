@@ -31,6 +31,9 @@ class Order(models.Model):
 
     vendors = models.ManyToManyField(Vendor, related_name="orders")
 
+    # Ya sumada a la matriz de co-compra (order/recommendations.py)
+    copurchase_counted = models.BooleanField(default=False, db_index=True, editable=False)
+
     class Meta:
         ordering = ["-created_at"]
 
@@ -61,3 +64,51 @@ class OrderItem(models.Model):
 
     def get_total_price(self):
         return self.price * self.quantity
+
+
+
+# ===========================================================
+#   "FRECUENTEMENTE PEDIDOS JUNTOS" (order/recommendations.py)
+# ===========================================================
+class ProductPurchaseWeight(models.Model):
+    """Popularidad acumulada de un producto (órdenes pagadas, ponderadas por recencia)."""
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="purchase_weight"
+    )
+    weight = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.product_id}: {self.weight:.2f}"
+
+
+class CoPurchasePair(models.Model):
+    """Celda de la matriz dispersa de co-compra (simétrica: product_a_id < product_b_id)."""
+    product_a = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    product_b = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    weight = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product_a", "product_b"], name="unique_copurchase_pair"),
+        ]
+        indexes = [models.Index(fields=["product_b"])]
+
+    def __str__(self):
+        return f"{self.product_a_id} + {self.product_b_id}: {self.weight:.2f}"
+
+
+class FrequentlyOrderedTogether(models.Model):
+    """Top-k de productos pedidos junto a `product` (lo leen el carrito y el bot)."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="ordered_together_rows")
+    recommended = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="recommended_in_rows")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["product", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "rank"], name="unique_ordered_together_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} → {self.recommended_id} ({self.score:.3f})"
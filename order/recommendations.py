@@ -0,0 +1,246 @@
+"""
+🛒 "Frecuentemente pedidos juntos" a partir del historial de OrderItem.
+
+- Matriz dispersa ítem-ítem (CoPurchasePair) con el peso de cada par de productos
+  que aparecieron en la misma orden pagada, y la popularidad de cada producto
+  (ProductPurchaseWeight).
+- Recencia: cada orden pesa 2^(días desde EPOCH / HALF_LIFE_DAYS). Como todos los
+  pesos crecen con el mismo factor, las órdenes viejas pierden importancia
+  relativa sin tener que reescribir la matriz (decaimiento exponencial implícito).
+- Puntaje = peso(a, b) / sqrt(pop(a) · pop(b))  (coseno → no gana siempre lo más vendido).
+- Se procesa por lotes de órdenes (memoria acotada) y de forma incremental:
+  cada orden se marca con copurchase_counted al sumarse.
+- El top-k queda en FrequentlyOrderedTogether (carrito web y bot).
+"""
+import heapq
+import math
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from product.catalog import filter_by_comuna
+from product.models import Product
+from .models import CoPurchasePair, FrequentlyOrderedTogether, Order, OrderItem, ProductPurchaseWeight
+
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+HALF_LIFE_DAYS = 90
+TOP_K = 6
+CHUNK_SIZE = 2000               # órdenes por lote
+MAX_ITEMS_PER_ORDER = 30        # evita el costo cuadrático de pedidos gigantes
+ID_BATCH = 500                  # tamaño de los IN (...) al leer/escribir
+
+
+def recency_weight(created_at):
+    days = (created_at - EPOCH).total_seconds() / 86400
+    return 2 ** (days / HALF_LIFE_DAYS)
+
+
+def paid_orders():
+    return Order.objects.filter(paid=True).exclude(status="cancelled")
+
+
+def _batches(ids, size=ID_BATCH):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+# ===========================================================
+#   ACUMULACIÓN (matriz dispersa)
+# ===========================================================
+def _accumulate(order_ids):
+    """Suma las órdenes indicadas a la matriz. Devuelve los productos tocados."""
+    baskets = defaultdict(set)
+    created = {}
+    for order_id, created_at, product_id in OrderItem.objects.filter(order_id__in=order_ids).values_list(
+        "order_id", "order__created_at", "product_id"
+    ):
+        baskets[order_id].add(product_id)
+        created[order_id] = created_at
+
+    popularity = defaultdict(float)
+    pairs = defaultdict(float)
+    for order_id, products in baskets.items():
+        w = recency_weight(created[order_id])
+        products = sorted(products)[:MAX_ITEMS_PER_ORDER]
+        for pid in products:
+            popularity[pid] += w
+        for a, b in combinations(products, 2):
+            pairs[(a, b)] += w
+
+    _add_popularity(popularity)
+    _add_pairs(pairs)
+    return set(popularity)
+
+
+def _add_popularity(deltas):
+    existing = {}
+    for batch in _batches(deltas):
+        existing.update({r.product_id: r for r in ProductPurchaseWeight.objects.filter(product_id__in=batch)})
+
+    to_update, to_create = [], []
+    for pid, delta in deltas.items():
+        row = existing.get(pid)
+        if row:
+            row.weight += delta
+            to_update.append(row)
+        else:
+            to_create.append(ProductPurchaseWeight(product_id=pid, weight=delta))
+
+    ProductPurchaseWeight.objects.bulk_update(to_update, ["weight"], batch_size=ID_BATCH)
+    ProductPurchaseWeight.objects.bulk_create(to_create, batch_size=ID_BATCH)
+
+
+def _add_pairs(deltas):
+    by_a = defaultdict(set)
+    for a, b in deltas:
+        by_a[a].add(b)
+
+    existing = {}
+    for batch in _batches(by_a):
+        b_ids = set().union(*(by_a[a] for a in batch))
+        for row in CoPurchasePair.objects.filter(product_a_id__in=batch, product_b_id__in=b_ids):
+            key = (row.product_a_id, row.product_b_id)
+            if key in deltas:
+                existing[key] = row
+
+    to_update, to_create = [], []
+    for (a, b), delta in deltas.items():
+        row = existing.get((a, b))
+        if row:
+            row.weight += delta
+            to_update.append(row)
+        else:
+            to_create.append(CoPurchasePair(product_a_id=a, product_b_id=b, weight=delta))
+
+    CoPurchasePair.objects.bulk_update(to_update, ["weight"], batch_size=ID_BATCH)
+    CoPurchasePair.objects.bulk_create(to_create, batch_size=ID_BATCH)
+
+
+# ===========================================================
+#   TOP-K
+# ===========================================================
+def refresh_top_k(product_ids):
+    """Recalcula FrequentlyOrderedTogether de los productos indicados (por lotes)."""
+    written = 0
+    for batch in _batches(product_ids):
+        batch_set = set(batch)
+
+        neighbours = defaultdict(dict)
+        for a, b, w in CoPurchasePair.objects.filter(
+            Q(product_a_id__in=batch) | Q(product_b_id__in=batch)
+        ).values_list("product_a_id", "product_b_id", "weight"):
+            if a in batch_set:
+                neighbours[a][b] = w
+            if b in batch_set:
+                neighbours[b][a] = w
+
+        involved = batch_set.union(*(n.keys() for n in neighbours.values()))
+        popularity = {}
+        for ids in _batches(involved):
+            popularity.update(
+                ProductPurchaseWeight.objects.filter(product_id__in=ids).values_list("product_id", "weight")
+            )
+
+        rows = []
+        for pid in batch:
+            pop = popularity.get(pid)
+            if not pop:
+                continue
+            scored = (
+                (w / math.sqrt(pop * popularity[qid]), -qid)
+                for qid, w in neighbours[pid].items() if popularity.get(qid)
+            )
+            for rank, (s, neg_qid) in enumerate(heapq.nlargest(TOP_K, scored)):
+                rows.append(FrequentlyOrderedTogether(
+                    product_id=pid, recommended_id=-neg_qid, rank=rank, score=round(s, 6)
+                ))
+
+        with transaction.atomic():
+            FrequentlyOrderedTogether.objects.filter(product_id__in=batch).delete()
+            FrequentlyOrderedTogether.objects.bulk_create(rows, batch_size=ID_BATCH)
+        written += len(rows)
+    return written
+
+
+# ===========================================================
+#   API PÚBLICA
+# ===========================================================
+def update_copurchase(chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Incremental: suma las órdenes pagadas que aún no se contaron y recalcula el
+    top-k de los productos involucrados. Devuelve (órdenes, productos).
+    """
+    touched = set()
+    processed = 0
+    last_id = 0
+
+    while True:
+        with transaction.atomic():
+            # skip_locked → dos ejecuciones simultáneas no cuentan dos veces la misma orden
+            order_ids = list(
+                paid_orders()
+                .filter(copurchase_counted=False, id__gt=last_id)
+                .select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not order_ids:
+                break
+
+            touched |= _accumulate(order_ids)
+            Order.objects.filter(id__in=order_ids).update(copurchase_counted=True)
+
+        last_id = order_ids[-1]
+        processed += len(order_ids)
+        if on_chunk:
+            on_chunk(processed)
+
+    # Cambió la popularidad de los tocados → también el puntaje de sus vecinos
+    affected = set(touched)
+    for batch in _batches(touched):
+        for a, b in CoPurchasePair.objects.filter(
+            Q(product_a_id__in=batch) | Q(product_b_id__in=batch)
+        ).values_list("product_a_id", "product_b_id"):
+            affected.add(a)
+            affected.add(b)
+
+    refresh_top_k(sorted(affected))
+    return processed, len(affected)
+
+
+def rebuild_copurchase(chunk_size=CHUNK_SIZE, on_chunk=None):
+    """Desde cero: borra la matriz y vuelve a contar todas las órdenes pagadas."""
+    with transaction.atomic():
+        FrequentlyOrderedTogether.objects.all().delete()
+        CoPurchasePair.objects.all().delete()
+        ProductPurchaseWeight.objects.all().delete()
+        Order.objects.filter(copurchase_counted=True).update(copurchase_counted=False)
+    return update_copurchase(chunk_size=chunk_size, on_chunk=on_chunk)
+
+
+def recommend_for_products(product_ids, limit=4, comuna_id=None):
+    """
+    Productos que suelen pedirse junto a `product_ids` (p. ej. el carrito),
+    sumando el puntaje de cada uno. Una consulta.
+    """
+    product_ids = [int(pid) for pid in product_ids]
+    if not product_ids:
+        return []
+
+    products = (
+        Product.objects.filter(recommended_in_rows__product_id__in=product_ids)
+        .exclude(id__in=product_ids)
+        .annotate(together_score=Sum("recommended_in_rows__score"))
+    )
+    if comuna_id:
+        products = filter_by_comuna(products, comuna_id)
+
+    return list(
+        products.select_related("category", "vendor__created_by__profile__country")
+        .order_by("-together_score", "id")[:limit]
+    )
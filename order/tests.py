@@ -1,3 +1,65 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory, TestCase
 
-# Create your tests here.
+from cart.cart import Cart
+from cart.store import get_store, user_key
+from core.models import Country
+from product.models import Category, Product
+from vendor.models import Vendor
+
+from .models import Order, OrderItem
+from .utilities import checkout
+
+
+class CheckoutQueriesTest(TestCase):
+    """checkout() escribe la orden con un número fijo de consultas, sin importar las líneas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name="Chile", iso_code="CL", phone_code="+56")
+        category = Category.objects.create(title="Pizzas", slug="pizzas")
+
+        cls.products = []
+        for v in range(4):
+            owner = User.objects.create(username=f"local{v}")
+            vendor = Vendor.objects.create(name=f"Local {v}", created_by=owner, country=country)
+            cls.products += [
+                Product.objects.create(category=category, vendor=vendor, title=f"Pizza {v}-{p}", price=1000)
+                for p in range(5)
+            ]
+        cls.customer = User.objects.create_user(username="cliente", password="x")
+
+    def checkout_request(self, products):
+        request = RequestFactory().post("/cart/")
+        request.user = self.customer
+        request.session = SessionStore()
+        key = user_key(self.customer.id)
+        get_store().clear(key)
+        for p in products:
+            get_store().set(key, p.id, 2)
+        return request
+
+    def place_order(self, request):
+        return checkout(
+            request, first_name="Ana", last_name="Pérez", email="ana@example.com",
+            address="Irarrázaval 1234", zipcode="7750000", place="Ñuñoa", phone="+56911111111",
+            amount=0, send_email=False,
+        )
+
+    def test_checkout_query_count_is_constant(self):
+        for products in (self.products[:1], self.products):
+            request = self.checkout_request(products)
+            list(Cart(request))   # la vista ya cotizó el carrito en este request
+
+            with self.captureOnCommitCallbacks() as callbacks:
+                # SAVEPOINT, orden, items (un INSERT), locales (un INSERT), RELEASE
+                with self.assertNumQueries(5):
+                    order = self.place_order(request)
+
+            self.assertEqual(len(callbacks), 1)   # correos y webhook, después del commit
+            self.assertEqual(order.items.count(), len(products))
+            self.assertEqual(order.vendors.count(), len({p.vendor_id for p in products}))
+
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(OrderItem.objects.filter(order=order).values("vendor").distinct().count(), 4)
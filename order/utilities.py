@@ -1,7 +1,9 @@
 from order.models import Order, OrderItem
+from product.allergens import allergy_conflicts
 from product.models import Product
 from cart.cart import Cart
 from django.conf import settings
+from django.db import transaction
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 import requests
@@ -60,51 +62,52 @@ def checkout(
     amount,
     send_email=True,
 ):
-    # 1️⃣ Crear Orden
-    order = Order.objects.create(
-        first_name=first_name,
-        last_name=last_name,
-        email=email,
-        address=address,
-        zipcode=zipcode,
-        place=place,
-        phone=phone,
-        paid_amount=amount,  # total real pagado
-    )
-
-    cart = Cart(request)
-
-    # 2️⃣ Crear OrderItems correctamente
-    for item in cart:
-        product = item["product"]
-        quantity = item["quantity"]
-
-        unit_price = product.get_final_price()
-        original_price = product.price
-
-        if product.active_offer and product.active_offer.is_2x1:
-            effective_qty = (quantity // 2) + (quantity % 2)
-            total_item_price = effective_qty * unit_price
-            discount_pct = 50  
-        else:
-            effective_qty = quantity
-            total_item_price = quantity * unit_price
-            discount_pct = 0
-            if product.active_offer and product.active_offer.discount_percentage:
-                discount_pct = product.active_offer.discount_percentage
-
-        OrderItem.objects.create(
-            order=order,
-            product=product,
-            vendor=product.vendor,
-            price=unit_price,
-            original_price=original_price,
-            discount_percentage=discount_pct,
-            quantity=effective_qty, 
+    # Carrito ya cotizado en este request (producto + local + oferta, sin más consultas)
+    lines = list(Cart(request))
+
+    with transaction.atomic():
+        # 1️⃣ Crear Orden
+        order = Order.objects.create(
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            address=address,
+            zipcode=zipcode,
+            place=place,
+            phone=phone,
+            paid_amount=amount,  # total real pagado
         )
 
-        order.vendors.add(product.vendor)
+        # 2️⃣ OrderItems armados en memoria → un solo INSERT
+        items = [
+            OrderItem(
+                order=order,
+                product=line.product,
+                vendor=line.product.vendor,
+                price=line.quote.unit_price,
+                original_price=line.quote.original_price,
+                # 2x1 se registra como 50%; si no, el % configurado en la oferta
+                discount_percentage=50 if line.quote.is_2x1 else line.quote.offer_percentage,
+                quantity=line.quote.effective_qty,
+            )
+            for line in lines
+        ]
+        OrderItem.objects.bulk_create(items)
+
+        # Locales de la orden: un INSERT en la tabla intermedia
+        vendors = list({item.vendor_id: item.vendor for item in items}.values())
+        Order.vendors.through.objects.bulk_create([
+            Order.vendors.through(order_id=order.id, vendor_id=vendor.id) for vendor in vendors
+        ])
+
+        # 3️⃣ Correos y 4️⃣ webhook solo si la orden quedó guardada
+        transaction.on_commit(lambda: _after_checkout(order, items, vendors, send_email))
 
+    # 5️⃣ 🔙 Devolver orden
+    return order
+
+
+def _after_checkout(order, items, vendors, send_email):
     # 3️⃣ Enviar correos
     if send_email:
         try:
@@ -114,10 +117,7 @@ def checkout(
             print(f"⚠️ Error enviando notificaciones: {e}")
 
     # 4️⃣ 🔥 ENVIAR WEBHOOK (INTEGRACIÓN EXTERNA)
-    send_order_webhook(order)
-
-    # 5️⃣ 🔙 Devolver orden
-    return order
+    send_order_webhook(order, items=items, vendors=vendors)
 
 
 # =============================
@@ -125,12 +125,18 @@ def checkout(
 # =============================
 
 
-def send_order_webhook(order):
+def send_order_webhook(order, items=None, vendors=None):
+    """items/vendors ya en memoria (checkout) evitan releer la orden."""
     url = "https://webhook.site/b43f9bc4-5d08-4b71-a250-c5f7e9e818a0"
 
+    if items is None:
+        items = order.items.select_related("product")
+    if vendors is None:
+        vendors = order.vendors.all()
+
     payload = {
         "order_id": order.id,
-        "vendors": [vendor.name for vendor in order.vendors.all()],
+        "vendors": [vendor.name for vendor in vendors],
         "total": order.paid_amount,
         "status": "new",
         "created_at": str(order.created_at),
@@ -140,7 +146,7 @@ def send_order_webhook(order):
                 "qty": item.quantity,
                 "price": item.price
             }
-            for item in order.items.all()  # ✔ Aquí está el fix
+            for item in items
         ]
     }
 
@@ -164,8 +170,8 @@ def send_order_webhook(order):
 def get_allergy_conflicts(profile, product):
     """
     Devuelve una lista de conflictos entre:
-    - Alergias del perfil (profile.allergies)
-    - Ingredientes del producto (product.ingredients)
+    - Alergias del perfil (profile.allergy_mask)
+    - Alérgenos precalculados del producto (product.allergen_mask)
 
     Retorna:
     [
@@ -175,26 +181,7 @@ def get_allergy_conflicts(profile, product):
       },
       ...
     ]
-    """
-    conflicts = []
-
-    # Si el producto no tiene ingredientes cargados, no hacemos nada
-    if not hasattr(product, "ingredients"):
-        return conflicts
 
-    product_ingredients = list(product.ingredients.all())
-    if not product_ingredients:
-        return conflicts
-
-    ingredient_ids = [ing.id for ing in product_ingredients]
-
-    # Recorremos las alergias del usuario
-    for allergy in profile.allergies.prefetch_related("ingredients"):
-        matching = [ing for ing in allergy.ingredients.all() if ing.id in ingredient_ids]
-        if matching:
-            conflicts.append({
-                "allergy": allergy,
-                "ingredients": matching,
-            })
-
-    return conflicts
+    Sin conflicto es una intersección de bits, sin consultas (product/allergens.py).
+    """
+    return allergy_conflicts(profile.allergy_mask, product)
@@ -0,0 +1,108 @@
+"""
+⚠️ Alérgenos precalculados por producto.
+
+Product.allergen_mask = OR de los bits (Allergy.bit) de toda alergia ligada a
+algún ingrediente del producto (ProductIngredient × Allergy.ingredients).
+Profile.allergy_mask guarda los bits de las alergias del usuario, así que el
+chequeo al agregar al carrito es un AND entre dos enteros ya cargados:
+sin consultas salvo que haya conflicto (y solo entonces se buscan los detalles).
+
+Las señales de product/signals.py y vendor/signals.py mantienen ambas máscaras.
+
+Filtro "apto para mí" (exclude_allergens): en vez de un AND por fila se usa
+`allergen_mask IN (máscaras sin conflicto)`, un predicado sobre una columna
+indexada. Las máscaras distintas del catálogo son pocas (combinaciones reales de
+alérgenos) y se cachean en memoria. Si el caché está desactualizado solo puede
+ocultar de más, nunca mostrar un producto con conflicto.
+"""
+import threading
+import time
+
+from vendor.models import Allergy, write_masks
+
+from .models import Product, ProductIngredient
+
+
+INDEX_TTL = 300  # segundos: otros procesos ven máscaras nuevas a lo más con este retraso
+
+
+def recompute_allergen_masks(product_ids):
+    """Recalcula allergen_mask de los productos indicados (una lectura). Devuelve {id: máscara}."""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+
+    masks = dict.fromkeys(product_ids, 0)
+    for product_id, bit in ProductIngredient.objects.filter(
+        product_id__in=product_ids, ingredient__allergies__bit__isnull=False
+    ).values_list("product_id", "ingredient__allergies__bit"):
+        masks[product_id] |= 1 << bit
+    write_masks(Product, "allergen_mask", masks)
+    invalidate()
+    return masks
+
+
+def products_with_ingredients(ingredient_ids):
+    return set(
+        ProductIngredient.objects.filter(ingredient_id__in=ingredient_ids).values_list("product_id", flat=True)
+    )
+
+
+def allergy_conflicts(allergy_mask, product):
+    """
+    Conflictos entre las alergias (máscara del perfil) y el producto:
+    [{"allergy": Allergy, "ingredients": [Ingredient, ...]}].
+    Caso común (sin intersección) → lista vacía sin tocar la base de datos.
+    """
+    hit = (allergy_mask or 0) & (product.allergen_mask or 0)
+    if not hit:
+        return []
+
+    bits = [b for b in range(Allergy.MAX_BITS) if hit >> b & 1]
+    ingredients = {ing.id: ing for ing in product.ingredients.all()}
+
+    conflicts = []
+    for allergy in Allergy.objects.filter(bit__in=bits).prefetch_related("ingredients"):
+        matching = [ingredients[ing.id] for ing in allergy.ingredients.all() if ing.id in ingredients]
+        if matching:
+            conflicts.append({"allergy": allergy, "ingredients": matching})
+    return conflicts
+
+
+# ===========================================================
+#   FILTRO "APTO PARA MÍ"
+# ===========================================================
+_lock = threading.Lock()
+_masks = None
+_built_at = 0.0
+
+
+def invalidate():
+    global _masks
+    with _lock:
+        _masks = None
+
+
+def known_masks():
+    """Máscaras distintas presentes en el catálogo (lectura solo del índice)."""
+    global _masks, _built_at
+    with _lock:
+        if _masks is not None and time.monotonic() - _built_at < INDEX_TTL:
+            return _masks
+
+    masks = frozenset(Product.objects.order_by().values_list("allergen_mask", flat=True).distinct())
+    with _lock:
+        _masks, _built_at = masks, time.monotonic()
+    return masks
+
+
+def safe_masks(allergy_mask):
+    """Máscaras sin ningún bit en común con las alergias (0 = sin alérgenos, siempre apta)."""
+    return sorted({m for m in known_masks() if not m & allergy_mask} | {0})
+
+
+def exclude_allergens(queryset, allergy_mask):
+    """Deja fuera los productos que chocan con `allergy_mask` (Profile.allergy_mask)."""
+    if not allergy_mask:
+        return queryset
+    return queryset.filter(allergen_mask__in=safe_masks(allergy_mask))
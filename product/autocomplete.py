@@ -0,0 +1,156 @@
+"""
+⚡ Autocompletado del buscador del navbar.
+
+Índice en memoria por comuna: un arreglo ordenado de (prefijo-palabra, entrada)
+donde se busca con bisect → O(log n + k) por tecla, sin tocar la BD.
+Cada comuna se reconstruye por separado cuando cambian sus productos.
+"""
+import threading
+import time
+from bisect import bisect_left
+from urllib.parse import urlencode
+
+from django.urls import reverse
+
+from vendor.zones import point_for_comuna, vendors_delivering_to, zoned_vendors
+from .catalog import filter_by_comuna
+from .models import CatalogListing, Category, Ingredient, Product
+from .search import fold, tokenize
+
+
+INDEX_TTL = 300  # segundos: otros procesos ven cambios a lo más con este retraso
+GLOBAL_SCOPE = 0   # sin comuna (los ids de Comuna parten en 1)
+
+KIND_ORDER = {"product": 0, "category": 1, "ingredient": 2}
+
+
+class PrefixIndex:
+    """Arreglo ordenado de claves → entradas (kind, label, url)."""
+
+    def __init__(self, entries):
+        keys = []
+        for pos, (kind, label, url) in enumerate(entries):
+            for token in set(tokenize(label)):
+                keys.append((token, KIND_ORDER[kind], pos))
+        keys.sort()
+
+        self.entries = entries
+        self.entry_tokens = [frozenset(tokenize(label)) for _, label, _ in entries]
+        self.keys = [k[0] for k in keys]
+        self.positions = [k[2] for k in keys]
+        self.built_at = time.monotonic()
+
+    def lookup(self, prefix, limit=8):
+        prefix = fold(prefix).strip()
+        if not prefix:
+            return []
+
+        words = tokenize(prefix)
+        if not words:
+            return []
+        head, rest = words[-1], words[:-1]
+
+        results = []
+        seen = set()
+        i = bisect_left(self.keys, head)
+        while i < len(self.keys) and self.keys[i].startswith(head):
+            pos = self.positions[i]
+            i += 1
+            if pos in seen:
+                continue
+            # Las palabras anteriores ya escritas deben estar en la etiqueta
+            if rest and not all(w in self.entry_tokens[pos] for w in rest):
+                continue
+            kind, label, url = self.entries[pos]
+            seen.add(pos)
+            results.append({"type": kind, "label": label, "url": url})
+            if len(results) >= limit:
+                break
+        return results
+
+
+def _build_entries(comuna_id):
+    products = Product.objects.all()
+    if comuna_id:
+        products = filter_by_comuna(products, comuna_id)
+
+    rows = products.values_list("title", "slug", "category__slug")
+    entries = [
+        ("product", title, reverse("product:product", args=[cat_slug, slug]))
+        for title, slug, cat_slug in rows
+    ]
+
+    product_ids = products.values("id")
+    categories = Category.objects.filter(products__in=product_ids).distinct()
+    entries += [
+        ("category", c.title, reverse("product:category", args=[c.slug]))
+        for c in categories
+    ]
+
+    search_url = reverse("product:search")
+    ingredients = Ingredient.objects.filter(products__in=product_ids).distinct()
+    entries += [
+        ("ingredient", i.name, f"{search_url}?{urlencode({'query': i.name})}")
+        for i in ingredients
+    ]
+    return entries
+
+
+_scopes = {}           # comuna_id → PrefixIndex
+_dirty = set()
+_lock = threading.Lock()
+
+
+def get_index(comuna_id=None):
+    key = comuna_id or GLOBAL_SCOPE
+    index = _scopes.get(key)
+
+    stale = (
+        index is None
+        or key in _dirty
+        or time.monotonic() - index.built_at > INDEX_TTL
+    )
+    if stale:
+        # Limpia antes de leer la BD: un invalidate() durante la construcción no se pierde
+        with _lock:
+            _dirty.discard(key)
+        index = PrefixIndex(_build_entries(key))
+        with _lock:
+            _scopes[key] = index
+    return index
+
+
+def invalidate(comuna_ids=None):
+    """
+    Marca para reconstruir solo las comunas afectadas (y el índice global).
+    Sin argumentos invalida todo (categorías/ingredientes renombrados, borrados).
+    """
+    with _lock:
+        if comuna_ids is None:
+            _dirty.update(_scopes)
+            return
+        _dirty.add(GLOBAL_SCOPE)
+        _dirty.update(pk for pk in comuna_ids if pk)
+
+
+def invalidate_products(product_ids):
+    """
+    Comunas donde aparecen estos productos: la de su listado y, si el local reparte
+    por zonas, las comunas ya armadas cuyo centroide cae en ellas (filter_by_comuna).
+    """
+    rows = list(CatalogListing.objects.filter(product_id__in=list(product_ids)).values_list("vendor_id", "comuna_id"))
+    comuna_ids = {comuna_id for _, comuna_id in rows}
+
+    zoned = {vendor_id for vendor_id, _ in rows} & zoned_vendors()
+    if zoned:
+        with _lock:
+            built = [key for key in _scopes if key != GLOBAL_SCOPE and key not in comuna_ids]
+        comuna_ids.update(
+            comuna_id for comuna_id in built
+            if zoned & vendors_delivering_to(point_for_comuna(comuna_id))
+        )
+    invalidate(comuna_ids)
+
+
+def suggest(query, comuna_id=None, limit=8):
+    return get_index(comuna_id).lookup(query, limit=limit)
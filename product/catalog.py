@@ -0,0 +1,207 @@
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+from django.core import signing
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q, prefetch_related_objects
+from django.utils import timezone
+
+from vendor.zones import delivery_scope, point_for_comuna
+from .models import CatalogListing, Product
+
+
+# ===========================================================
+#   CONSTRUCCIÓN DEL READ MODEL
+# ===========================================================
+def _build_listing(product):
+    profile = getattr(product.vendor.created_by, "profile", None)
+
+    try:
+        offer = product.offer
+    except ObjectDoesNotExist:
+        offer = None
+
+    return CatalogListing(
+        product_id=product.id,
+        vendor_id=product.vendor_id,
+        category_id=product.category_id,
+        country_id=product.vendor.country_id or getattr(profile, "country_id", None),
+        comuna_id=product.vendor.comuna_id,
+        has_offer=bool(offer and offer.is_active),
+        offer_starts_at=offer.start_date if offer else None,
+        offer_ends_at=offer.end_date if offer else None,
+        added_date=product.added_date,
+    )
+
+
+def refresh_listings(product_ids, batch_size=500):
+    """Recalcula las filas de CatalogListing de los productos indicados."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return 0
+
+    written = 0
+    for start in range(0, len(product_ids), batch_size):
+        chunk = product_ids[start:start + batch_size]
+
+        products = list(
+            Product.objects.filter(pk__in=chunk)
+            .select_related("vendor__created_by__profile", "offer")
+        )
+        rows = [_build_listing(p) for p in products]
+
+        with transaction.atomic():
+            CatalogListing.objects.filter(product_id__in=chunk).delete()
+            CatalogListing.objects.bulk_create(rows, batch_size=batch_size)
+
+        written += len(rows)
+
+    return written
+
+
+def refresh_vendor_listings(vendor_ids):
+    ids = Product.objects.filter(vendor_id__in=vendor_ids).values_list("id", flat=True)
+    return refresh_listings(ids)
+
+
+def rebuild_catalog(batch_size=500):
+    """Reconstrucción completa (comando rebuild_catalog)."""
+    CatalogListing.objects.exclude(
+        product_id__in=Product.objects.values("id")
+    ).delete()
+    ids = Product.objects.order_by("id").values_list("id", flat=True)
+    return refresh_listings(ids, batch_size=batch_size)
+
+
+# ===========================================================
+#   FILTROS PARA LOS LISTADOS
+# ===========================================================
+def filter_by_country(products, country_id):
+    return products.filter(listing__country_id=country_id)
+
+
+def filter_by_delivery(products, point):
+    """
+    Productos de locales que reparten en `point` (zonas de reparto, vendor/zones.py):
+    los de su comuna (entero indexado) menos los que tienen zonas que no lo cubren,
+    más los de otras comunas cuyas zonas sí lo cubren.
+    """
+    if point is None:
+        return products.none()
+
+    comuna_id, excluded, hits = delivery_scope(point)
+    q = Q(listing__comuna_id=comuna_id) if comuna_id else Q(pk__in=[])
+    if excluded:
+        q &= ~Q(vendor_id__in=excluded)
+    if hits:
+        q |= Q(vendor_id__in=hits)
+    return products.filter(q)
+
+
+def filter_by_comuna(products, comuna):
+    """Comuna (id, código o nombre) → reparto en su centroide."""
+    return filter_by_delivery(products, point_for_comuna(comuna))
+
+
+def current_offer_q(now=None):
+    now = now or timezone.now()
+    return Q(
+        listing__has_offer=True,
+        listing__offer_starts_at__lte=now,
+        listing__offer_ends_at__gte=now,
+    )
+
+
+def order_by_offer(products, *extra_ordering, now=None):
+    """Primero las ofertas vigentes, luego `extra_ordering` y por último id (orden estable)."""
+    return products.annotate(
+        tiene_oferta=ExpressionWrapper(current_offer_q(now), output_field=BooleanField())
+    ).order_by("-tiene_oferta", *extra_ordering, "id")
+
+
+# ===========================================================
+#   PAGINACIÓN POR CURSOR (KEYSET)
+# ===========================================================
+PAGE_SIZE = 24
+COUNT_CAP = 1000
+CURSOR_SALT = "product.catalog.cursor"
+
+KeysetPage = namedtuple("KeysetPage", "items next_cursor now")
+
+
+def encode_cursor(now, product, rank_field=None):
+    """
+    Cursor opaco con la última fila de la página: (tiene_oferta, [rank], id).
+    Incluye el instante `now` para que la vigencia de ofertas no cambie entre páginas.
+    """
+    payload = {
+        "t": now.timestamp(),
+        "o": int(product.tiene_oferta),
+        "i": product.id,
+    }
+    if rank_field:
+        payload["r"] = getattr(product, rank_field)
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    """Cursor → dict, o None si falta o fue manipulado (se vuelve a la primera página)."""
+    if not token:
+        return None
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT)
+        payload["t"] = datetime.fromtimestamp(payload["t"], tz=dt_timezone.utc)
+        return payload
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def _after_cursor_q(cursor, rank_field):
+    after = Q(id__gt=cursor["i"])
+    if rank_field and "r" in cursor:
+        after = Q(**{f"{rank_field}__gt": cursor["r"]}) | (Q(**{rank_field: cursor["r"]}) & after)
+
+    # Orden: -tiene_oferta → después de una oferta vienen las demás ofertas y luego todo lo que no es oferta
+    if cursor["o"]:
+        return Q(tiene_oferta=False) | (Q(tiene_oferta=True) & after)
+    return Q(tiene_oferta=False) & after
+
+
+def keyset_page(products, cursor=None, page_size=PAGE_SIZE, rank_field=None):
+    """
+    Página de `products` ordenada por (-tiene_oferta, [rank_field], id) a partir de `cursor`.
+    Costo constante: WHERE sobre la última fila + LIMIT, sin OFFSET ni COUNT.
+    """
+    cursor = decode_cursor(cursor)
+    now = cursor["t"] if cursor else timezone.now()
+
+    extra = (rank_field,) if rank_field else ()
+    products = order_by_offer(products, *extra, now=now)
+    if cursor:
+        products = products.filter(_after_cursor_q(cursor, rank_field))
+
+    items = list(
+        products.select_related("category", "vendor__created_by__profile__country")[:page_size + 1]
+    )
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    # Ofertas de toda la página en una consulta (badges y precios de las tarjetas)
+    prefetch_related_objects(items, "offer")
+
+    next_cursor = encode_cursor(now, items[-1], rank_field) if has_more else None
+    return KeysetPage(items, next_cursor, now)
+
+
+def capped_counts(products, now=None, cap=COUNT_CAP):
+    """
+    Conteo acotado para analytics: (total, con_oferta, exacto).
+    Lee a lo más `cap` + 1 filas en una sola consulta; sobre el tope el número es aproximado.
+    """
+    rows = list(
+        order_by_offer(products, now=now).values_list("tiene_oferta", flat=True)[:cap + 1]
+    )
+    exact = len(rows) <= cap
+    rows = rows[:cap]
+    return len(rows), sum(1 for o in rows if o), exact
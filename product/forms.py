@@ -1,7 +1,24 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 from django.forms.fields import IntegerField
 from django.forms.forms import Form
 
+from .images import normalize_upload
+
 
 class AddToCartForm(forms.Form):
-    quantity = forms.IntegerField()
\ No newline at end of file
+    quantity = forms.IntegerField()
+
+
+class NormalizedImageFormMixin:
+    """
+    Para ModelForms de Product: normaliza la imagen subida antes de guardarla
+    (orientación, sin EXIF, tamaño máximo, re-encode) y reutiliza el archivo si
+    ya se subió el mismo contenido. Ver product/images.py.
+    """
+
+    def clean_image(self):
+        image = self.cleaned_data.get("image")
+        if isinstance(image, UploadedFile):
+            return normalize_upload(image)
+        return image
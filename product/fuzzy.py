@@ -0,0 +1,153 @@
+"""
+🔤 Corrección de errores de tipeo en la búsqueda ("peperoni" → "pepperoni").
+
+Vocabulario = palabras de títulos de productos + nombres de ingredientes.
+Un índice de trigramas (precalculado en memoria) entrega pocos candidatos por
+palabra y solo a esos se les calcula la distancia de edición.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+
+from .models import Ingredient, Product
+from .search import STOPWORDS, stem, tokenize
+
+
+MAX_CANDIDATES = 30
+INDEX_TTL = 300  # segundos: otros procesos ven cambios a lo más con este retraso
+
+
+def trigrams(word):
+    padded = f"$${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def levenshtein(a, b, max_dist):
+    """Distancia de edición con corte temprano (devuelve max_dist + 1 si se pasa)."""
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if min(current) > max_dist:
+            return max_dist + 1
+        previous = current
+    return previous[-1]
+
+
+def allowed_distance(word):
+    if len(word) <= 4:
+        return 1
+    if len(word) <= 7:
+        return 2
+    return 3
+
+
+class TrigramIndex:
+    def __init__(self, words=None):
+        self._lock = threading.RLock()
+        self.built_at = 0
+        self.load(words or Counter())
+
+    def load(self, words):
+        """words = Counter(palabra → frecuencia en el catálogo)."""
+        grams = defaultdict(set)
+        for word in words:
+            for gram in trigrams(word):
+                grams[gram].add(word)
+        stems = {stem(word) for word in words}
+        with self._lock:
+            self.words = words
+            self.stems = stems
+            self.grams = grams
+            self.built_at = time.monotonic()
+
+    def correct(self, word):
+        """Palabra más parecida del vocabulario, o None si no hay una razonable."""
+        with self._lock:
+            # Variante válida (plural, género): la búsqueda ya la encuentra
+            if word in self.words or stem(word) in self.stems:
+                return word
+
+            shared = Counter()
+            for gram in trigrams(word):
+                for candidate in self.grams.get(gram, ()):
+                    shared[candidate] += 1
+
+            max_dist = allowed_distance(word)
+            best = None
+            for candidate, _ in shared.most_common(MAX_CANDIDATES):
+                dist = levenshtein(word, candidate, max_dist)
+                if dist > max_dist:
+                    continue
+                key = (dist, -self.words[candidate], candidate)
+                if best is None or key < best[0]:
+                    best = (key, candidate)
+
+            return best[1] if best else None
+
+
+def _catalog_words():
+    words = Counter()
+    names = list(Product.objects.values_list("title", flat=True))
+    names += list(Ingredient.objects.values_list("name", flat=True))
+    for name in names:
+        for token in tokenize(name):
+            if len(token) > 2 and token not in STOPWORDS:
+                words[token] += 1
+    return words
+
+
+_index = None
+_dirty = True
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index, _dirty
+    with _index_lock:
+        expired = _index is None or time.monotonic() - _index.built_at > INDEX_TTL
+        if _dirty or expired:
+            words = _catalog_words()
+            if _index is None:
+                _index = TrigramIndex(words)
+            else:
+                _index.load(words)
+            _dirty = False
+    return _index
+
+
+def invalidate():
+    """Se llama desde señales cuando cambian títulos o ingredientes."""
+    global _dirty
+    _dirty = True
+
+
+def suggest(query):
+    """
+    Devuelve la consulta corregida ("did you mean") o None si no hay cambios.
+    Solo se tocan palabras que no existen en el vocabulario del catálogo.
+    """
+    index = get_index()
+    changed = False
+    corrected = []
+
+    for token in tokenize(query):
+        if len(token) <= 2 or token in STOPWORDS:
+            corrected.append(token)
+            continue
+        fixed = index.correct(token)
+        if fixed and fixed != token:
+            changed = True
+            corrected.append(fixed)
+        else:
+            corrected.append(token)
+
+    return " ".join(corrected) if changed else None
@@ -0,0 +1,257 @@
+"""
+🖼️ Derivados de imágenes de producto (varios tamaños + WebP).
+
+- Se generan FUERA del request: al subir una imagen (on_commit → hilo en segundo
+  plano) o con `python manage.py build_image_derivatives` (pool de procesos).
+- Los nombres llevan el hash del contenido original:
+      derivatives/<hash>/<ancho>.jpg  y  derivatives/<hash>/<ancho>.webp
+  → la misma imagen nunca se procesa dos veces y los archivos se pueden cachear
+  para siempre.
+- El resultado queda en Product.image_derivatives y los templates solo leen
+  `srcset` ya armados (nunca abren la imagen).
+- Al subir, el original se normaliza (normalize_image): orientación EXIF aplicada,
+  metadatos eliminados, lado mayor acotado y re-encode dentro de un presupuesto
+  de bytes. Subidas idénticas reutilizan el mismo archivo (hash del contenido).
+"""
+import hashlib
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps
+
+from .models import Product
+
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (320, 640, 1280)
+FORMATS = {
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "webp", {"quality": 78, "method": 4}),
+}
+THUMBNAIL_WIDTH = 320
+DERIVATIVES_DIR = "derivatives"
+
+# Originales normalizados
+MAX_DIMENSION = 2048
+MAX_ORIGINAL_BYTES = 600 * 1024
+ORIGINAL_QUALITIES = (85, 78, 70, 62)   # se baja la calidad hasta entrar en el presupuesto
+UPLOADS_DIR = "uploads"
+_NORMALIZED_RE = re.compile(rf"{UPLOADS_DIR}/[0-9a-f]{{16}}\.(jpg|webp)")
+
+
+# ===========================================================
+#   PROCESAMIENTO (puro: bytes → bytes, apto para procesos)
+# ===========================================================
+def content_hash(data):
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def render_derivatives(data):
+    """
+    Bytes de la imagen original → [(formato, ancho, alto, bytes)].
+    No agranda: se generan los anchos menores al original y, si el original
+    es más chico que el ancho máximo, también su tamaño real.
+    """
+    img = Image.open(BytesIO(data))
+    img.load()
+
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    widths = [w for w in WIDTHS if w < img.width]
+    if img.width <= WIDTHS[-1]:
+        widths.append(img.width)
+
+    results = []
+    for width in widths:
+        height = max(1, round(img.height * width / img.width))
+        resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+        for fmt, (pil_format, _, options) in FORMATS.items():
+            out = BytesIO()
+            resized.save(out, pil_format, **options)
+            results.append((fmt, width, height, out.getvalue()))
+    return results
+
+
+def derivative_name(digest, fmt, width):
+    return f"{DERIVATIVES_DIR}/{digest}/{width}.{FORMATS[fmt][1]}"
+
+
+def read_source(product):
+    with product.image.open("rb") as f:
+        return f.read()
+
+
+# ===========================================================
+#   NORMALIZACIÓN DEL ORIGINAL (al subir)
+# ===========================================================
+def normalize_image(data):
+    """
+    Bytes subidos → (bytes normalizados, extensión).
+    Aplica la orientación EXIF y la descarta junto al resto de metadatos (GPS del
+    teléfono), limita el lado mayor a MAX_DIMENSION y re-encoda como JPEG
+    progresivo (o WebP si tiene transparencia) dentro de MAX_ORIGINAL_BYTES.
+    """
+    img = Image.open(BytesIO(data))
+    img = ImageOps.exif_transpose(img)
+
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if has_alpha:
+        img = img.convert("RGBA")
+        pil_format, ext, options = "WEBP", "webp", {"method": 4}
+    else:
+        img = img.convert("RGB")
+        pil_format, ext, options = "JPEG", "jpg", {"optimize": True, "progressive": True}
+
+    img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS)
+
+    payload = b""
+    for quality in ORIGINAL_QUALITIES:
+        out = BytesIO()
+        img.save(out, pil_format, quality=quality, **options)  # sin exif= → sin metadatos
+        payload = out.getvalue()
+        if len(payload) <= MAX_ORIGINAL_BYTES:
+            break
+    return payload, ext
+
+
+def normalized_name(digest, ext):
+    return f"{UPLOADS_DIR}/{digest}.{ext}"
+
+
+def is_normalized(name):
+    """Los originales normalizados se llaman uploads/<hash>.<ext> (no se re-procesan)."""
+    return bool(_NORMALIZED_RE.fullmatch(name or ""))
+
+
+def find_normalized(digest):
+    """Nombre ya guardado para este contenido (dedup), o None."""
+    for ext in ("jpg", "webp"):
+        name = normalized_name(digest, ext)
+        if default_storage.exists(name):
+            return name
+    return None
+
+
+def normalize_upload(uploaded):
+    """
+    Archivo subido → nombre en el storage (str) si el mismo contenido ya existe,
+    o ContentFile normalizado listo para que el ImageField lo guarde.
+    """
+    uploaded.seek(0)
+    data = uploaded.read()
+    digest = content_hash(data)
+
+    existing = find_normalized(digest)
+    if existing:
+        return existing
+
+    payload, ext = normalize_image(data)
+    return ContentFile(payload, name=f"{digest}.{ext}")
+
+
+# ===========================================================
+#   GUARDAR Y REGISTRAR EN EL PRODUCTO
+# ===========================================================
+def store_derivatives(product_id, source_name, data, rendered=None):
+    """
+    Escribe los archivos (si no existen) y registra el manifiesto en el producto.
+    Solo actualiza si la imagen no cambió mientras se procesaba.
+    """
+    digest = content_hash(data)
+    if rendered is None:
+        rendered = render_derivatives(data)
+
+    manifest = {"source": source_name, "hash": digest}
+    for fmt, width, height, payload in rendered:
+        name = derivative_name(digest, fmt, width)
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(payload))
+        manifest.setdefault(fmt, {})[str(width)] = name
+        manifest["ratio"] = round(height / width, 4)
+
+    thumb = manifest["jpeg"].get(str(THUMBNAIL_WIDTH)) or next(iter(manifest["jpeg"].values()))
+
+    # UPDATE directo: sin save() → sin señales ni carreras con otra edición del producto
+    updated = Product.objects.filter(pk=product_id, image=source_name).update(
+        image_derivatives=manifest,
+        thumbnail=thumb,
+    )
+    return manifest if updated else None
+
+
+def needs_derivatives(product):
+    if not product.image:
+        return False
+    manifest = product.image_derivatives or {}
+    return manifest.get("source") != product.image.name
+
+
+def generate_for_product(product_id, force=False):
+    """Genera y registra los derivados de un producto (síncrono)."""
+    product = Product.objects.filter(pk=product_id).first()
+    if not product or not product.image:
+        return None
+    if not force and not needs_derivatives(product):
+        return product.image_derivatives
+    return store_derivatives(product.id, product.image.name, read_source(product))
+
+
+def clear_derivatives(product_id):
+    """La imagen se quitó: se olvida el manifiesto (los archivos pueden estar compartidos)."""
+    Product.objects.filter(pk=product_id).update(image_derivatives=None, thumbnail="")
+
+
+# ===========================================================
+#   EJECUCIÓN EN SEGUNDO PLANO
+# ===========================================================
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, "PRODUCT_IMAGE_WORKERS", 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="img-derivatives")
+    return _executor
+
+
+def _run(product_id):
+    close_old_connections()
+    try:
+        generate_for_product(product_id)
+    except Exception:
+        logger.exception("No se pudieron generar los derivados del producto %s", product_id)
+    finally:
+        with _executor_lock:
+            _pending.discard(product_id)
+        connection.close()  # cada hilo tiene su propia conexión
+
+
+def schedule_derivatives(product_id):
+    """
+    Encola la generación después del commit (se llama desde señales).
+    Con PRODUCT_IMAGE_ASYNC = False se ejecuta en el mismo hilo (tests/scripts).
+    """
+    def submit():
+        if not getattr(settings, "PRODUCT_IMAGE_ASYNC", True):
+            generate_for_product(product_id)
+            return
+        with _executor_lock:
+            if product_id in _pending:
+                return
+            _pending.add(product_id)
+        _get_executor().submit(_run, product_id)
+
+    transaction.on_commit(submit)
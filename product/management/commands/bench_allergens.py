@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from product.allergens import exclude_allergens, invalidate, recompute_allergen_masks
+from product.models import Category, Ingredient, Product, ProductIngredient
+from vendor.models import Allergy, Profile, Vendor
+
+
+def legacy_safe_products(profile, queryset, limit):
+    """Versión anterior: revisar producto por producto (ingredientes × alergias), solo para comparar."""
+    allergen_ids = set(
+        Ingredient.objects.filter(allergies__profiles=profile).values_list("id", flat=True)
+    )
+    safe = []
+    for product in queryset.prefetch_related("ingredients"):
+        if not any(ing.id in allergen_ids for ing in product.ingredients.all()):
+            safe.append(product)
+            if len(safe) == limit:
+                break
+    return safe
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark del filtro 'apto para mí': chequeo por producto en Python (antes) vs "
+        "allergen_mask IN (...) (ahora). Los datos se crean y se descartan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=5_000)
+        parser.add_argument("--allergies", type=int, default=40)
+        parser.add_argument("--runs", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            profile, category = self._seed(options["products"], options["allergies"])
+
+            scenarios = {
+                "home": lambda: Product.objects.all(),
+                "categoría": lambda: Product.objects.filter(category=category),
+            }
+
+            self.stdout.write(f"{'escenario':<12} | {'antes (ms)':>10} | {'ahora (ms)':>10} | {'iguales':>7}")
+            for name, base in scenarios.items():
+                old_ms, old_ids = self._measure(
+                    lambda: legacy_safe_products(profile, base().order_by("-id"), 24), options["runs"]
+                )
+                new_ms, new_ids = self._measure(
+                    lambda: exclude_allergens(base(), profile.allergy_mask).order_by("-id")[:24], options["runs"]
+                )
+                self.stdout.write(
+                    f"{name:<12} | {old_ms:>10.1f} | {new_ms:>10.1f} | {'sí' if old_ids == new_ids else 'no':>7}"
+                )
+
+            transaction.set_rollback(True)
+        invalidate()
+
+        self.stdout.write(self.style.SUCCESS("✔ Benchmark terminado (datos descartados)."))
+
+    def _measure(self, make_qs, runs):
+        timings = []
+        ids = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            ids = [p.id for p in make_qs()]
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), ids
+
+    def _seed(self, total, n_allergies):
+        rng = random.Random(11)
+
+        ingredients = [Ingredient.objects.create(name=f"Bench ingrediente {i}") for i in range(120)]
+        allergies = [Allergy.objects.create(name=f"Bench alergia {i}") for i in range(n_allergies)]
+        for allergy in allergies:
+            allergy.ingredients.add(*rng.sample(ingredients, 2))
+
+        owner = User.objects.create(username="bench_allergens_vendor")
+        vendor = Vendor.objects.create(name="Bench alérgenos", created_by=owner)
+        category = Category.objects.create(title="Bench alérgenos", slug="bench-alergenos")
+        other = Category.objects.create(title="Bench alérgenos 2", slug="bench-alergenos-2")
+
+        Product.objects.bulk_create([
+            Product(
+                category=category if i % 3 else other,
+                vendor=vendor,
+                title=f"Pizza {i}",
+                slug=f"bench-alergenos-{i}",
+                price=10000,
+            )
+            for i in range(total)
+        ], batch_size=1000)
+        ids = list(Product.objects.filter(vendor=vendor).order_by("id").values_list("id", flat=True))
+
+        ProductIngredient.objects.bulk_create([
+            ProductIngredient(product_id=pid, ingredient=ing)
+            for pid in ids
+            for ing in rng.sample(ingredients, rng.randint(2, 6))
+        ], batch_size=2000)
+        for start in range(0, len(ids), 1000):
+            recompute_allergen_masks(ids[start:start + 1000])
+
+        user = User.objects.create(username="bench_allergens_customer")
+        profile = Profile.objects.create(user=user, lat=0, lng=0)  # con coords → sin geocoding
+        profile.allergies.set(rng.sample(allergies, 3))
+        profile.refresh_from_db()
+        return profile, category
@@ -0,0 +1,68 @@
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from product import autocomplete
+from product.views import autocomplete as autocomplete_view
+
+
+WORDS = [
+    "napolitana", "pepperoni", "mozzarella", "champiñones", "jamón", "piña",
+    "aceitunas", "tomate", "albahaca", "pollo", "tocino", "cebolla", "pimiento",
+    "vegana", "cuatro", "quesos", "chorizo", "salame", "rúcula", "hawaiana",
+    "española", "mexicana", "picante", "bbq", "trufa", "margarita", "carbonara",
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark del autocompletado: latencia p50/p99 de la vista bajo carga concurrente."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=20_000)
+        parser.add_argument("--requests", type=int, default=5_000)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--target-p99-ms", type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+
+        # Índice sintético (sin BD) instalado como índice global
+        entries = [
+            ("product", f"Pizza {' '.join(rng.sample(WORDS, 2)).title()} {i}", f"/product/pizzas/p-{i}/")
+            for i in range(options["products"])
+        ]
+        entries += [("ingredient", w.title(), f"/product/search?query={w}") for w in WORDS]
+        autocomplete._scopes[autocomplete.GLOBAL_SCOPE] = autocomplete.PrefixIndex(entries)
+
+        factory = RequestFactory()
+        prefixes = [w[:n] for w in WORDS for n in (2, 3, 5)] + ["pizza nap", "pizza pep"]
+
+        def one_request(i):
+            request = factory.get("/product/autocomplete/", {"q": prefixes[i % len(prefixes)]})
+            request.user = AnonymousUser()
+            request.session = {}
+            t0 = time.perf_counter()
+            autocomplete_view(request)
+            return (time.perf_counter() - t0) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            latencies = sorted(pool.map(one_request, range(options["requests"])))
+        wall = time.perf_counter() - start
+
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.stdout.write(
+            f"{options['products']} productos | {options['threads']} hilos | "
+            f"{options['requests'] / wall:.0f} req/s | p50 {statistics.median(latencies):.2f}ms | "
+            f"p99 {p99:.2f}ms (objetivo {options['target_p99_ms']:.0f}ms)"
+        )
+
+        if p99 > options["target_p99_ms"]:
+            self.stdout.write(self.style.ERROR("✘ p99 sobre el objetivo"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✔ p99 dentro del objetivo"))
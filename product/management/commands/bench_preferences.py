@@ -0,0 +1,122 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, When
+
+from product.models import Category, Product
+from product.utils import aplicar_preferencias
+from vendor.models import Preference, Profile, Vendor, recompute_preference_masks
+
+
+def legacy_aplicar_preferencias(user, queryset, solo_pref=False):
+    """Versión anterior (JOIN con la M2M + COUNT + DISTINCT), solo para comparar."""
+    profile = getattr(user, "profile", None)
+    if not profile or not profile.preferences.exists():
+        return queryset
+
+    prefs = profile.preferences.all()
+    match = Count(Case(When(preferences__in=prefs, then=1), output_field=IntegerField()))
+    if solo_pref:
+        queryset = queryset.filter(preferences__in=prefs)
+    return queryset.annotate(match_pref=match).order_by("-match_pref", "-id").distinct()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de preferencias: JOIN con la M2M (antes) vs bitmask (ahora) en home, "
+        "categoría y búsqueda. Los datos se crean y se descartan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=20_000)
+        parser.add_argument("--runs", type=int, default=7)
+        parser.add_argument("--explain", action="store_true", help="Mostrar los planes de consulta")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user, category, ranked_ids = self._seed(options["products"])
+
+            scenarios = {
+                "home": lambda: Product.objects.all(),
+                "categoría": lambda: Product.objects.filter(category=category),
+                "búsqueda": lambda: Product.objects.filter(id__in=ranked_ids),
+            }
+
+            self.stdout.write(
+                f"{'escenario':<12} | {'modo':<10} | {'antes (ms)':>10} | {'ahora (ms)':>10} | {'iguales':>7}"
+            )
+            for name, base in scenarios.items():
+                for solo_pref in (False, True):
+                    old_qs = lambda: legacy_aplicar_preferencias(user, base(), solo_pref)[:24]
+                    new_qs = lambda: aplicar_preferencias(user, base(), solo_pref)[:24]
+
+                    old_ms, old_ids = self._measure(old_qs, options["runs"])
+                    new_ms, new_ids = self._measure(new_qs, options["runs"])
+
+                    mode = "solo_pref" if solo_pref else "orden"
+                    self.stdout.write(
+                        f"{name:<12} | {mode:<10} | {old_ms:>10.1f} | {new_ms:>10.1f} | "
+                        f"{'sí' if old_ids == new_ids else 'no':>7}"
+                    )
+
+                    if options["explain"]:
+                        self.stdout.write(f"\n--- {name} / {mode} · antes ---\n{old_qs().explain()}")
+                        self.stdout.write(f"--- {name} / {mode} · ahora ---\n{new_qs().explain()}\n")
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("✔ Benchmark terminado (datos descartados)."))
+
+    def _measure(self, make_qs, runs):
+        timings = []
+        ids = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            ids = [p.id for p in make_qs()]
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), ids
+
+    def _seed(self, total):
+        rng = random.Random(7)
+
+        prefs = list(Preference.objects.all())
+        for i in range(len(prefs), 8):
+            prefs.append(Preference.objects.create(name=f"Bench pref {i}", slug=f"bench-pref-{i}"))
+
+        owner = User.objects.create(username="bench_prefs_vendor")
+        vendor = Vendor.objects.create(name="Bench prefs", created_by=owner)
+        category = Category.objects.create(title="Bench prefs", slug="bench-prefs")
+        other = Category.objects.create(title="Bench prefs 2", slug="bench-prefs-2")
+
+        Product.objects.bulk_create([
+            Product(
+                category=category if i % 3 else other,
+                vendor=vendor,
+                title=f"Pizza {i}",
+                slug=f"bench-prefs-{i}",
+                price=10000,
+            )
+            for i in range(total)
+        ], batch_size=1000)
+        ids = list(Product.objects.filter(vendor=vendor).order_by("id").values_list("id", flat=True))
+
+        through = Product.preferences.through
+        through.objects.bulk_create([
+            through(product_id=pid, preference_id=pref.id)
+            for pid in ids
+            for pref in rng.sample(prefs, rng.randint(0, 3))
+        ], batch_size=2000)
+        for start in range(0, len(ids), 1000):
+            recompute_preference_masks(Product, ids[start:start + 1000])
+
+        user = User.objects.create(username="bench_prefs_customer")
+        profile = Profile.objects.create(user=user, lat=0, lng=0)  # con coords → sin geocoding
+        profile.preferences.set(prefs[:2])
+        user = User.objects.select_related("profile").get(pk=user.pk)
+
+        ranked_ids = rng.sample(ids, min(500, len(ids)))
+        return user, category, ranked_ids
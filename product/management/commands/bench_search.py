@@ -0,0 +1,72 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from product.search import MemorySearchBackend, SQLiteFTSBackend, analyze
+
+
+WORDS = [
+    "napolitana", "pepperoni", "mozzarella", "champiñones", "jamón", "piña",
+    "aceitunas", "tomate", "albahaca", "pollo", "tocino", "cebolla", "pimiento",
+    "vegana", "queso", "azul", "parmesano", "chorizo", "salame", "rúcula",
+    "orégano", "picante", "bbq", "trufa", "masa", "delgada", "tradicional",
+    "familiar", "mediana", "individual", "clásica", "especial", "casera",
+]
+
+QUERIES = [
+    "napolitana", "Napolitánas", "pizza vegana", "champiñon", "jamon pina",
+    "queso azul", "pollo bbq", "pepperoni picante", "masa delgada", "trufa",
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark de latencia de la búsqueda full-text con N productos sintéticos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        total = options["products"]
+
+        docs = {}
+        for pid in range(1, total + 1):
+            title = " ".join(rng.sample(WORDS, 2))
+            description = " ".join(rng.choices(WORDS, k=12))
+            docs[pid] = " ".join(analyze(f"{title} {title} {title} {description}"))
+
+        backends = [MemorySearchBackend(autoload=False)]
+        if connection.vendor == "sqlite":
+            backends.append(SQLiteFTSBackend(table="product_search_fts_bench"))
+
+        for backend in backends:
+            with transaction.atomic():
+                start = time.perf_counter()
+                backend.index(docs)
+                build = time.perf_counter() - start
+
+                latencies = []
+                for i in range(options["queries"]):
+                    terms = analyze(QUERIES[i % len(QUERIES)])
+                    t0 = time.perf_counter()
+                    backend.search(terms, 50)
+                    latencies.append((time.perf_counter() - t0) * 1000)
+
+                latencies.sort()
+                p99 = latencies[int(len(latencies) * 0.99) - 1]
+                self.stdout.write(
+                    f"{backend.name:>7} | {total} productos | indexado {build:.1f}s | "
+                    f"p50 {statistics.median(latencies):.2f}ms | p99 {p99:.2f}ms"
+                )
+                transaction.set_rollback(True)
+
+            if isinstance(backend, SQLiteFTSBackend):
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE IF EXISTS {backend.table}")
+
+        self.stdout.write(self.style.SUCCESS("✔ Benchmark terminado."))
@@ -0,0 +1,66 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from product.images import read_source, needs_derivatives, render_derivatives, store_derivatives
+from product.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los derivados (tamaños + WebP) de las imágenes de producto que no los tengan. "
+        "El encode corre en un pool de procesos; lectura, escritura y BD quedan en el proceso principal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--force", action="store_true", help="Regenerar aunque ya existan")
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image="").exclude(image__isnull=True).order_by("id")
+        pending = [p for p in products.only("id", "image", "image_derivatives")
+                   if options["force"] or needs_derivatives(p)]
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS("✅ Todas las imágenes tienen sus derivados."))
+            return
+
+        self.stdout.write(self.style.WARNING(
+            f"⏳ Procesando {len(pending)} imágenes con {options['workers']} procesos..."
+        ))
+
+        start = time.perf_counter()
+        done = failed = 0
+        batch_size = options["batch_size"]
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            for offset in range(0, len(pending), batch_size):
+                batch = []
+                for product in pending[offset:offset + batch_size]:
+                    try:
+                        batch.append((product, read_source(product)))
+                    except OSError as e:
+                        failed += 1
+                        self.stderr.write(f"⚠️ Producto {product.id}: no se pudo leer ({e})")
+
+                futures = [pool.submit(render_derivatives, data) for _, data in batch]
+                for (product, data), future in zip(batch, futures):
+                    try:
+                        rendered = future.result()
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f"⚠️ Producto {product.id}: imagen inválida ({e})")
+                        continue
+                    store_derivatives(product.id, product.image.name, data, rendered=rendered)
+                    done += 1
+
+                self.stdout.write(f"   {done + failed}/{len(pending)}")
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {done} imágenes procesadas en {elapsed:.1f}s ({failed} con error)"
+        ))
+
@@ -1,6 +1,11 @@
 # product/management/commands/load_ingredients.py
 
+import time
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.bulk import bulk_upsert, slug_filler
 from product.models import Ingredient, IngredientCategory
 
 
@@ -73,56 +78,63 @@ CATEGORIES = {
 
 
 class Command(BaseCommand):
-    help = "Reinicia categorías e ingredientes de pizza en la base de datos."
+    help = (
+        "Carga categorías e ingredientes de pizza (upsert masivo por nombre). "
+        "Con --reset borra antes todo lo existente."
+    )
 
-    def handle(self, *args, **kwargs):
-        # ---------------------------------------------------
-        # 1. ELIMINAR INGREDIENTES Y CATEGORÍAS EXISTENTES
-        # ---------------------------------------------------
-        self.stdout.write(self.style.WARNING("Eliminando ingredientes existentes..."))
-        deleted_ing = Ingredient.objects.all().delete()
-        self.stdout.write(self.style.WARNING(f"Ingredientes eliminados: {deleted_ing[0]}"))
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true",
+            help="Eliminar ingredientes y categorías existentes antes de cargar (también sus usos en productos)",
+        )
 
-        self.stdout.write(self.style.WARNING("Eliminando categorías de ingredientes existentes..."))
-        deleted_cat = IngredientCategory.objects.all().delete()
-        self.stdout.write(self.style.WARNING(f"Categorías eliminadas: {deleted_cat[0]}"))
+    def handle(self, *args, **options):
+        start = time.perf_counter()
 
-        # ---------------------------------------------------
-        # 2. CREAR CATEGORÍAS
-        # ---------------------------------------------------
-        self.stdout.write(self.style.SUCCESS("\nCreando categorías..."))
-        category_objects = {}
+        with transaction.atomic():
+            # ---------------------------------------------------
+            # 1. (OPCIONAL) ELIMINAR INGREDIENTES Y CATEGORÍAS EXISTENTES
+            # ---------------------------------------------------
+            if options["reset"]:
+                self.stdout.write(self.style.WARNING("Eliminando ingredientes existentes..."))
+                deleted_ing = Ingredient.objects.all().delete()
+                self.stdout.write(self.style.WARNING(f"Ingredientes eliminados: {deleted_ing[0]}"))
 
-        for order, (cat_name, items) in enumerate(CATEGORIES.items(), start=1):
-            category = IngredientCategory.objects.create(
-                name=cat_name,
-                ordering=order,
-            )
-            category_objects[cat_name] = category
-            self.stdout.write(self.style.SUCCESS(f"✔ Categoría creada: {cat_name}"))
+                self.stdout.write(self.style.WARNING("Eliminando categorías de ingredientes existentes..."))
+                deleted_cat = IngredientCategory.objects.all().delete()
+                self.stdout.write(self.style.WARNING(f"Categorías eliminadas: {deleted_cat[0]}"))
 
-        # ---------------------------------------------------
-        # 3. CREAR INGREDIENTES ASOCIADOS
-        # ---------------------------------------------------
-        self.stdout.write(self.style.SUCCESS("\nCreando ingredientes..."))
-
-        ing_count = 0
-
-        for cat_name, items in CATEGORIES.items():
-            category = category_objects[cat_name]
+            # ---------------------------------------------------
+            # 2. CATEGORÍAS (clave: name)
+            # ---------------------------------------------------
+            categories = bulk_upsert(
+                IngredientCategory,
+                [{"name": name, "ordering": order} for order, name in enumerate(CATEGORIES, start=1)],
+                key="name", fields=["ordering"],
+                prepare=slug_filler(IngredientCategory),
+            )
 
-            for ing in items:
-                obj = Ingredient.objects.create(
-                    name=ing,
-                    category=category,
-                )
-                ing_count += 1
-                self.stdout.write(self.style.SUCCESS(f"✔ Ingrediente agregado: {ing} → {cat_name}"))
+            # ---------------------------------------------------
+            # 3. INGREDIENTES (clave: name; categoría por el mapa name → id)
+            # ---------------------------------------------------
+            ingredients = bulk_upsert(
+                Ingredient,
+                [
+                    {"name": ing, "category_id": categories.ids[cat_name]}
+                    for cat_name, items in CATEGORIES.items()
+                    for ing in items
+                ],
+                key="name", fields=["category_id"],
+                prepare=slug_filler(Ingredient),
+            )
 
         # ---------------------------------------------------
         # 4. Resumen final
         # ---------------------------------------------------
         self.stdout.write(self.style.SUCCESS("\n=== RESUMEN ==="))
-        self.stdout.write(self.style.SUCCESS(f"Categorías creadas: {len(CATEGORIES)}"))
-        self.stdout.write(self.style.SUCCESS(f"Ingredientes insertados: {ing_count}"))
-        self.stdout.write(self.style.SUCCESS("Carga completada correctamente."))
+        for label, result in (("Categorías", categories), ("Ingredientes", ingredients)):
+            self.stdout.write(self.style.SUCCESS(
+                f"{label}: {result.inserted} nuevos, {result.updated} actualizados, {result.unchanged} sin cambios"
+            ))
+        self.stdout.write(self.style.SUCCESS(f"Carga completada correctamente ({time.perf_counter() - start:.2f}s)."))
@@ -0,0 +1,132 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from product.images import (
+    content_hash, find_normalized, generate_for_product, is_normalized, normalize_image, normalized_name,
+)
+from product.models import Product
+
+
+def _human(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Reporte de bytes ahorrables normalizando las imágenes originales de productos "
+        "(orientación, sin EXIF, tamaño máximo, re-encode y deduplicación por contenido). "
+        "Con --apply además reemplaza los originales por su versión normalizada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--apply", action="store_true",
+                            help="Guardar las versiones normalizadas y apuntar los productos a ellas")
+
+    def handle(self, *args, **options):
+        # nombre de archivo → ids de productos que lo usan
+        by_name = {}
+        for pid, name in Product.objects.exclude(image="").exclude(image__isnull=True).values_list("id", "image"):
+            by_name.setdefault(name, []).append(pid)
+
+        if not by_name:
+            self.stdout.write("No hay imágenes de productos.")
+            return
+
+        self.stdout.write(self.style.WARNING(
+            f"⏳ Analizando {len(by_name)} archivos con {options['workers']} procesos..."
+        ))
+        start = time.perf_counter()
+
+        before = after = duplicated = 0
+        seen = {}     # hash → nombre normalizado
+        files = failed = 0
+        names = list(by_name)
+        batch_size = options["batch_size"]
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            # Lote a lote: solo batch_size originales en memoria a la vez
+            for offset in range(0, len(names), batch_size):
+                batch = []
+                for name in names[offset:offset + batch_size]:
+                    try:
+                        with default_storage.open(name, "rb") as f:
+                            data = f.read()
+                    except OSError as e:
+                        self.stderr.write(f"⚠️ {name}: no se pudo leer ({e})")
+                        continue
+                    batch.append((name, data, content_hash(data)))
+                files += len(batch)
+
+                # Ya normalizados o repetidos (en lotes anteriores o en este) no van al pool
+                futures = {}   # hash → normalización en curso
+                for name, data, digest in batch:
+                    if not is_normalized(name) and digest not in seen and digest not in futures:
+                        futures[digest] = pool.submit(normalize_image, data)
+
+                for name, data, digest in batch:
+                    before += len(data)
+
+                    if is_normalized(name):
+                        after += len(data)
+                        seen.setdefault(digest, name)
+                        continue
+
+                    # Mismo contenido ya contado → todo el archivo es ahorro
+                    if digest in seen:
+                        duplicated += len(data)
+                        if options["apply"]:
+                            self._repoint(name, seen[digest], by_name[name])
+                        continue
+
+                    try:
+                        payload, ext = futures[digest].result()
+                    except Exception as e:
+                        failed += 1
+                        after += len(data)
+                        self.stderr.write(f"⚠️ {name}: imagen inválida ({e})")
+                        continue
+
+                    after += len(payload)
+
+                    if options["apply"]:
+                        target = find_normalized(digest) or default_storage.save(
+                            normalized_name(digest, ext), ContentFile(payload)
+                        )
+                        seen[digest] = target
+                        self._repoint(name, target, by_name[name])
+                    else:
+                        seen[digest] = name
+
+                self.stdout.write(f"   {min(offset + batch_size, len(names))}/{len(names)}")
+
+        elapsed = time.perf_counter() - start
+        saved = before - after
+
+        self.stdout.write(f"   Archivos:            {files} ({failed} con error)")
+        self.stdout.write(f"   Tamaño actual:       {_human(before)}")
+        self.stdout.write(f"   Tras normalizar:     {_human(after)}")
+        self.stdout.write(f"   Duplicados:          {_human(duplicated)}")
+        pct = (saved / before * 100) if before else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Ahorro: {_human(saved)} ({pct:.1f}%) en {elapsed:.1f}s"
+            + ("" if options["apply"] else " — simulación, usa --apply para aplicar")
+        ))
+
+    def _repoint(self, old_name, new_name, product_ids):
+        """Actualiza los productos sin save() y regenera sus derivados."""
+        if old_name == new_name:
+            return
+        Product.objects.filter(id__in=product_ids, image=old_name).update(image=new_name)
+        for pid in product_ids:
+            generate_for_product(pid)
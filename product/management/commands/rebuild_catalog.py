@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product.catalog import rebuild_catalog
+from product.models import CatalogListing
+
+
+class Command(BaseCommand):
+    help = "Reconstruye completa la tabla CatalogListing (read model de los listados)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING("⏳ Reconstruyendo catálogo..."))
+
+        start = time.perf_counter()
+        written = rebuild_catalog(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {written} productos indexados en {elapsed:.1f}s "
+            f"(total en tabla: {CatalogListing.objects.count()})"
+        ))
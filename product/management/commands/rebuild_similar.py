@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product.similarity import TOP_K, rebuild_similar
+
+
+class Command(BaseCommand):
+    help = "Recalcula completa la tabla SimilarProduct (top-k de productos parecidos por producto)."
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING("⏳ Calculando productos similares..."))
+
+        start = time.perf_counter()
+        products, rows = rebuild_similar()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {products} productos, {rows} vecinos (top {TOP_K}) en {elapsed:.1f}s"
+        ))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product.search import get_backend, index_products, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reindexa la búsqueda de productos (completa o solo los ids indicados)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("product_ids", nargs="*", type=int, help="Solo estos productos")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        self.stdout.write(self.style.WARNING(f"⏳ Reindexando (backend: {backend.name})..."))
+
+        start = time.perf_counter()
+        if options["product_ids"]:
+            total = index_products(options["product_ids"])
+        else:
+            total = rebuild_index(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} productos indexados en {elapsed:.1f}s"))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_country_currency_symbol'),
+        ('location', '0001_initial'),
+        ('product', '0008_product_ingredients'),
+        ('vendor', '0013_alter_profile_address_alter_profile_zipcode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogListing',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='product.product')),
+                ('price', models.IntegerField()),
+                ('final_price', models.IntegerField()),
+                ('has_offer', models.BooleanField(default=False)),
+                ('is_2x1', models.BooleanField(default=False)),
+                ('offer_starts_at', models.DateTimeField(blank=True, null=True)),
+                ('offer_ends_at', models.DateTimeField(blank=True, null=True)),
+                ('preference_ids', models.CharField(blank=True, default='', max_length=255)),
+                ('added_date', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='product.category')),
+                ('comuna', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='location.comuna')),
+                ('country', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.country')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='vendor.vendor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['comuna', 'country', 'category'], name='product_cat_comuna__dc1948_idx'), models.Index(fields=['country', 'category'], name='product_cat_country_821781_idx'), models.Index(fields=['has_offer', 'offer_ends_at'], name='product_cat_has_off_a699f1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:50
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import OperationalError, migrations, models
+
+from product.search import INGREDIENT_WEIGHT, TITLE_WEIGHT, analyze
+
+
+def fill_documents(apps, schema_editor):
+    """Un documento por producto (misma regla que search.build_document), sin esperar a reindex_search."""
+    Product = apps.get_model("product", "Product")
+    ProductIngredient = apps.get_model("product", "ProductIngredient")
+    ProductSearchDocument = apps.get_model("product", "ProductSearchDocument")
+
+    ingredients = defaultdict(list)
+    for product_id, name in ProductIngredient.objects.values_list("product_id", "ingredient__name"):
+        ingredients[product_id].append(name)
+
+    preferences = defaultdict(list)
+    for product_id, name in Product.preferences.through.objects.values_list("product_id", "preference__name"):
+        preferences[product_id].append(name)
+
+    docs = []
+    for pk, title, description in Product.objects.values_list("id", "title", "description"):
+        parts = [title] * TITLE_WEIGHT
+        parts.append(description or "")
+        for name in ingredients[pk]:
+            parts.extend([name] * INGREDIENT_WEIGHT)
+        parts.extend(preferences[pk])
+        docs.append(ProductSearchDocument(product_id=pk, content=" ".join(analyze(" ".join(parts)))))
+    ProductSearchDocument.objects.bulk_create(docs, batch_size=500)
+
+    # SQLite lee de la tabla FTS5 (search.SQLiteFTSBackend), no de los documentos
+    if schema_editor.connection.vendor == "sqlite" and docs:
+        try:
+            schema_editor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS product_search_fts USING fts5(content)")
+        except OperationalError:
+            return  # sin FTS5 → índice en memoria, que se carga desde los documentos
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO product_search_fts (rowid, content) VALUES (%s, %s)",
+                [(doc.product_id, doc.content) for doc in docs],
+            )
+
+
+def add_fulltext_index(apps, schema_editor):
+    # Solo MySQL: en SQLite se usa FTS5 y en otros motores el índice en memoria
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(
+            "ALTER TABLE product_productsearchdocument "
+            "ADD FULLTEXT INDEX product_search_content_ft (content)"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(
+            "ALTER TABLE product_productsearchdocument DROP INDEX product_search_content_ft"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_cataloglisting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='product.product')),
+                ('content', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+        migrations.RunPython(fill_documents, migrations.RunPython.noop),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:03
+
+from django.db import migrations, models
+
+
+def compute_masks(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+
+    masks = {}
+    through = Product.preferences.through
+    for product_id, bit in through.objects.filter(preference__bit__isnull=False).values_list(
+        "product_id", "preference__bit"
+    ):
+        masks[product_id] = masks.get(product_id, 0) | (1 << bit)
+    for product_id, mask in masks.items():
+        Product.objects.filter(pk=product_id).update(preference_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0012_similarproduct'),
+        ('vendor', '0014_preference_bitmask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='preference_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(compute_masks, migrations.RunPython.noop),
+    ]
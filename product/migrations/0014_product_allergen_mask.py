@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+
+def compute_masks(apps, schema_editor):
+    ProductIngredient = apps.get_model("product", "ProductIngredient")
+    Product = apps.get_model("product", "Product")
+
+    masks = {}
+    for product_id, bit in ProductIngredient.objects.filter(ingredient__allergies__bit__isnull=False).values_list(
+        "product_id", "ingredient__allergies__bit"
+    ):
+        masks[product_id] = masks.get(product_id, 0) | (1 << bit)
+    for product_id, mask in masks.items():
+        Product.objects.filter(pk=product_id).update(allergen_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0013_product_preference_mask'),
+        ('vendor', '0015_allergy_bitmask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='allergen_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(compute_masks, migrations.RunPython.noop),
+    ]
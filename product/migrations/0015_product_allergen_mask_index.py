@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0014_product_allergen_mask'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='allergen_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:40
+
+from django.db import migrations
+
+
+def fill_listings(apps, schema_editor):
+    """Una fila por producto (misma regla que product/catalog.py), sin esperar a rebuild_catalog."""
+    CatalogListing = apps.get_model("product", "CatalogListing")
+    Product = apps.get_model("product", "Product")
+    Offer = apps.get_model("offers", "Offer")
+
+    offers = {
+        product_id: (is_active, start, end)
+        for product_id, is_active, start, end in Offer.objects.values_list(
+            "product_id", "is_active", "start_date", "end_date"
+        )
+    }
+
+    rows = []
+    for pk, vendor_id, category_id, country_id, profile_country_id, comuna_id, added_date in (
+        Product.objects.exclude(pk__in=CatalogListing.objects.values("product_id")).values_list(
+            "id", "vendor_id", "category_id", "vendor__country_id",
+            "vendor__created_by__profile__country_id", "vendor__comuna_id", "added_date",
+        )
+    ):
+        is_active, start, end = offers.get(pk, (False, None, None))
+        rows.append(CatalogListing(
+            product_id=pk,
+            vendor_id=vendor_id,
+            category_id=category_id,
+            country_id=country_id or profile_country_id,
+            comuna_id=comuna_id,
+            has_offer=bool(is_active),
+            offer_starts_at=start,
+            offer_ends_at=end,
+            added_date=added_date,
+        ))
+    CatalogListing.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers', '0001_initial'),
+        ('product', '0015_product_allergen_mask_index'),
+        ('vendor', '0018_vendor_comuna'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='cataloglisting',
+            name='final_price',
+        ),
+        migrations.RemoveField(
+            model_name='cataloglisting',
+            name='is_2x1',
+        ),
+        migrations.RemoveField(
+            model_name='cataloglisting',
+            name='preference_ids',
+        ),
+        migrations.RemoveField(
+            model_name='cataloglisting',
+            name='price',
+        ),
+        migrations.RunPython(fill_listings, migrations.RunPython.noop),
+    ]
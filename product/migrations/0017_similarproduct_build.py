@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:15
+
+from django.db import migrations
+
+
+def build_similar(apps, schema_editor):
+    """
+    Cálculo inicial de SimilarProduct (lo mismo que el comando rebuild_similar).
+    Va después de 0016: el término "misma comuna" sale de CatalogListing ya rellenado.
+    """
+    from product.similarity import rebuild_similar
+
+    SimilarProduct = apps.get_model("product", "SimilarProduct")
+    if not SimilarProduct.objects.exists():
+        rebuild_similar()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0016_cataloglisting_backfill'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_similar, migrations.RunPython.noop),
+    ]
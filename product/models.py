@@ -1,12 +1,8 @@
-from io import BytesIO
-from PIL import Image
-from django.core.files import File
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
 from django.db import models
 from vendor.models import Vendor, Preference
 from django.utils.text import slugify
-from io import BytesIO
-from django.core.files.base import File
-from PIL import Image
 
 
 
@@ -98,8 +94,13 @@ class Product(models.Model):
     image = models.ImageField(upload_to='uploads/', blank=True, null=True)
     thumbnail = models.ImageField(upload_to='uploads/', blank=True, null=True)
 
+    # Derivados generados fuera del request (product/images.py):
+    # {"source", "hash", "ratio", "jpeg": {ancho: ruta}, "webp": {ancho: ruta}}
+    image_derivatives = models.JSONField(blank=True, null=True, editable=False)
+
     # Preferencias alimentarias
     preferences = models.ManyToManyField(Preference, blank=True)
+    preference_mask = models.BigIntegerField(default=0, editable=False)  # sincronizado por señales
 
     # Ingredientes
     ingredients = models.ManyToManyField(
@@ -109,6 +110,8 @@ class Product(models.Model):
         blank=True,
         verbose_name="Ingredientes",
     )
+    # Bits (Allergy.bit) de las alergias asociadas a sus ingredientes (product/allergens.py)
+    allergen_mask = models.BigIntegerField(default=0, editable=False, db_index=True)
 
     class Meta:
         ordering = ['-added_date']
@@ -131,78 +134,61 @@ class Product(models.Model):
 
         super().save(*args, **kwargs)
 
-    # ---------------- THUMBNAIL ----------------
+    # ---------------- IMÁGENES ----------------
+    PLACEHOLDER_IMAGE = "https://via.placeholder.com/240x180.jpg"
+
     def get_thumbnail(self):
+        """
+        URL lista para mostrar. Nunca procesa imágenes: si los derivados aún no
+        están (recién subida) se usa la original hasta que el pipeline termine.
+        """
         if self.thumbnail:
             return self.thumbnail.url
-
         if self.image:
-            self.thumbnail = self.make_thumbnail(self.image)
-            self.save()
-            return self.thumbnail.url
-
-        return "https://via.placeholder.com/240x180.jpg"
-
-    def make_thumbnail(self, image, size=(300, 200)):
-        img = Image.open(image)
+            return self.image.url
+        return self.PLACEHOLDER_IMAGE
 
-        # 🔥 FIX CLAVE: si viene en RGBA/P la convertimos a RGB
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
+    def _srcset(self, fmt):
+        variants = (self.image_derivatives or {}).get(fmt) or {}
+        return ", ".join(
+            f"{default_storage.url(name)} {width}w"
+            for width, name in sorted(variants.items(), key=lambda kv: int(kv[0]))
+        )
 
-        img.thumbnail(size)
-
-        thumb_io = BytesIO()
-        img.save(thumb_io, "JPEG", quality=85)
-
-        # nombre distinto para el thumb
-        base_name = image.name.rsplit(".", 1)[0]
-        thumb_name = f"{base_name}_thumb.jpg"
+    @property
+    def jpeg_srcset(self):
+        return self._srcset("jpeg")
 
-        return File(thumb_io, name=thumb_name)
+    @property
+    def webp_srcset(self):
+        return self._srcset("webp")
 
     # ---------------- OFERTAS ----------------
     @property
     def active_offer(self):
         try:
             offer = self.offer  # related_name="offer"
-            return offer if offer.is_current() else None
-        except Exception:
+        except ObjectDoesNotExist:
             return None
+        return offer if offer.is_current() else None
 
     def has_active_offer(self):
         return self.active_offer is not None
 
-    def get_final_price(self):
-        offer = self.active_offer
-        if not offer:
-            return self.price
-
-        if offer.discount_price:
-            return max(1, offer.discount_price)
+    def get_price_quote(self, quantity=1):
+        """Cotización inmutable del producto (ver offers.pricing.PricingEngine)."""
+        from offers.pricing import PricingEngine
+        return PricingEngine.quote(self, quantity=quantity)
 
-        if offer.discount_percentage:
-            final = int(self.price * (1 - offer.discount_percentage / 100))
-            return max(1, final)
+    def get_final_price(self):
+        return self.get_price_quote().unit_price
 
-        return self.price
+    @property
+    def final_price(self):
+        return self.get_final_price()
 
     def get_offer_percentage(self):
-        offer = self.active_offer
-        if not offer:
-            return 0
-
-        original = self.price
-        final = self.get_final_price()
-
-        if original <= 0:
-            return 0
-
-        try:
-            pct = round(100 - ((final / original) * 100))
-            return max(1, min(pct, 90))
-        except Exception:
-            return 0
+        return self.get_price_quote().discount_percentage
 
 
 
@@ -222,3 +208,81 @@ class ProductIngredient(models.Model):
 
     def __str__(self):
         return f"{self.product.title} - {self.ingredient.name}"
+
+
+class CatalogListing(models.Model):
+    """
+    Modelo de lectura desnormalizado: una fila por producto con todo lo que
+    necesitan los listados (home, categoría, búsqueda) para filtrar y ordenar
+    sin recorrer vendor → user → profile → comuna.
+
+    Se mantiene por señales (product/signals.py) y se reconstruye completo con
+    `python manage.py rebuild_catalog`.
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="listing"
+    )
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name="+")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="+")
+    country = models.ForeignKey(
+        "core.Country", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    comuna = models.ForeignKey(
+        "location.Comuna", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    # Oferta (la vigencia se evalúa al consultar, así no queda obsoleta al vencer;
+    # los precios se cotizan en vivo con PricingEngine, no se guardan aquí)
+    has_offer = models.BooleanField(default=False)
+    offer_starts_at = models.DateTimeField(null=True, blank=True)
+    offer_ends_at = models.DateTimeField(null=True, blank=True)
+
+    # Claves de orden
+    added_date = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["comuna", "country", "category"]),
+            models.Index(fields=["country", "category"]),
+            models.Index(fields=["has_offer", "offer_ends_at"]),
+        ]
+
+    def __str__(self):
+        return f"Listing {self.product_id} (comuna {self.comuna_id})"
+
+
+class ProductSearchDocument(models.Model):
+    """
+    Texto indexable de un producto ya analizado (sin tildes + stem).
+    Lo mantiene product/search.py; sobre esta tabla corre el índice FULLTEXT en MySQL.
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="search_document"
+    )
+    content = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"SearchDocument {self.product_id}"
+
+
+class SimilarProduct(models.Model):
+    """
+    Top-k de productos parecidos por producto (misma categoría), precalculado
+    en product/similarity.py. La ficha del producto lo lee con una sola consulta
+    por (product, rank).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="similar_rows")
+    similar = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="similar_to_rows")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["product", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "rank"], name="unique_similar_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} → {self.similar_id} ({self.score:.2f})"
@@ -0,0 +1,370 @@
+"""
+🔍 Búsqueda de productos (full-text).
+
+- Analizador en español: minúsculas, sin tildes (ñ → n), stopwords y un
+  stemmer liviano (plurales + vocal final) → "Napolitánas" == "napolitana".
+- El texto ya analizado se guarda en ProductSearchDocument (título con más peso,
+  descripción, ingredientes y preferencias).
+- Backends intercambiables (settings.PRODUCT_SEARCH_BACKEND):
+    "mysql"  → índice FULLTEXT sobre ProductSearchDocument.content
+    "sqlite" → tabla virtual FTS5 con ranking bm25()
+    "memory" → índice invertido en proceso con BM25
+    "auto"   → según el motor de la BD (default)
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import Max
+
+from .models import Product, ProductSearchDocument
+
+
+# ===========================================================
+#   ANALIZADOR (ESPAÑOL)
+# ===========================================================
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los",
+    "o", "para", "por", "su", "sus", "u", "un", "una", "unas", "unos", "y",
+}
+
+TITLE_WEIGHT = 3
+INGREDIENT_WEIGHT = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_VOWELS = "aeiou"
+
+
+def fold(text):
+    """Minúsculas y sin tildes: 'Champiñón' → 'champinon'."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def stem(word):
+    """
+    Stemmer liviano para español (estilo Savoy):
+    quita plurales y la vocal final de género → pizza/pizzas, napolitano/napolitana.
+    """
+    if len(word) > 4 and word.endswith("ces"):
+        word = word[:-3] + "z"
+    elif len(word) > 4 and word.endswith("es") and word[-3] not in _VOWELS:
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith("s"):
+        word = word[:-1]
+
+    if len(word) > 4 and word[-1] in "aoe":
+        word = word[:-1]
+
+    return word
+
+
+def tokenize(text):
+    """Texto libre → palabras sin tildes (sin stem ni stopwords)."""
+    return _TOKEN_RE.findall(fold(text))
+
+
+def analyze(text):
+    """Texto libre → lista de términos normalizados (con repetidos)."""
+    return [stem(tok) for tok in tokenize(text) if tok not in STOPWORDS]
+
+
+def build_document(product):
+    """Contenido indexable de un producto (requiere ingredients/preferences cargados)."""
+    parts = [product.title] * TITLE_WEIGHT
+    parts.append(product.description or "")
+    for ingredient in product.ingredients.all():
+        parts.extend([ingredient.name] * INGREDIENT_WEIGHT)
+    for preference in product.preferences.all():
+        parts.append(preference.name)
+    return " ".join(analyze(" ".join(parts)))
+
+
+# ===========================================================
+#   BACKENDS
+# ===========================================================
+class BaseSearchBackend:
+    name = "base"
+
+    def index(self, docs):
+        """docs = {product_id: contenido analizado}."""
+        raise NotImplementedError
+
+    def remove(self, product_ids):
+        raise NotImplementedError
+
+    def search(self, terms, limit):
+        """Devuelve [(product_id, score)] ordenado de mayor a menor relevancia."""
+        raise NotImplementedError
+
+    def rebuild(self):
+        docs = dict(ProductSearchDocument.objects.values_list("product_id", "content"))
+        self.clear()
+        self.index(docs)
+
+    def clear(self):
+        pass
+
+
+class MemorySearchBackend(BaseSearchBackend):
+    """
+    Índice invertido en proceso con BM25.
+    Se sincroniza con ProductSearchDocument por updated_at, así otros procesos
+    ven los cambios sin reconstruir todo.
+    """
+    name = "memory"
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, autoload=True):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)   # term → {product_id: tf}
+        self._doc_len = {}                   # product_id → nº de términos
+        self._doc_terms = {}                 # product_id → términos distintos
+        self._total_len = 0
+        self._autoload = autoload
+        self._loaded = False
+        self._last_seen = None
+
+    def clear(self):
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._doc_len = {}
+            self._doc_terms = {}
+            self._total_len = 0
+            self._last_seen = None
+
+    def _remove_one(self, pid):
+        length = self._doc_len.pop(pid, None)
+        if length is None:
+            return
+        self._total_len -= length
+        for term in self._doc_terms.pop(pid, ()):
+            postings = self._postings[term]
+            postings.pop(pid, None)
+            if not postings:
+                del self._postings[term]
+
+    def index(self, docs):
+        with self._lock:
+            for pid, content in docs.items():
+                self._remove_one(pid)
+                terms = content.split()
+                self._doc_len[pid] = len(terms)
+                self._total_len += len(terms)
+                counts = Counter(terms)
+                self._doc_terms[pid] = tuple(counts)
+                for term, tf in counts.items():
+                    self._postings[term][pid] = tf
+
+    def remove(self, product_ids):
+        with self._lock:
+            for pid in product_ids:
+                self._remove_one(pid)
+
+    def _sync(self):
+        if not self._autoload:
+            return
+        if not self._loaded:
+            self.rebuild()
+            self._last_seen = ProductSearchDocument.objects.aggregate(m=Max("updated_at"))["m"]
+            self._loaded = True
+            return
+
+        qs = ProductSearchDocument.objects.all()
+        if self._last_seen:
+            qs = qs.filter(updated_at__gt=self._last_seen)
+        changed = list(qs.values_list("product_id", "content", "updated_at"))
+        if changed:
+            self.index({pid: content for pid, content, _ in changed})
+            self._last_seen = max(ts for _, _, ts in changed)
+
+    def search(self, terms, limit):
+        self._sync()
+
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not n_docs or not terms:
+                return []
+            avg_len = self._total_len / n_docs
+
+            scores = defaultdict(float)
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for pid, tf in postings.items():
+                    norm = 1 - self.b + self.b * self._doc_len[pid] / avg_len
+                    scores[pid] += idf * (tf * (self.k1 + 1)) / (tf + self.k1 * norm)
+
+        return heapq.nsmallest(limit, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Tabla virtual FTS5 (desarrollo local con SQLite) con ranking bm25()."""
+    name = "sqlite"
+
+    def __init__(self, table="product_search_fts"):
+        self.table = table
+
+    def _ensure_table(self):
+        # Sin bandera "ya creada": un CREATE dentro de una transacción revertida
+        # (tests, atomic) deja la tabla sin existir aunque el backend siga en memoria.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5(content)"
+            )
+
+    def clear(self):
+        self._ensure_table()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def index(self, docs):
+        self._ensure_table()
+        with connection.cursor() as cursor:
+            self._delete(cursor, list(docs))
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, content) VALUES (%s, %s)",
+                list(docs.items()),
+            )
+
+    def remove(self, product_ids):
+        self._ensure_table()
+        with connection.cursor() as cursor:
+            self._delete(cursor, list(product_ids))
+
+    def _delete(self, cursor, ids):
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", chunk)
+
+    def search(self, terms, limit):
+        if not terms:
+            return []
+        self._ensure_table()
+        match = " OR ".join(f'"{t}"' for t in sorted(set(terms)))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, bm25({self.table}) AS score FROM {self.table} "
+                f"WHERE {self.table} MATCH %s ORDER BY score, rowid LIMIT %s",
+                [match, limit],
+            )
+            # bm25() en FTS5 es negativo: más bajo = más relevante
+            return [(pid, -score) for pid, score in cursor.fetchall()]
+
+
+class MySQLFulltextBackend(BaseSearchBackend):
+    """Índice FULLTEXT de InnoDB directamente sobre ProductSearchDocument.content."""
+    name = "mysql"
+
+    def index(self, docs):
+        pass  # ProductSearchDocument ya es la fuente del índice
+
+    def remove(self, product_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, terms, limit):
+        if not terms:
+            return []
+        table = ProductSearchDocument._meta.db_table
+        query = " ".join(sorted(set(terms)))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT product_id, MATCH(content) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score "
+                f"FROM {table} WHERE MATCH(content) AGAINST (%s IN NATURAL LANGUAGE MODE) "
+                f"ORDER BY score DESC, product_id LIMIT %s",
+                [query, query, limit],
+            )
+            return list(cursor.fetchall())
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _create_backend(name):
+    if name == "auto":
+        name = {"mysql": "mysql", "sqlite": "sqlite"}.get(connection.vendor, "memory")
+
+    if name == "mysql":
+        return MySQLFulltextBackend()
+
+    if name == "sqlite":
+        backend = SQLiteFTSBackend()
+        try:
+            backend._ensure_table()
+            return backend
+        except OperationalError:
+            pass  # SQLite compilado sin FTS5 → índice en memoria
+
+    return MemorySearchBackend()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend(getattr(settings, "PRODUCT_SEARCH_BACKEND", "auto"))
+    return _backend
+
+
+# ===========================================================
+#   API PÚBLICA
+# ===========================================================
+def index_products(product_ids):
+    """Reindexa incrementalmente los productos indicados (se llama desde señales)."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return 0
+
+    products = (
+        Product.objects.filter(pk__in=product_ids)
+        .prefetch_related("ingredients", "preferences")
+    )
+    docs = {p.id: build_document(p) for p in products}
+
+    with transaction.atomic():
+        ProductSearchDocument.objects.filter(product_id__in=product_ids).delete()
+        ProductSearchDocument.objects.bulk_create(
+            [ProductSearchDocument(product_id=pid, content=content) for pid, content in docs.items()]
+        )
+
+    backend = get_backend()
+    missing = set(product_ids) - set(docs)
+    if missing:
+        backend.remove(missing)
+    backend.index(docs)
+    return len(docs)
+
+
+def remove_products(product_ids):
+    get_backend().remove(list(product_ids))
+
+
+def rebuild_index(batch_size=1000):
+    """Reconstrucción completa (comando reindex_search)."""
+    ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+    ProductSearchDocument.objects.exclude(product_id__in=ids).delete()
+
+    backend = get_backend()
+    backend.clear()
+    for start in range(0, len(ids), batch_size):
+        index_products(ids[start:start + batch_size])
+    return len(ids)
+
+
+def search_product_ids(query, limit=500):
+    """Texto libre → [(product_id, score)] por relevancia."""
+    return get_backend().search(analyze(query), limit)
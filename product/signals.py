@@ -0,0 +1,342 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from offers.models import Offer
+from vendor.models import Allergy, DeliveryZone, Preference, Profile, Vendor, recompute_preference_masks
+from .allergens import products_with_ingredients, recompute_allergen_masks
+from .catalog import refresh_listings, refresh_vendor_listings
+from .models import Category, Ingredient, Product, ProductIngredient, SimilarProduct
+from .search import index_products, remove_products
+from .similarity import refresh_similar
+from . import autocomplete, fuzzy
+from .images import clear_derivatives, needs_derivatives, schedule_derivatives
+
+
+# ===========================================================
+#   MANTENER CatalogListing AL DÍA
+# ===========================================================
+@receiver(post_save, sender=Product)
+def listing_product_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_listings([instance.id])
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def listing_offer_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_listings([instance.product_id])
+
+
+@receiver(post_save, sender=Vendor)
+def listing_vendor_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_vendor_listings([instance.id])
+
+
+@receiver(pre_save, sender=Profile)
+def remember_profile_comuna(sender, instance, raw=False, **kwargs):
+    instance._previous_comuna_id = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_comuna_id = (
+        Profile.objects.filter(pk=instance.pk).values_list("comuna_id", flat=True).first()
+    )
+
+
+def _vendor_comuna_changed(profile):
+    """
+    La comuna del perfil es la de sus locales (Profile.save la copia a Vendor.comuna,
+    que no se edita por otro lado): solo importa si cambió y si el usuario tiene local.
+    """
+    if getattr(profile, "_previous_comuna_id", None) == profile.comuna_id:
+        return False
+    return Vendor.objects.filter(created_by_id=profile.user_id).exists()
+
+
+@receiver(post_save, sender=Profile)
+def listing_profile_saved(sender, instance, raw=False, **kwargs):
+    """La comuna/país del listado sale del perfil del dueño del local."""
+    if raw:
+        return
+    vendor_ids = Vendor.objects.filter(created_by_id=instance.user_id).values_list("id", flat=True)
+    refresh_vendor_listings(list(vendor_ids))
+
+
+# ===========================================================
+#   BITMASK DE PREFERENCIAS DEL PRODUCTO
+# ===========================================================
+@receiver(m2m_changed, sender=Product.preferences.through)
+def sync_product_preference_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    # preference.product_set.clear(): en post_clear ya no se sabe a quién afectó
+    if reverse and action == "pre_clear":
+        instance._mask_product_ids = list(instance.product_set.values_list("id", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        masks = recompute_preference_masks(Product, [instance.pk])
+        instance.preference_mask = masks[instance.pk]
+    else:
+        ids = pk_set if action != "post_clear" else getattr(instance, "_mask_product_ids", [])
+        recompute_preference_masks(Product, ids)
+
+
+@receiver(pre_delete, sender=Preference)
+def remember_preference_products(sender, instance, **kwargs):
+    instance._mask_product_ids = list(instance.product_set.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Preference)
+def product_mask_preference_deleted(sender, instance, **kwargs):
+    recompute_preference_masks(Product, getattr(instance, "_mask_product_ids", []))
+
+
+# ===========================================================
+#   ALÉRGENOS DEL PRODUCTO (ingredientes × alergias)
+# ===========================================================
+@receiver(post_save, sender=ProductIngredient)
+@receiver(post_delete, sender=ProductIngredient)
+def allergens_product_ingredient_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    recompute_allergen_masks([instance.product_id])
+
+
+@receiver(m2m_changed, sender=Product.ingredients.through)
+def allergens_product_ingredients_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # ingredient.products.clear(): en post_clear ya no se sabe a quién afectó
+    if reverse and action == "pre_clear":
+        instance._allergen_product_ids = list(instance.products.values_list("id", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        masks = recompute_allergen_masks([instance.pk])
+        instance.allergen_mask = masks[instance.pk]
+    else:
+        ids = pk_set if action != "post_clear" else getattr(instance, "_allergen_product_ids", [])
+        recompute_allergen_masks(ids)
+
+
+@receiver(m2m_changed, sender=Allergy.ingredients.through)
+def allergens_allergy_ingredients_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Cambió qué ingredientes dispara una alergia → productos con esos ingredientes."""
+    if not reverse and action == "pre_clear":
+        instance._allergen_ingredient_ids = list(instance.ingredients.values_list("id", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:
+        ingredient_ids = [instance.pk]     # ingredient.allergies.add(...)
+    elif action == "post_clear":
+        ingredient_ids = getattr(instance, "_allergen_ingredient_ids", [])
+    else:
+        ingredient_ids = pk_set
+    recompute_allergen_masks(products_with_ingredients(ingredient_ids))
+
+
+@receiver(pre_delete, sender=Allergy)
+def remember_allergy_products(sender, instance, **kwargs):
+    instance._allergen_product_ids = products_with_ingredients(instance.ingredients.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Allergy)
+def allergens_allergy_deleted(sender, instance, **kwargs):
+    recompute_allergen_masks(getattr(instance, "_allergen_product_ids", []))
+
+
+# ===========================================================
+#   ÍNDICE DE BÚSQUEDA (incremental)
+# ===========================================================
+@receiver(post_save, sender=Product)
+def search_product_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_products([instance.id])
+
+
+@receiver(post_delete, sender=Product)
+def search_product_deleted(sender, instance, **kwargs):
+    remove_products([instance.id])
+
+
+@receiver(m2m_changed, sender=Product.preferences.through)
+@receiver(m2m_changed, sender=Product.ingredients.through)
+def search_product_m2m_changed(sender, instance, action, reverse, pk_set, model, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        index_products([instance.id])
+    elif model is Product and pk_set:
+        index_products(pk_set)
+
+
+@receiver(post_save, sender=ProductIngredient)
+@receiver(post_delete, sender=ProductIngredient)
+def search_product_ingredient_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_products([instance.product_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def search_ingredient_renamed(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    index_products(instance.products.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=Preference)
+def search_preference_renamed(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    index_products(Product.objects.filter(preferences=instance).values_list("id", flat=True))
+
+
+# ===========================================================
+#   VOCABULARIO DEL "¿QUISISTE DECIR?"
+# ===========================================================
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def fuzzy_vocabulary_changed(sender, **kwargs):
+    fuzzy.invalidate()
+
+
+# ===========================================================
+#   AUTOCOMPLETADO (solo las comunas donde aparece el producto)
+# ===========================================================
+@receiver(post_save, sender=Product)
+def autocomplete_product_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    autocomplete.invalidate_products([instance.id])
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=DeliveryZone)
+@receiver(post_delete, sender=DeliveryZone)
+def autocomplete_catalog_changed(sender, **kwargs):
+    autocomplete.invalidate()
+
+
+@receiver(post_save, sender=Profile)
+def autocomplete_profile_saved(sender, instance, raw=False, **kwargs):
+    if raw or not _vendor_comuna_changed(instance):
+        return
+    autocomplete.invalidate([instance._previous_comuna_id, instance.comuna_id])
+
+
+@receiver(post_save, sender=ProductIngredient)
+@receiver(post_delete, sender=ProductIngredient)
+def autocomplete_product_ingredient_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    autocomplete.invalidate_products([instance.product_id])
+
+
+@receiver(m2m_changed, sender=Product.ingredients.through)
+def autocomplete_ingredients_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        autocomplete.invalidate_products([instance.pk])
+    elif action == "post_clear":
+        autocomplete.invalidate()   # ingredient.products.clear(): ya no se sabe a quién afectó
+    else:
+        autocomplete.invalidate_products(pk_set)
+
+
+# ===========================================================
+#   PRODUCTOS SIMILARES (incremental)
+# ===========================================================
+def _similar_key(product_id):
+    """(categoría, comuna del listado): lo único de la fila que entra al puntaje."""
+    return Product.objects.filter(pk=product_id).values_list("category_id", "listing__comuna_id").first()
+
+
+@receiver(pre_save, sender=Product)
+def remember_similar_key(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._similar_key = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {"category", "category_id", "vendor", "vendor_id"} & set(update_fields):
+        instance._similar_key = False   # save(update_fields=...) que no toca categoría ni local
+        return
+    instance._similar_key = _similar_key(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def similar_product_saved(sender, instance, created, raw=False, **kwargs):
+    """Producto nuevo, cambio de categoría o de comuna del listado (el listado ya se refrescó)."""
+    if raw:
+        return
+    before = getattr(instance, "_similar_key", None)
+    if before is False or (not created and before is not None and before == _similar_key(instance.pk)):
+        return
+    refresh_similar([instance.id])
+
+
+@receiver(pre_delete, sender=Product)
+def remember_similar_owners(sender, instance, **kwargs):
+    instance._similar_owner_ids = list(
+        SimilarProduct.objects.filter(similar_id=instance.pk).values_list("product_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def similar_product_deleted(sender, instance, **kwargs):
+    """Sus filas se van en cascada: las listas que lo tenían se rellenan hasta TOP_K."""
+    refresh_similar(getattr(instance, "_similar_owner_ids", []))
+
+
+@receiver(post_save, sender=Profile)
+def similar_profile_saved(sender, instance, raw=False, **kwargs):
+    """El término "misma comuna" del puntaje cambia para todos los productos del local."""
+    if raw or not _vendor_comuna_changed(instance):
+        return
+    refresh_similar(Product.objects.filter(vendor__created_by_id=instance.user_id).values_list("id", flat=True))
+
+
+@receiver(m2m_changed, sender=Product.preferences.through)
+@receiver(m2m_changed, sender=Product.ingredients.through)
+def similar_product_m2m_changed(sender, instance, action, reverse, pk_set, model, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        refresh_similar([instance.id])
+    elif model is Product and pk_set:
+        refresh_similar(pk_set)
+
+
+@receiver(post_save, sender=ProductIngredient)
+@receiver(post_delete, sender=ProductIngredient)
+def similar_product_ingredient_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_similar([instance.product_id])
+
+
+# ===========================================================
+#   DERIVADOS DE IMÁGENES (fuera del request)
+# ===========================================================
+@receiver(post_save, sender=Product)
+def images_product_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if needs_derivatives(instance):
+        schedule_derivatives(instance.id)
+    elif not instance.image and instance.image_derivatives:
+        clear_derivatives(instance.id)
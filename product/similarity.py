@@ -0,0 +1,232 @@
+"""
+🍕 "Productos similares" precalculados (tabla SimilarProduct).
+
+Puntaje entre dos productos de la misma categoría:
+    0.60 · Jaccard(ingredientes) + 0.25 · Jaccard(preferencias) + 0.15 · misma comuna
+
+Los conjuntos se guardan como bitsets (int de Python) → intersección/unión con
+& | y bit_count(), sin recorrer listas. Solo se comparan candidatos que comparten
+algo (índice invertido por ingrediente/preferencia/comuna), no toda la categoría.
+
+- rebuild_similar(): cálculo completo por categoría (comando rebuild_similar).
+- refresh_similar(ids): incremental cuando cambian ingredientes/preferencias de
+  un producto; recalcula solo las listas que lo incluyen o que ahora lo incluirían.
+"""
+import heapq
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import F
+
+from .catalog import filter_by_comuna, filter_by_country
+from .models import Product, ProductIngredient, SimilarProduct
+
+
+TOP_K = 8
+INGREDIENT_WEIGHT = 0.60
+PREFERENCE_WEIGHT = 0.25
+COMUNA_WEIGHT = 0.15
+
+Features = namedtuple("Features", "id category_id comuna_id ingredient_ids preference_ids ingredients preferences")
+
+
+def _bitmask(ids):
+    mask = 0
+    for i in ids:
+        mask |= 1 << i
+    return mask
+
+
+def jaccard(a, b):
+    union = (a | b).bit_count()
+    return (a & b).bit_count() / union if union else 0.0
+
+
+def score(p, q):
+    s = INGREDIENT_WEIGHT * jaccard(p.ingredients, q.ingredients)
+    s += PREFERENCE_WEIGHT * jaccard(p.preferences, q.preferences)
+    if p.comuna_id and p.comuna_id == q.comuna_id:
+        s += COMUNA_WEIGHT
+    return s
+
+
+# ===========================================================
+#   CARGA DE CARACTERÍSTICAS
+# ===========================================================
+def load_features(category_id):
+    """Características de todos los productos de una categoría (3 consultas)."""
+    rows = Product.objects.filter(category_id=category_id).values_list("id", "listing__comuna_id")
+
+    ingredients = defaultdict(list)
+    for pid, iid in ProductIngredient.objects.filter(product__category_id=category_id).values_list(
+        "product_id", "ingredient_id"
+    ):
+        ingredients[pid].append(iid)
+
+    preferences = defaultdict(list)
+    for pid, pref_id in Product.preferences.through.objects.filter(
+        product__category_id=category_id
+    ).values_list("product_id", "preference_id"):
+        preferences[pid].append(pref_id)
+
+    return {
+        pid: Features(
+            pid, category_id, comuna_id,
+            tuple(ingredients[pid]), tuple(preferences[pid]),
+            _bitmask(ingredients[pid]), _bitmask(preferences[pid]),
+        )
+        for pid, comuna_id in rows
+    }
+
+
+class _Block:
+    """Productos de una categoría + índices invertidos para generar candidatos."""
+
+    def __init__(self, features):
+        self.features = features
+        self.by_ingredient = defaultdict(list)
+        self.by_preference = defaultdict(list)
+        self.by_comuna = defaultdict(list)
+        for f in features.values():
+            for iid in f.ingredient_ids:
+                self.by_ingredient[iid].append(f.id)
+            for pref_id in f.preference_ids:
+                self.by_preference[pref_id].append(f.id)
+            if f.comuna_id:
+                self.by_comuna[f.comuna_id].append(f.id)
+        for ids in self.by_comuna.values():
+            ids.sort()
+
+    def candidates(self, p):
+        found = set()
+        for iid in p.ingredient_ids:
+            found.update(self.by_ingredient[iid])
+        for pref_id in p.preference_ids:
+            found.update(self.by_preference[pref_id])
+        # Solo por comuna todos empatan → basta con los primeros K
+        if p.comuna_id:
+            found.update(self.by_comuna[p.comuna_id][:TOP_K + 1])
+        found.discard(p.id)
+        return found
+
+    def top_k(self, pid):
+        p = self.features[pid]
+        scored = (
+            (round(score(p, self.features[qid]), 4), -qid)
+            for qid in self.candidates(p)
+        )
+        best = heapq.nlargest(TOP_K, (s for s in scored if s[0] > 0))
+        return [(-neg_qid, s) for s, neg_qid in best]
+
+
+# ===========================================================
+#   ESCRITURA
+# ===========================================================
+def _write(lists, batch_size=1000):
+    """lists = {product_id: [(similar_id, score)]} → reemplaza las filas de esos productos."""
+    product_ids = list(lists)
+    rows = [
+        SimilarProduct(product_id=pid, similar_id=qid, rank=rank, score=s)
+        for pid, neighbours in lists.items()
+        for rank, (qid, s) in enumerate(neighbours)
+    ]
+    with transaction.atomic():
+        for start in range(0, len(product_ids), batch_size):
+            SimilarProduct.objects.filter(product_id__in=product_ids[start:start + batch_size]).delete()
+        SimilarProduct.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+# ===========================================================
+#   API PÚBLICA
+# ===========================================================
+def rebuild_similar():
+    """Recalcula todo, categoría por categoría. Devuelve (productos, filas)."""
+    category_ids = Product.objects.order_by().values_list("category_id", flat=True).distinct()
+
+    total_products = total_rows = 0
+    for category_id in category_ids:
+        block = _Block(load_features(category_id))
+        lists = {pid: block.top_k(pid) for pid in block.features}
+        total_rows += _write(lists)
+        total_products += len(lists)
+    return total_products, total_rows
+
+
+def refresh_similar(product_ids):
+    """
+    Incremental: para cada producto cambiado recalcula su lista y la de los
+    productos de su categoría que lo tenían o que ahora deberían tenerlo.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+
+    # Listas que apuntan a productos que cambiaron de categoría o se borraron
+    stale_owners = set(
+        SimilarProduct.objects.filter(similar_id__in=product_ids)
+        .exclude(product__category_id=F("similar__category_id"))
+        .values_list("product_id", flat=True)
+    )
+
+    categories = defaultdict(set)
+    for pid, category_id in Product.objects.filter(id__in=product_ids | stale_owners).values_list("id", "category_id"):
+        categories[category_id].add(pid)
+
+    written = 0
+    for category_id, changed in categories.items():
+        block = _Block(load_features(category_id))
+
+        # Estado actual: vecinos de cada lista de la categoría
+        current = defaultdict(dict)
+        for owner, qid, s in SimilarProduct.objects.filter(product__category_id=category_id).values_list(
+            "product_id", "similar_id", "score"
+        ):
+            current[owner][qid] = s
+
+        # Quien ya lo tenía en su lista (puede subir, bajar o salir)
+        affected = set(changed)
+        affected.update(owner for owner, neighbours in current.items() if changed & neighbours.keys())
+
+        # Quien ahora lo metería en su top-k
+        for pid in changed:
+            p = block.features.get(pid)
+            if p is None:
+                continue
+            for qid in block.candidates(p) - affected:
+                neighbours = current.get(qid, {})
+                s = round(score(block.features[qid], p), 4)
+                if s <= 0:
+                    continue
+                # Mismo criterio que top_k: más puntaje y, a igual puntaje, menor id
+                if len(neighbours) < TOP_K or (s, -pid) > min((v, -k) for k, v in neighbours.items()):
+                    affected.add(qid)
+
+        written += _write({pid: block.top_k(pid) for pid in affected if pid in block.features})
+    return written
+
+
+def similar_products(product, limit=4, country_id=None, comuna_id=None):
+    """
+    Vecinos precalculados de `product` visibles para el usuario (país/comuna),
+    en una consulta indexada por (product, rank). Si no hay ninguno (producto sin
+    ingredientes en común o índice aún vacío) se muestran los más nuevos de la categoría.
+    """
+    def visible(products):
+        if country_id:
+            products = filter_by_country(products, country_id)
+        if comuna_id:
+            products = filter_by_comuna(products, comuna_id)
+        return products.select_related("category", "vendor__created_by__profile__country")
+
+    similar = list(
+        visible(Product.objects.filter(similar_to_rows__product_id=product.id))
+        .order_by("similar_to_rows__rank")[:limit]
+    )
+    if similar:
+        return similar
+
+    return list(
+        visible(Product.objects.filter(category_id=product.category_id).exclude(id=product.id))
+        .order_by("-added_date")[:limit]
+    )
@@ -6,6 +6,7 @@ app_name = 'product'
 urlpatterns = [
 
     path('search', views.search, name="search"),
+    path('autocomplete/', views.autocomplete, name="autocomplete"),
     path('<slug:category_slug>/<slug:product_slug>/', views.product, name="product"),
     path('<slug:category_slug>/', views.category, name="category"),
 
@@ -1,4 +1,27 @@
-from django.db.models import Count, Case, When, IntegerField, Q
+from django.db.models import F, IntegerField, Value
+
+from .allergens import exclude_allergens
+
+
+def preference_match_count(user_mask):
+    """
+    Cantidad de preferencias del usuario que tiene cada producto, como expresión
+    SQL sobre Product.preference_mask (sin JOIN con la tabla M2M):
+        Σ ((preference_mask & 2^i) >> i)   para cada bit i del usuario
+    """
+    terms = [
+        F("preference_mask").bitand(1 << bit).bitrightshift(bit)
+        for bit in range(user_mask.bit_length())
+        if user_mask >> bit & 1
+    ]
+    if not terms:
+        return Value(0, output_field=IntegerField())
+
+    expression = terms[0]
+    for term in terms[1:]:
+        expression = expression + term
+    return expression
+
 
 def aplicar_preferencias(user, queryset, solo_pref=False):
     """
@@ -10,6 +33,8 @@ def aplicar_preferencias(user, queryset, solo_pref=False):
     - Si solo_pref=False → devuelve todos los productos, pero ordenando primero
       los que coinciden con sus preferencias.
 
+    Usa los bitmasks Profile.preference_mask / Product.preference_mask
+    (sincronizados por señales): una expresión bit a bit, sin JOIN ni DISTINCT.
     Compatible con todas las vistas (home, categoría, búsqueda).
     """
 
@@ -18,38 +43,30 @@ def aplicar_preferencias(user, queryset, solo_pref=False):
         return queryset
 
     profile = getattr(user, "profile", None)
-    if not profile or not profile.preferences.exists():
+    user_mask = getattr(profile, "preference_mask", 0)
+    if not user_mask:
         return queryset
 
-    prefs = profile.preferences.all()
+    queryset = queryset.annotate(match_pref=preference_match_count(user_mask))
 
     # 🌱 2. Modo filtrado estricto
     if solo_pref:
-        return (
-            queryset.filter(preferences__in=prefs)
-            .distinct()
-            .annotate(
-                match_pref=Count(
-                    Case(
-                        When(preferences__in=prefs, then=1),
-                        output_field=IntegerField(),
-                    )
-                )
-            )
-            .order_by("-match_pref", "-id")
-        )
-
-    # 🌾 3. Modo orden inteligente (todas las pizzas, preferidas arriba)
-    return (
-        queryset
-        .annotate(
-            match_pref=Count(
-                Case(
-                    When(preferences__in=prefs, then=1),
-                    output_field=IntegerField(),
-                )
-            )
-        )
-        .order_by("-match_pref", "-id")
-        .distinct()
-    )
+        queryset = queryset.filter(match_pref__gt=0)
+
+    # 🌾 3. Orden inteligente (preferidas arriba)
+    return queryset.order_by("-match_pref", "-id")
+
+
+def excluir_alergenos(user, queryset, activo=False):
+    """
+    ⚠️ Filtro "apto para mí": si activo=True quita del queryset los productos con
+    ingredientes asociados a las alergias del usuario.
+
+    Usa Profile.allergy_mask / Product.allergen_mask (product/allergens.py):
+    un IN sobre una columna indexada, sin revisar producto por producto.
+    """
+    if not activo or not user.is_authenticated:
+        return queryset
+
+    profile = getattr(user, "profile", None)
+    return exclude_allergens(queryset, getattr(profile, "allergy_mask", 0))
@@ -1,7 +1,8 @@
-import random
 from django.contrib import messages
 from django.shortcuts import redirect, render, get_object_or_404
-from django.db.models import Q, BooleanField, ExpressionWrapper
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.db.models import Case, IntegerField, Value, When
 
 from product.models import Product
 from .models import Category
@@ -10,29 +11,70 @@ from cart.cart import Cart
 from core.models import Country
 from order.utilities import get_allergy_conflicts
 
-from product.utils import aplicar_preferencias
+from product.utils import aplicar_preferencias, excluir_alergenos
+from product.search import search_product_ids
+from product.fuzzy import suggest
+from product.similarity import similar_products
+from product import autocomplete as autocomplete_index
+from product.catalog import filter_by_country, filter_by_delivery, keyset_page, capped_counts
+from vendor.zones import DeliveryPoint, delivers_to, point_for_comuna
+from location.resolver import resolve_comuna, resolve_comuna_id
+
+
+SEARCH_RESULT_LIMIT = 500
 
 
 # ===========================================================
 #   FUNCIÓN CENTRAL PARA OBTENER LA COMUNA ACTIVA
 # ===========================================================
-def get_active_comuna(request):
+def get_active_comuna_id(request):
 
-    # 1) Comuna temporal establecida en la homepage
+    # 1) Comuna temporal establecida en la homepage (id; sesiones antiguas traen el nombre)
     temp = request.session.get("temp_comuna")
     if temp:
-        return temp
+        if not isinstance(temp, int):
+            temp = resolve_comuna_id(temp)
+            request.session["temp_comuna"] = temp
+        if temp:
+            return temp
 
     # 2) Comuna del perfil (si existe)
     user = request.user
     if user.is_authenticated:
         profile = getattr(user, "profile", None)
-        if profile and profile.comuna:
-            return profile.comuna.nombre
+        if profile and profile.comuna_id:
+            return profile.comuna_id
 
     return None
 
 
+def get_active_comuna(request):
+    """Nombre de la comuna activa (para mostrar); los filtros usan get_active_comuna_id."""
+    ref = resolve_comuna(get_active_comuna_id(request))
+    return ref.nombre if ref else None
+
+
+def get_active_point(request):
+    """
+    Punto de reparto activo (DeliveryPoint): centroide de la comuna temporal o,
+    si no hay, la ubicación del perfil. None si no se conoce.
+    """
+    comuna_id = get_active_comuna_id(request)
+    if not comuna_id:
+        return None
+
+    user = request.user
+    profile = getattr(user, "profile", None) if user.is_authenticated else None
+    if (
+        not request.session.get("temp_comuna")
+        and profile and profile.comuna_id == comuna_id
+        and profile.lat is not None and profile.lng is not None
+    ):
+        return DeliveryPoint(profile.lat, profile.lng, comuna_id)
+
+    return point_for_comuna(comuna_id)
+
+
 # ===========================================================
 #   PRODUCT DETAIL
 # ===========================================================
@@ -50,28 +92,23 @@ def product(request, category_slug, product_slug):
 
     # COMUNA
     comuna_activa = get_active_comuna(request)
-    vendor_comuna = getattr(product.vendor.created_by.profile.comuna, "nombre", None)
+    punto = get_active_point(request) if comuna_activa else None
 
-    if comuna_activa and vendor_comuna and comuna_activa.lower() != vendor_comuna.lower():
+    if punto and not delivers_to(product.vendor_id, punto):
         messages.warning(request, f"🚫 Esta pizza no está disponible en tu comuna ({comuna_activa}).")
         return redirect("product:category", category_slug=category_slug)
 
     # ============================
     # PRODUCTOS SIMILARES
     # ============================
-    similar_qs = Product.objects.filter(category=product.category).exclude(id=product.id)
-
+    country_id = None
     if request.user.is_authenticated and hasattr(request.user, "profile") and request.user.profile.country:
-        similar_qs = similar_qs.filter(vendor__country=request.user.profile.country)
+        country_id = request.user.profile.country_id
 
-    if comuna_activa:
-        similar_qs = similar_qs.filter(
-            vendor__created_by__profile__comuna__nombre__iexact=comuna_activa
-        )
-
-    similar = list(similar_qs)
-    if len(similar) > 4:
-        similar = random.sample(similar, 4)
+    # Vecinos precalculados (product/similarity.py) → una consulta por (product, rank)
+    similar = similar_products(
+        product, limit=4, country_id=country_id, comuna_id=punto.comuna_id if punto else None
+    )
 
     # ============================
     # LOG DE VISTA (GET)
@@ -164,14 +201,16 @@ def category(request, category_slug):
     categoria = get_object_or_404(Category, slug=category_slug)
 
     # PAÍS
+    products = Product.objects.filter(listing__category_id=categoria.id)
+
     if request.user.is_authenticated and hasattr(request.user, "profile") and request.user.profile.country:
-        products = Product.objects.filter(category=categoria, vendor__country=request.user.profile.country)
+        products = filter_by_country(products, request.user.profile.country_id)
     else:
         country_id = request.session.get("selected_country")
         if country_id:
             try:
                 country = Country.objects.get(id=country_id)
-                products = Product.objects.filter(category=categoria, vendor__country=country)
+                products = filter_by_country(products, country.id)
             except Country.DoesNotExist:
                 products = Product.objects.none()
         else:
@@ -180,34 +219,43 @@ def category(request, category_slug):
     # COMUNA
     comuna_activa = get_active_comuna(request)
     if comuna_activa:
-        products = products.filter(
-            vendor__created_by__profile__comuna__nombre__iexact=comuna_activa
-        )
+        products = filter_by_delivery(products, get_active_point(request))
 
     # PREFERENCIAS
     solo_pref = request.GET.get("solo_pref") == "1"
     products = aplicar_preferencias(request.user, products, solo_pref)
 
-    # ORDENAR → primero las ofertas activas
-    products = products.annotate(
-        tiene_oferta=ExpressionWrapper(Q(offer__is_active=True), output_field=BooleanField())
-    ).order_by('-tiene_oferta', 'id')
-
-    log_event(
-        request,
-        action=f"📂 Entró a la categoría '{categoria.title}'",
-        page="product/category",
-        extra_data={
-            "productos_disponibles": products.count(),
-            "productos_en_oferta": products.filter(offer__is_active=True).count()
-        }
-    )
+    # ALERGIAS ("apto para mí")
+    sin_alergenos = request.GET.get("sin_alergenos") == "1"
+    products = excluir_alergenos(request.user, products, sin_alergenos)
+
+    # PÁGINA → primero las ofertas vigentes (cursor en vez de OFFSET)
+    cursor = request.GET.get("cursor")
+    page = keyset_page(products, cursor)
+
+    if request.GET.get("format") == "json":
+        return _load_more_response(request, page)
+
+    if not cursor:
+        total, con_oferta, exacto = capped_counts(products, page.now)
+        log_event(
+            request,
+            action=f"📂 Entró a la categoría '{categoria.title}'",
+            page="product/category",
+            extra_data={
+                "productos_disponibles": total,
+                "productos_en_oferta": con_oferta,
+                "conteo_exacto": exacto,
+            }
+        )
 
     return render(request, "product/category.html", {
         "category": categoria,
-        "products": products,
+        "products": page.items,
+        "next_cursor": page.next_cursor,
         "comuna": comuna_activa,
         "solo_pref": solo_pref,
+        "sin_alergenos": sin_alergenos,
     })
 
 
@@ -219,45 +267,100 @@ def search(request):
 
     query = request.GET.get('query', '').strip()
 
-    products = Product.objects.filter(
-        Q(title__icontains=query) |
-        Q(description__icontains=query)
-    )
+    # TEXTO → ids ordenados por relevancia desde el índice de búsqueda
+    suggestion = None
+    corrected = False
+    if query:
+        ranked_ids = [pid for pid, _ in search_product_ids(query, limit=SEARCH_RESULT_LIMIT)]
+
+        # ¿Quisiste decir...? (errores de tipeo: "peperoni", "muzarela")
+        suggestion = suggest(query)
+        if suggestion and not ranked_ids:
+            ranked_ids = [pid for pid, _ in search_product_ids(suggestion, limit=SEARCH_RESULT_LIMIT)]
+            corrected = bool(ranked_ids)
+
+        products = Product.objects.filter(id__in=ranked_ids).annotate(
+            search_rank=Case(
+                *[When(id=pid, then=Value(pos)) for pos, pid in enumerate(ranked_ids)],
+                default=Value(len(ranked_ids)),
+                output_field=IntegerField(),
+            )
+        )
+        rank_field = "search_rank"
+    else:
+        products = Product.objects.all()
+        rank_field = None
 
     # PAÍS
     if request.user.is_authenticated and hasattr(request.user, "profile") and request.user.profile.country:
-        products = products.filter(vendor__country=request.user.profile.country)
+        products = filter_by_country(products, request.user.profile.country_id)
 
     # COMUNA
     comuna_activa = get_active_comuna(request)
     if comuna_activa:
-        products = products.filter(
-            vendor__created_by__profile__comuna__nombre__iexact=comuna_activa
-        )
+        products = filter_by_delivery(products, get_active_point(request))
 
     # PREFERENCIAS
     solo_pref = request.GET.get("solo_pref") == "1"
     products = aplicar_preferencias(request.user, products, solo_pref)
 
-    # ORDENAR → primero las ofertas activas
-    products = products.annotate(
-        tiene_oferta=ExpressionWrapper(Q(offer__is_active=True), output_field=BooleanField())
-    ).order_by('-tiene_oferta', 'id')
+    # ALERGIAS ("apto para mí")
+    sin_alergenos = request.GET.get("sin_alergenos") == "1"
+    products = excluir_alergenos(request.user, products, sin_alergenos)
 
-    if query:
+    # PÁGINA → primero las ofertas vigentes, luego relevancia
+    cursor = request.GET.get("cursor")
+    page = keyset_page(products, cursor, rank_field=rank_field)
+
+    if request.GET.get("format") == "json":
+        return _load_more_response(request, page)
+
+    if query and not cursor:
+        total, con_oferta, exacto = capped_counts(products, page.now)
         log_event(
             request,
             action=f"🔍 Buscó '{query}'",
             page="product/search",
             extra_data={
-                "resultados": products.count(),
-                "con_oferta": products.filter(offer__is_active=True).count()
+                "resultados": total,
+                "con_oferta": con_oferta,
+                "conteo_exacto": exacto,
+                "sugerencia": suggestion,
             }
         )
 
     return render(request, "product/search.html", {
-        "products": products,
+        "products": page.items,
+        "next_cursor": page.next_cursor,
         "query": query,
+        "suggestion": suggestion,
+        "corrected": corrected,
         "comuna": comuna_activa,
         "solo_pref": solo_pref,
+        "sin_alergenos": sin_alergenos,
     })
+
+
+# ===========================================================
+#   "CARGAR MÁS" (fragmento JSON para category / search)
+# ===========================================================
+def _load_more_response(request, page):
+    html = render_to_string("product/parts/list_page.html", {"products": page.items}, request=request)
+    return JsonResponse({
+        "html": html,
+        "next_cursor": page.next_cursor,
+        "has_more": page.next_cursor is not None,
+    })
+
+
+# ===========================================================
+#   AUTOCOMPLETE (navbar)
+# ===========================================================
+def autocomplete(request):
+    query = request.GET.get("q", "").strip()
+
+    results = []
+    if query:
+        results = autocomplete_index.suggest(query, get_active_comuna_id(request))
+
+    return JsonResponse({"query": query, "results": results})
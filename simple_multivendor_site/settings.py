@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -52,6 +53,10 @@ INSTALLED_APPS = [
 ]
 NOMINATIM_EMAIL = "ni.briceno@duocuc.cl"
 
+# Geocodificación (vendor/geocoding.py): "nominatim" o "stub" (sin red; por defecto en tests)
+GEOCODER = os.getenv('GEOCODER', 'stub' if 'test' in sys.argv else 'nominatim')
+GEOCODING_ASYNC = os.getenv('GEOCODING_ASYNC', 'True') == 'True'
+
 # Middleware
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -116,6 +121,13 @@ DATABASES = {
     }
 }
 
+# Búsqueda de productos: "auto" (según el motor de BD), "mysql", "sqlite" o "memory"
+PRODUCT_SEARCH_BACKEND = os.getenv('PRODUCT_SEARCH_BACKEND', 'auto')
+
+# Derivados de imágenes (product/images.py): en segundo plano tras el commit
+PRODUCT_IMAGE_ASYNC = os.getenv('PRODUCT_IMAGE_ASYNC', 'True') == 'True'
+PRODUCT_IMAGE_WORKERS = int(os.getenv('PRODUCT_IMAGE_WORKERS', '2'))
+
 
 
 
@@ -150,6 +162,10 @@ LOGOUT_REDIRECT_URL = 'core:home'
 SESSION_COOKIE_AGE = 86400  # 1 día en segundos
 CART_SESSION_ID = 'cart'
 
+# Carrito compartido web + bot (cart/store.py): "db" o "memory" (solo desarrollo/tests)
+CART_STORE_BACKEND = os.getenv('CART_STORE_BACKEND', 'db')
+CART_TTL = int(os.getenv('CART_TTL', str(60 * 60 * 24 * 3)))  # segundos sin cambios antes de vencer
+
 # MERCADOPAGO
 MERCADOPAGO_SANDBOX = True  # Cambia a False cuando vayas a producción
 
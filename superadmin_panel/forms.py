@@ -4,6 +4,7 @@ from product.models import Product
 from offers.models import Offer
 from django.db.models import Max 
 from product.models import Product, Ingredient, IngredientCategory
+from location.hierarchy import bind_dpa_choices
 from location.models import Region, Provincia, Comuna
 
 
@@ -59,7 +60,6 @@ from django import forms
 from django.contrib.auth.models import User
 
 from vendor.models import Vendor, Profile
-from vendor.geocoding import geocode_address  # si lo creaste, si no, lo comentas
 
 class VendorEditForm(forms.ModelForm):
     # ====== USER ======
@@ -102,16 +102,23 @@ class VendorEditForm(forms.ModelForm):
 
         self.fields["region"].queryset = Region.objects.all().order_by("nombre")
 
-        if profile.region_id:
-            self.fields["provincia"].queryset = Provincia.objects.filter(region_id=profile.region_id).order_by("nombre")
+        # POST: validar contra lo elegido en el form; GET: lo guardado en el perfil
+        region_id = self.data.get("region") or profile.region_id
+        provincia_id = self.data.get("provincia") or profile.provincia_id
+
+        if region_id:
+            self.fields["provincia"].queryset = Provincia.objects.filter(region_id=region_id).order_by("nombre")
         else:
             self.fields["provincia"].queryset = Provincia.objects.none()
 
-        if profile.provincia_id:
-            self.fields["comuna"].queryset = Comuna.objects.filter(provincia_id=profile.provincia_id).order_by("nombre")
+        if provincia_id:
+            self.fields["comuna"].queryset = Comuna.objects.filter(provincia_id=provincia_id).order_by("nombre")
         else:
             self.fields["comuna"].queryset = Comuna.objects.none()
 
+        # Opciones desde la jerarquía DPA en memoria (los querysets solo validan)
+        bind_dpa_choices(self, region_id, provincia_id)
+
         self.fields["country"].initial = profile.country_id
         self.fields["region"].initial = profile.region_id
         self.fields["provincia"].initial = profile.provincia_id
@@ -143,27 +150,7 @@ class VendorEditForm(forms.ModelForm):
         profile.address = self.cleaned_data.get("address") or ""
         profile.zipcode = self.cleaned_data.get("zipcode") or ""
 
-        # geocoding
-        try:
-            comuna_obj = profile.comuna
-            region_obj = profile.region
-            country_obj = profile.country
-
-            comuna_name = getattr(comuna_obj, "nombre", str(comuna_obj) if comuna_obj else "")
-            region_name = getattr(region_obj, "nombre", str(region_obj) if region_obj else "")
-            country_name = getattr(country_obj, "name", getattr(country_obj, "nombre", "Chile"))
-
-            if profile.address and comuna_name:
-                lat, lng = geocode_address(
-                    address=profile.address,
-                    comuna=comuna_name,
-                    region=region_name,
-                    country=country_name,
-                )
-                profile.lat = lat
-                profile.lng = lng
-        except Exception:
-            pass
+        # geocoding: Profile.save (caché/gazetteer ahora, dirección exacta en segundo plano)
 
         if commit:
             user.save()
@@ -309,6 +296,8 @@ class VendorMessagingForm(forms.Form):
             except (ValueError, TypeError):
                 self.fields["comuna"].queryset = Comuna.objects.none()
 
+        bind_dpa_choices(self, region_id, provincia_id)
+
 
 
 class CustomerEditForm(forms.ModelForm):
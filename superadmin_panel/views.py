@@ -29,12 +29,13 @@ from .models import VendorMessageLog
 
 from vendor.models import Vendor, VendorWeeklyMenu
 from product.models import Product, Ingredient, IngredientCategory
+from product.forms import NormalizedImageFormMixin
 from offers.models import Offer
-from location.models import Provincia, Comuna
+from location.hierarchy import get_hierarchy
 
 
 
-class ProductForm(forms.ModelForm):
+class ProductForm(NormalizedImageFormMixin, forms.ModelForm):
     """Form para que el super admin edite productos."""
     class Meta:
         model = Product
@@ -831,22 +832,21 @@ def vendor_messaging_history(request):
 
 def api_provincias(request):
     region_id = request.GET.get("region_id")
-    if not region_id:
+    if not (region_id or "").isdigit():
         return JsonResponse({"results": []})
 
-    provincias = Provincia.objects.filter(region_id=region_id).order_by("nombre")
-    data = [{"id": p.id, "nombre": p.nombre} for p in provincias]
-    return JsonResponse({"results": data})
+    # Desde la jerarquía DPA en memoria (location/hierarchy.py), sin consultas
+    provincias = get_hierarchy().provincias_of(int(region_id))
+    return JsonResponse({"results": [{"id": pk, "nombre": nombre} for pk, nombre in provincias]})
 
 
 def api_comunas(request):
     provincia_id = request.GET.get("provincia_id")
-    if not provincia_id:
+    if not (provincia_id or "").isdigit():
         return JsonResponse({"results": []})
 
-    comunas = Comuna.objects.filter(provincia_id=provincia_id).order_by("nombre")
-    data = [{"id": c.id, "nombre": c.nombre} for c in comunas]
-    return JsonResponse({"results": data})
+    comunas = get_hierarchy().comunas_of(int(provincia_id))
+    return JsonResponse({"results": [{"id": pk, "nombre": nombre} for pk, nombre in comunas]})
 
 
 